@@ -0,0 +1,316 @@
+"""
+Pluggable translation backends.
+
+Every backend exposes the same small interface: ``translate`` for one text,
+``translate_batch`` for many, the request limits the batching layer needs,
+and optionally ``detect_batch`` for source language detection. Backends
+are looked up by name with ``get_backend``, which returns one shared
+instance per process so that connection pools are reused by every worker.
+
+- ``google``: Google Translate through deep_translator
+- ``rest``: the generic REST translation API (see translate.py), over a
+  pooled async HTTP client with keep-alive and HTTP/2 where available
+- ``stub``: the same client pointed at the local ``stub_server.py``, for tests
+"""
+
+import asyncio
+import importlib.util
+import os
+from threading import Lock, Thread, local
+
+from batching import LINE_SEPARATOR, joined_batch
+
+# Backend used when none is given
+DEFAULT_BACKEND = "google"
+
+# Generic translation API endpoint, overridable from the environment
+DEFAULT_API_URL = "https://api.translation-service.com/v2/translate"
+
+# Default number of pooled connections to the REST API
+DEFAULT_POOL_SIZE = 16
+
+# Detections less likely than this are reported as unknown
+MIN_DETECT_CONFIDENCE = 0.95
+
+
+class TranslationBackend:
+    """
+    Base class for translation backends.
+
+    Subclasses set ``name`` (also the translation memory and rate limiter
+    key) and the batch limits, and implement ``translate``; ``translate_batch``
+    defaults to joining texts with ``batch_separator``.
+    """
+
+    name = None
+    max_batch_chars = 4500
+    max_batch_items = 50
+    batch_separator = LINE_SEPARATOR
+
+    def translate(self, text, target, source="auto"):
+        """Translate a single text; raises on failure."""
+        raise NotImplementedError
+
+    def translate_batch(self, texts, target, source="auto"):
+        """Translate many texts in one request; returns translations in the same order."""
+        return joined_batch(lambda text: self.translate(text, target, source), self.batch_separator)(texts)
+
+    def detection(self):
+        """
+        How ``detect_batch`` works: "remote" (a request that goes through the rate
+        limiter), "local", or None when the backend can't detect languages.
+        """
+        return None
+
+    def detect_batch(self, texts):
+        """
+        Detect the language of many texts; returns language codes in the same order,
+        or None for texts whose language isn't known with MIN_DETECT_CONFIDENCE.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any connections held by the backend."""
+
+
+# Language codes Google spells differently from langdetect (ISO 639-1)
+GOOGLE_CODE_ALIASES = {"he": "iw", "jv": "jw"}
+
+
+class GoogleBackend(TranslationBackend):
+    """Google Translate through deep_translator (the web endpoint rejects texts over 5000 chars)."""
+
+    name = "google"
+    max_batch_chars = 4500
+    max_batch_items = 50
+
+    def __init__(self):
+        # GoogleTranslator instances keep per-request state, so each thread gets its own
+        self._local = local()
+
+    def translate(self, text, target, source="auto"):
+        translators = getattr(self._local, "translators", None)
+        if translators is None:
+            translators = self._local.translators = {}
+        translator = translators.get((source, target))
+        if translator is None:
+            from deep_translator import GoogleTranslator
+            translator = translators[(source, target)] = GoogleTranslator(source=source, target=target)
+        return translator.translate(text)
+
+    def detection(self):
+        # Detected locally with langdetect, when it is installed
+        return "local" if importlib.util.find_spec("langdetect") is not None else None
+
+    def detect_batch(self, texts):
+        from langdetect import DetectorFactory, LangDetectException, detect_langs
+
+        # Seeded, so the same text is always detected the same way
+        DetectorFactory.seed = 0
+        codes = self._supported_codes()
+        detected = []
+        for text in texts:
+            try:
+                best = detect_langs(text)[0]
+            except LangDetectException:
+                best = None
+            # langdetect guesses wildly on short texts, so only confident results count
+            code = best.lang if best is not None and best.prob >= MIN_DETECT_CONFIDENCE else None
+            # langdetect and Google name a few languages differently
+            code = GOOGLE_CODE_ALIASES.get(code, code)
+            detected.append(codes.get(code.lower()) if code else None)
+        return detected
+
+    def _supported_codes(self):
+        # Lowercased code -> code as Google spells it
+        codes = getattr(self, "_codes", None)
+        if codes is None:
+            from deep_translator import GoogleTranslator
+            supported = GoogleTranslator(source="auto", target="en").get_supported_languages(as_dict=True)
+            codes = self._codes = {code.lower(): code for code in supported.values()}
+        return codes
+
+
+class RestBackend(TranslationBackend):
+    """
+    Generic REST translation API over a pooled, keep-alive HTTP client.
+
+    Requests run on an asyncio event loop in a background thread using
+    httpx's AsyncClient (HTTP/2 when the ``h2`` package is installed), so
+    concurrent batches from any number of worker threads share one
+    connection pool. Without httpx, a pooled ``requests.Session`` is used.
+
+    Args:
+        url (str): API endpoint; defaults to TRANSLATION_API_URL or DEFAULT_API_URL
+        api_key (str): API key; defaults to TRANSLATION_API_KEY, read once here
+        pool_size (int): Maximum number of pooled connections
+        timeout (float): Request timeout in seconds
+        http2 (bool): Use HTTP/2 when available
+        name (str): Overrides the translation memory and rate limiter key
+    """
+
+    name = "rest"
+    max_batch_chars = 30000
+    max_batch_items = 128
+    batch_separator = ""
+
+    def __init__(self, url=None, api_key=None, pool_size=DEFAULT_POOL_SIZE, timeout=30.0, http2=True, name=None):
+        if name:
+            self.name = name
+        self.url = url or self.default_url()
+        self.api_key = api_key or os.getenv("TRANSLATION_API_KEY")
+        self.headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            self.headers["Authorization"] = f"Bearer {self.api_key}"
+
+        try:
+            import httpx
+        except ImportError:
+            httpx = None
+
+        if httpx is not None:
+            self.http2 = http2 and importlib.util.find_spec("h2") is not None
+            self._loop = asyncio.new_event_loop()
+            Thread(target=self._loop.run_forever, name="rest-backend-loop", daemon=True).start()
+            self._client = self._run(self._create_client(httpx, pool_size, timeout))
+            self._session = None
+        else:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self.http2 = False
+            self._loop = None
+            self._session = requests.Session()
+            self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+            self._session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+            self._timeout = timeout
+
+    def default_url(self):
+        return os.getenv("TRANSLATION_API_URL") or DEFAULT_API_URL
+
+    def detect_url(self):
+        # The detection endpoint sits next to the translation one (.../v2/detect)
+        return os.getenv("TRANSLATION_API_DETECT_URL") or self.url.rsplit("/", 1)[0] + "/detect"
+
+    async def _create_client(self, httpx, pool_size, timeout):
+        # The client has to be created on the loop that will use it
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        return httpx.AsyncClient(http2=self.http2, limits=limits, timeout=timeout, headers=self.headers)
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def _payload(self, q, target, source):
+        payload = {"q": q, "target": target, "format": "text"}
+        if source and source != "auto":
+            payload["source"] = source
+        return payload
+
+    async def post_async(self, q, target, source="auto"):
+        """Send one request from the event loop and return the decoded JSON body."""
+        return await self._post_json_async(self.url, self._payload(q, target, source))
+
+    async def _post_json_async(self, url, payload):
+        response = await self._client.post(url, json=payload)
+        response.raise_for_status()  # Raise an exception for HTTP errors
+        return response.json()
+
+    def _post(self, q, target, source):
+        return self._post_json(self.url, self._payload(q, target, source))
+
+    def _post_json(self, url, payload):
+        if self._loop is not None:
+            return self._run(self._post_json_async(url, payload))
+        response = self._session.post(url, json=payload, headers=self.headers, timeout=self._timeout)
+        response.raise_for_status()  # Raise an exception for HTTP errors
+        return response.json()
+
+    def translate(self, text, target, source="auto"):
+        translated = self._post(text, target, source).get("translatedText")
+        if translated is None:
+            raise ValueError("Response is missing the translation")
+        return translated
+
+    def translate_batch(self, texts, target, source="auto"):
+        # Batched requests send "q" as a list and get one translation per input, in order
+        result = self._post(list(texts), target, source)
+        translated = result.get("translatedText")
+        if translated is None:
+            items = result.get("translations")
+            if isinstance(items, list):
+                translated = [item.get("translatedText") if isinstance(item, dict) else None for item in items]
+        if not isinstance(translated, list) or len(translated) != len(texts):
+            raise ValueError("Batch response doesn't match the request")
+        if not all(isinstance(text, str) for text in translated):
+            raise ValueError("Batch response is missing translations")
+        return translated
+
+    def detection(self):
+        return "remote"
+
+    def detect_batch(self, texts):
+        # "detections" holds one entry per input: a {"language": ..., "confidence": ...}
+        # dict, or a list of candidates with the most likely first
+        result = self._post_json(self.detect_url(), {"q": list(texts)})
+        detections = result.get("detections")
+        if detections is None:
+            detections = result.get("data", {}).get("detections", [])
+        if len(detections) != len(texts):
+            raise ValueError("Detection response doesn't match the request")
+        detected = []
+        for detection in detections:
+            if isinstance(detection, list):
+                detection = detection[0] if detection else {}
+            confidence = detection.get("confidence")
+            if confidence is not None and confidence < MIN_DETECT_CONFIDENCE:
+                detected.append(None)
+            else:
+                detected.append(detection.get("language") or None)
+        return detected
+
+    def close(self):
+        if self._loop is not None:
+            self._run(self._client.aclose())
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        else:
+            self._session.close()
+
+
+class StubBackend(RestBackend):
+    """REST client for the local stub server started by stub_server.py."""
+
+    name = "stub"
+
+    def default_url(self):
+        from stub_server import DEFAULT_URL
+        return os.getenv("STUB_TRANSLATION_URL") or DEFAULT_URL
+
+
+# Registered backends by name
+BACKENDS = {
+    "google": GoogleBackend,
+    "rest": RestBackend,
+    "stub": StubBackend,
+}
+
+_instances = {}
+_instances_lock = Lock()
+
+
+def get_backend(name=None, **options):
+    """
+    Return a backend by name.
+
+    Without options the process-wide shared instance is returned (created on
+    first use); with options a new instance is built for the caller to close.
+    """
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown translation backend: {name}")
+    if options:
+        return BACKENDS[name](**options)
+    with _instances_lock:
+        backend = _instances.get(name)
+        if backend is None:
+            backend = _instances[name] = BACKENDS[name]()
+        return backend
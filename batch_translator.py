@@ -0,0 +1,413 @@
+"""
+Batch translation of many workbooks at once.
+
+Parsing and writing (the CPU-bound pandas/openpyxl work) are spread over a
+process pool, while translation stays in this process and goes through one
+shared ``TranslationQueue``: every unique text is translated once per
+language for the whole batch, no matter how many workbooks contain it.
+
+Workbooks are pipelined, so files further down the list are parsed while
+earlier ones wait for translations or are being written, and only a
+bounded number of parsed workbooks is held in memory at any time. Batch
+mode uses the default engine; journals are not kept, but the translation
+memory still makes reruns cheap.
+"""
+
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
+
+from cell_rules import CellRules
+from metrics import get_metrics
+from snapshot import read_workbook
+from run_control import CANCELLED_ERROR, TranslationCancelled
+from segmenter import template_intact, translate_plan
+from source_detection import detect_sources
+from translation_memory import TranslationMemory
+from workbook_translator import (
+    MAX_CONCURRENT_REQUESTS,
+    WorkbookTranslationError,
+    apply_translations,
+    language_name,
+    open_request_pool,
+    prepare_output_location,
+    progress_reporter,
+    translate_texts,
+)
+from writers import DEFAULT_WRITER, check_writer, output_path, write_pool, write_sheets
+
+# File extensions picked up when a directory is given
+EXCEL_EXTENSIONS = (".xlsx", ".xls")
+
+
+def find_workbooks(paths, recursive=False):
+    """
+    Expands files, directories and glob patterns into a list of Excel files.
+
+    Args:
+        paths (list): Files, directories or glob patterns
+        recursive (bool): Whether to descend into subdirectories
+
+    Returns:
+        list: Paths of the Excel files found, without duplicates
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            pattern = os.path.join(path, "**", "*") if recursive else os.path.join(path, "*")
+            candidates = sorted(glob.glob(pattern, recursive=recursive))
+        else:
+            candidates = sorted(glob.glob(path, recursive=recursive)) or [path]
+        for candidate in candidates:
+            name = os.path.basename(candidate)
+            # Skip Excel's lock files (~$Book.xlsx)
+            if candidate.lower().endswith(EXCEL_EXTENSIONS) and not name.startswith("~$"):
+                if candidate not in found:
+                    found.append(candidate)
+    return found
+
+
+def output_locations(input_files, output_location=None):
+    """
+    Picks the output folder of every input file.
+
+    With an output folder, each input keeps its folder relative to the inputs'
+    common parent, so ``in/a/catalog.xlsx`` and ``in/b/catalog.xlsx`` are
+    written to ``out/a`` and ``out/b`` instead of overwriting each other's
+    outputs, journals and manifests.
+
+    Args:
+        input_files (list): Paths of the Excel files to translate
+        output_location (str): Output folder; None writes next to each input file
+
+    Returns:
+        dict: Input file -> output folder (None for next to the input file)
+
+    Raises:
+        ValueError: If two inputs would still write the same outputs, e.g.
+            ``catalog.xlsx`` and ``catalog.xls`` in one folder
+    """
+    folders = {}
+    if not output_location:
+        folders = {input_file: None for input_file in input_files}
+    else:
+        parents = {input_file: os.path.dirname(os.path.abspath(input_file)) for input_file in input_files}
+        try:
+            common = os.path.commonpath(list(parents.values())) if parents else None
+        except ValueError:
+            # Inputs on different drives share no parent; collisions are caught below
+            common = None
+        for input_file in input_files:
+            relative = os.path.relpath(parents[input_file], common) if common else os.curdir
+            folders[input_file] = os.path.normpath(os.path.join(output_location, relative))
+
+    owners = {}
+    for input_file in input_files:
+        folder = folders[input_file] or os.path.dirname(os.path.abspath(input_file))
+        key = os.path.normcase(os.path.join(
+            os.path.abspath(folder), os.path.splitext(os.path.basename(input_file))[0]
+        ))
+        if key in owners:
+            raise ValueError(f"{owners[key]} and {input_file} would write the same output files; "
+                             f"rename one of them or translate them separately")
+        owners[key] = input_file
+    return folders
+
+
+class TranslationQueue:
+    """
+    Deduplicating translation queue shared by every workbook in a batch.
+
+    ``submit`` only sends texts that no earlier call has queued for the same
+    language; texts already queued are served by the future that owns them,
+    whether it has finished yet or not.
+
+    Args:
+        memory (TranslationMemory): The translation memory to read from and update
+        request_pool (concurrent.futures.Executor): Shared request pool bounding
+            the requests in flight
+        backend (backends.TranslationBackend): Backend to translate with
+        max_workers (int): How many submissions may be translated at once
+        control (run_control.RunControl): Optional pause/cancel switch
+    """
+
+    def __init__(self, memory, request_pool, backend=None, max_workers=MAX_CONCURRENT_REQUESTS, control=None):
+        self.memory = memory
+        self.request_pool = request_pool
+        self.backend = backend
+        self.control = control
+        self._owners = {}
+        self._lock = Lock()
+        self._dispatch = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(self, texts, lang_code, sources=None, valid=None):
+        """
+        Queues texts for one language.
+
+        Args:
+            texts (list): The texts to translate
+            lang_code (str): The target language code
+            sources (dict): Optional text -> detected source language
+            valid (callable): Optional ``valid(text, translation)``; translations it
+                rejects are not cached (see ``translate_texts``)
+
+        Returns:
+            set: Futures of ``translate_texts`` results that together cover ``texts``
+        """
+        with self._lock:
+            futures = set()
+            new_texts = []
+            for text in texts:
+                owner = self._owners.get((lang_code, text))
+                if owner is None:
+                    new_texts.append(text)
+                else:
+                    futures.add(owner)
+            get_metrics().count("queue_shared_texts", len(texts) - len(new_texts))
+
+            if new_texts:
+                future = self._dispatch.submit(
+                    translate_texts, new_texts, lang_code, self.memory, self.request_pool,
+                    backend=self.backend, sources=sources, control=self.control, valid=valid
+                )
+                for text in new_texts:
+                    self._owners[(lang_code, text)] = future
+                futures.add(future)
+        return futures
+
+    def translate(self, texts, lang_code, plan=None, sources=None):
+        """
+        Queues texts and waits for them.
+
+        Args:
+            texts (list): The texts to translate
+            lang_code (str): The target language code
+            plan (segmenter.SegmentPlan): Optional segment plan of ``texts``; its
+                templates are queued instead, so they are shared between files too
+            sources (dict): Optional text -> detected source language
+
+        Returns:
+            tuple: (dict of text -> translation, dict of text -> error message),
+                limited to ``texts``
+        """
+        if plan is not None:
+            def translate_segments(segments, segment_sources, on_batch, valid):
+                result = self._collect(segments, lang_code, segment_sources, valid)
+                if on_batch:
+                    on_batch(*result)
+                return result
+            return translate_plan(plan, translate_segments, sources=sources)
+        return self._collect(texts, lang_code, sources)
+
+    def _collect(self, texts, lang_code, sources=None, valid=None):
+        # Queues texts (if not queued yet) and gathers their results
+        translations = {}
+        failures = {}
+        for future in self.submit(texts, lang_code, sources, valid):
+            future_translations, future_failures = future.result()
+            translations.update(future_translations)
+            failures.update(future_failures)
+        wanted = set(texts)
+        return (
+            {text: value for text, value in translations.items() if text in wanted},
+            {text: error for text, error in failures.items() if text in wanted},
+        )
+
+    def close(self):
+        self._dispatch.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _parse_workbook(input_file, rules, use_snapshot):
+    # Runs in a worker process: reads and classifies one workbook
+    started = time.perf_counter()
+    df = read_workbook(input_file, use_snapshot=use_snapshot)
+    read_seconds = time.perf_counter() - started
+    columns = rules.text_columns(df)
+    classification = rules.classify(df, columns)
+    return df, columns, classification, read_seconds
+
+
+def _write_workbook(df, columns, masks, outputs, writer):
+    # Runs in a worker process: writes every output of one workbook, so the parsed
+    # frame is sent to a worker once rather than once per language. outputs maps
+    # each output file to its sheets' translations; returns output file ->
+    # (seconds spent writing, error message or None)
+    shared = sum(len(sheet_translations) for sheet_translations in outputs.values()) > 1
+    results = {}
+    for output_file, sheet_translations in outputs.items():
+        started = time.perf_counter()
+        try:
+            sheets = {}
+            for name, translations in sheet_translations.items():
+                sheet_df = df.copy() if shared else df
+                apply_translations(sheet_df, columns, translations, masks)
+                sheets[name] = sheet_df
+            write_sheets(sheets, output_file, writer)
+        except Exception as e:
+            results[output_file] = (time.perf_counter() - started, str(e))
+            continue
+        results[output_file] = (time.perf_counter() - started, None)
+    return results
+
+
+def translate_workbooks(input_files, target_languages, output_location=None, progress_callback=None,
+                        max_workers=MAX_CONCURRENT_REQUESTS, processes=None, memory=None,
+                        backend=None, rules=None, segmenter=None, writer=DEFAULT_WRITER,
+                        single_workbook=False, snapshot=True, detect_source=False, group_languages=False,
+                        control=None):
+    """
+    Translates many Excel files, sharing translations between them.
+
+    Args:
+        input_files (list): Paths of the Excel files to translate
+        target_languages (list): Language codes to translate to (e.g., ['fr', 'de'])
+        output_location (str): Output folder; defaults to each input file's folder
+        progress_callback (callable): Optional ``progress_callback(message, percent=None)``
+        max_workers (int): Maximum number of translation requests in flight
+        processes (int): Worker processes for parsing and writing; defaults to the CPU count
+        memory (TranslationMemory): Translation memory to use; a new one is opened
+            (and closed again) when not given
+        backend (backends.TranslationBackend): Translation backend; defaults to the
+            shared default backend
+        rules (cell_rules.CellRules): Decides which cells are translated
+        segmenter (segmenter.Segmenter): Optional segmenter masking placeholders and
+            splitting long texts before they are queued
+        writer (str): Output writer, one of writers.WRITERS
+        single_workbook (bool): Write each file's languages as sheets of one workbook
+        snapshot (bool): Load unchanged workbooks from their cached columnar snapshots
+        detect_source (bool): Detect each unique text's source language once and name
+            it in every request (see source_detection.py)
+        group_languages (bool): Send each batch to all target languages back to back
+        control (run_control.RunControl): Optional pause/cancel switch that also
+            tracks live progress per language. Once cancelled, files in progress
+            are saved with what was translated and files not yet started are
+            reported as errors
+
+    Returns:
+        dict: "files" (input file -> the same "outputs", "errors" and "failures"
+            dict ``translate_workbook`` returns), "errors" (input file -> error
+            for files that couldn't be read) and "memory" (cache stats)
+
+    Raises:
+        ValueError: If the writer can't write a single workbook, or two input
+            files would write the same outputs (see ``output_locations``)
+    """
+    check_writer(writer, single_workbook)
+    folders = output_locations(input_files, output_location)
+    report = progress_reporter(progress_callback)
+    metrics = get_metrics()
+    rules = rules or CellRules()
+    processes = processes or os.cpu_count() or 1
+
+    own_memory = memory is None
+    if own_memory:
+        memory = TranslationMemory()
+    result = {"files": {}, "errors": {}}
+
+    def translate_file(input_file):
+        # Parse in a worker process, translate through the shared queue, then write
+        # every language in one worker task once all its translations are in
+        if control is not None and control.cancelled:
+            raise TranslationCancelled(CANCELLED_ERROR)
+        try:
+            df, columns, classification, read_seconds = process_pool.submit(
+                _parse_workbook, input_file, rules, snapshot
+            ).result()
+        except Exception as e:
+            raise WorkbookTranslationError(f"Failed to read Excel file: {e}") from e
+        metrics.observe("read", read_seconds)
+
+        base_filename, file_output_location = prepare_output_location(input_file, folders[input_file], report)
+        unique_texts = classification.unique_texts
+        if control is not None:
+            for lang_code in target_languages:
+                control.add_total(lang_code, len(unique_texts))
+        plan = segmenter.plan(unique_texts) if segmenter is not None else None
+        sources = None
+        if detect_source and unique_texts:
+            sources = detect_sources(unique_texts, memory, backend, request_pool, control=control)
+        if plan is None:
+            for lang_code in target_languages:
+                queue.submit(unique_texts, lang_code, sources)
+        else:
+            segment_sources = plan.segment_sources(sources) if sources else None
+            for lang_code in target_languages:
+                queue.submit(plan.templates, lang_code, segment_sources, template_intact)
+
+        file_result = {"outputs": {}, "errors": {}, "failures": {}}
+        outputs = {}
+        languages = {}
+        for lang_code in target_languages:
+            translations, failures = queue.translate(unique_texts, lang_code, plan, sources)
+            file_result["failures"][lang_code] = failures
+            if control is not None:
+                control.advance(lang_code, len(unique_texts))
+            if single_workbook:
+                output_file = output_path(file_output_location, f"{base_filename}_translated", writer)
+                sheet_name = lang_code
+            else:
+                output_file = output_path(file_output_location, f"{base_filename}_{lang_code}", writer)
+                sheet_name = "Sheet1"
+            outputs.setdefault(output_file, {})[sheet_name] = translations
+            languages.setdefault(output_file, []).append(lang_code)
+
+        try:
+            written = process_pool.submit(
+                _write_workbook, df, columns, classification.masks, outputs, writer
+            ).result()
+        except Exception as e:
+            written = {output_file: (0.0, str(e)) for output_file in outputs}
+        for output_file, (seconds, error) in written.items():
+            for lang_code in languages[output_file]:
+                if error is None:
+                    file_result["outputs"][lang_code] = output_file
+                else:
+                    file_result["errors"][lang_code] = (
+                        f"Error saving {language_name(lang_code)} file {output_file}: {error}"
+                    )
+            if error is None:
+                metrics.observe("write", seconds)
+        return file_result
+
+    try:
+        # Twice as many files in flight as processes keeps the pool busy while
+        # bounding how many parsed workbooks are held in memory
+        window = processes * 2
+        with write_pool(processes) as process_pool, \
+                open_request_pool(max_workers, group_languages) as request_pool, \
+                TranslationQueue(memory, request_pool, backend, max_workers, control) as queue, \
+                ThreadPoolExecutor(max_workers=window) as file_pool:
+            report(f"Translating {len(input_files)} workbooks with {processes} worker processes")
+            futures = {file_pool.submit(translate_file, input_file): input_file for input_file in input_files}
+            for done, future in enumerate(as_completed(futures), 1):
+                input_file = futures[future]
+                try:
+                    file_result = future.result()
+                except Exception as e:
+                    result["errors"][input_file] = str(e)
+                    report(f"Error: {input_file}: {e}")
+                    continue
+                result["files"][input_file] = file_result
+                for error in file_result["errors"].values():
+                    report(f"Error: {error}")
+                failed = sum(len(failures) for failures in file_result["failures"].values())
+                message = f"Translated {os.path.basename(input_file)} ({done}/{len(input_files)})"
+                if failed:
+                    message += f", {failed} texts failed"
+                report(message, done / len(input_files) * 100)
+
+        result["memory"] = memory.stats()
+    finally:
+        if own_memory:
+            memory.close()
+
+    report(f"Translation memory: {result['memory']['hits']} hits, {result['memory']['misses']} misses", 100)
+    return result
@@ -0,0 +1,247 @@
+"""
+Batching helpers that pack many strings into a single translation request.
+
+A batch is limited both by the number of items and by the total number of
+characters (including separators), so every backend can declare its own
+limits. Responses are split back per item and validated; when a batch fails
+or comes back with the wrong number of items, only that batch falls back to
+per-item calls.
+
+``GroupedExecutor`` is a request pool that runs queued batches in the order
+their texts were first seen rather than in submission order, so when
+several target languages translate the same texts, each batch goes out for
+every language back to back.
+"""
+
+import heapq
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from itertools import count
+from threading import Lock
+
+from metrics import get_metrics
+from run_control import CANCELLED_ERROR
+
+# Separator used when a backend only accepts a single text per request
+LINE_SEPARATOR = "\n"
+
+
+def iter_batches(texts, max_chars, max_items, separator="", key=None):
+    """
+    Splits texts into batches that respect the backend limits.
+
+    Args:
+        texts (list): The texts to translate
+        max_chars (int): Maximum characters per request, separators included
+        max_items (int): Maximum number of texts per request
+        separator (str): Separator the batch will be joined with, if any.
+            Texts containing it are always sent in a batch of their own.
+        key (callable): Optional ``key(text)``; a new batch is started whenever
+            it changes, so every batch is homogeneous (e.g. in source language)
+
+    Yields:
+        list: The texts of one batch
+    """
+    batch = []
+    batch_chars = 0
+    batch_key = None
+    for text in texts:
+        if separator and separator in text:
+            # Can't be split back reliably, so it goes on its own
+            yield [text]
+            continue
+
+        text_key = key(text) if key else None
+        text_chars = len(text) + (len(separator) if batch else 0)
+        if batch and (len(batch) >= max_items or batch_chars + text_chars > max_chars or text_key != batch_key):
+            yield batch
+            batch = []
+            batch_chars = 0
+            text_chars = len(text)
+
+        batch.append(text)
+        batch_chars += text_chars
+        batch_key = text_key
+
+    if batch:
+        yield batch
+
+
+def joined_batch(translate_one, separator=LINE_SEPARATOR):
+    """
+    Builds a batch function for backends that take one text per request.
+
+    The texts are joined with ``separator``, sent as one request, and the
+    response is split back on the same separator.
+
+    Args:
+        translate_one (callable): Function translating a single string
+        separator (str): The separator to join texts with
+
+    Returns:
+        callable: Function taking a list of texts and returning a list of translations
+    """
+    def translate_batch(texts):
+        if len(texts) == 1:
+            return [translate_one(texts[0])]
+        translated = translate_one(separator.join(texts))
+        return (translated or "").split(separator)
+    return translate_batch
+
+
+def translate_batched(texts, translate_batch, translate_one, max_chars, max_items,
+                      separator="", on_batch=None, limiter=None, executor=None, key=None, control=None):
+    """
+    Translates texts in batches, falling back to per-item calls on failure.
+
+    Args:
+        texts (list): The unique texts to translate
+        translate_batch (callable): Function taking a list of texts and returning
+            a list of translations in the same order
+        translate_one (callable): Function translating a single text, used as fallback
+        max_chars (int): Maximum characters per batch request
+        max_items (int): Maximum number of texts per batch request
+        separator (str): Separator used by ``translate_batch`` to join texts, if any
+        on_batch (callable): Optional callback ``on_batch(batch_translations, batch_failures)``
+            called after every batch, always from the calling thread
+        limiter (rate_limiter.AdaptiveRateLimiter): Optional limiter every
+            request goes through, shared by all workers
+        executor (concurrent.futures.Executor): Optional shared executor; when
+            given, batches run on it concurrently and its size bounds the number
+            of requests in flight
+        key (callable): Optional ``key(text)`` batches are kept homogeneous in
+            (see ``iter_batches``)
+        control (run_control.RunControl): Optional pause/cancel switch checked
+            before every request; batches of a cancelled run fail without being sent
+
+    Returns:
+        tuple: (dict of text -> translation, dict of text -> error message)
+    """
+    translations = {}
+    failures = {}
+
+    def collect(batch_translations, batch_failures):
+        translations.update(batch_translations)
+        failures.update(batch_failures)
+        if on_batch:
+            on_batch(batch_translations, batch_failures)
+
+    batches = iter_batches(texts, max_chars, max_items, separator, key)
+    args = (translate_batch, translate_one, limiter, control)
+
+    if executor is None:
+        for batch in batches:
+            collect(*_translate_batch(batch, *args))
+    else:
+        # A GroupedExecutor orders batches by their texts, a plain pool by submission
+        submit = getattr(executor, "submit_batch", None)
+        if submit is None:
+            futures = [executor.submit(_translate_batch, batch, *args) for batch in batches]
+        else:
+            futures = [submit(batch, _translate_batch, batch, *args) for batch in batches]
+        for future in as_completed(futures):
+            collect(*future.result())
+
+    return translations, failures
+
+
+def _translate_batch(batch, translate_batch, translate_one, limiter, control=None):
+    # Translates one batch, retrying its items one by one if the batch call fails
+    if control is not None and not control.wait():
+        return {}, {text: CANCELLED_ERROR for text in batch}
+    request = limiter.call if limiter else _call
+    metrics = get_metrics()
+    metrics.count("batches")
+    metrics.count("batch_items", len(batch))
+    batch_translations = {}
+    batch_failures = {}
+
+    results = None
+    try:
+        results = request(translate_batch, batch)
+    except Exception as e:
+        if len(batch) == 1:
+            batch_failures[batch[0]] = str(e)
+
+    if results is not None and len(results) == len(batch):
+        batch_translations.update(zip(batch, results))
+    elif len(batch) > 1:
+        # The batch failed or came back misaligned, so retry its items one by one
+        metrics.count("batch_fallbacks")
+        for text in batch:
+            if control is not None and not control.wait():
+                batch_failures[text] = CANCELLED_ERROR
+                continue
+            try:
+                batch_translations[text] = request(translate_one, text)
+            except Exception as e:
+                batch_failures[text] = str(e)
+    elif not batch_failures:
+        batch_failures[batch[0]] = "Backend returned no translation"
+
+    return batch_translations, batch_failures
+
+
+def _call(fn, *args):
+    return fn(*args)
+
+
+class GroupedExecutor:
+    """
+    Request pool that groups the batches of different languages by text.
+
+    Every language submits all its batches as soon as it starts, so a FIFO
+    pool works through the languages one after another. Here a queued batch
+    is ranked by the first time its first text was submitted by anyone:
+    batch k of every language runs before batch k + 1 of any, keeping
+    requests for the same texts together (and the translation memory and
+    backend caches warm for them). Plain ``submit`` calls keep FIFO order
+    after all queued batches of the same rank.
+
+    Args:
+        max_workers (int): Number of requests in flight
+    """
+
+    def __init__(self, max_workers):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._queue = []
+        self._ranks = {}
+        self._sequence = count()
+        self._lock = Lock()
+
+    def submit_batch(self, batch, fn, *args):
+        """Queue ``fn(*args)`` for a batch of texts, ranked by the batch's first text."""
+        with self._lock:
+            rank = self._ranks.setdefault(batch[0], len(self._ranks))
+        return self._queue_call(rank, fn, args)
+
+    def submit(self, fn, *args):
+        with self._lock:
+            rank = len(self._ranks)
+        return self._queue_call(rank, fn, args)
+
+    def _queue_call(self, rank, fn, args):
+        future = Future()
+        with self._lock:
+            heapq.heappush(self._queue, (rank, next(self._sequence), fn, args, future))
+        # Every pool task runs whichever queued call ranks first when it starts
+        self._pool.submit(self._run_next)
+        return future
+
+    def _run_next(self):
+        with self._lock:
+            _, _, fn, args, future = heapq.heappop(self._queue)
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
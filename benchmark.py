@@ -0,0 +1,375 @@
+"""
+Benchmark suite for the translation engines.
+
+Runs translate_workbook against generated workbooks and a deterministic
+in-process mock backend, so results depend on the code and not on live
+API latency. Every scenario runs in a fresh process so its peak RSS is its
+own, and the report is printed (or written) as JSON so runs can be
+compared across versions:
+
+    python benchmark.py --sizes small medium -o results.json
+    python benchmark.py --rows 50000 --columns 6 --duplicate-ratio 0.8 --engine stream
+    python benchmark.py --sizes small --latency 0.05 --error-rate 0.01 --throttle-rate 0.02
+    python benchmark.py --sizes medium -l fr de es --writer openpyxl xlsxwriter csv
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from threading import Lock
+
+from backends import TranslationBackend
+from writers import DEFAULT_WRITER, ROW_WRITERS, WRITERS
+
+# Generated workbook presets
+SIZES = {
+    "small": {"rows": 1000, "columns": 4, "duplicate_ratio": 0.5, "sheets": 1},
+    "medium": {"rows": 20000, "columns": 6, "duplicate_ratio": 0.7, "sheets": 2},
+    "large": {"rows": 200000, "columns": 8, "duplicate_ratio": 0.9, "sheets": 3},
+}
+
+ENGINES = ("default", "stream", "preserve")
+
+WORDS = (
+    "red blue green large small cotton leather steel wooden classic modern "
+    "shirt table lamp chair bottle cable charger jacket shoe bag phone case "
+    "with without for and extra soft durable waterproof portable premium"
+).split()
+
+
+class MockThrottleResponse:
+    """Just enough of an HTTP response for rate_limiter.throttle_delay."""
+
+    def __init__(self, retry_after):
+        self.status_code = 429
+        self.headers = {"Retry-After": str(retry_after)}
+
+
+class MockThrottleError(Exception):
+    """Raised by MockBackend when it simulates HTTP 429."""
+
+    def __init__(self, retry_after):
+        super().__init__("429 Too Many Requests (mock)")
+        self.response = MockThrottleResponse(retry_after)
+
+
+class MockBackend(TranslationBackend):
+    """
+    Deterministic fake backend for benchmarks.
+
+    Every request sleeps for a fixed latency plus a per-character cost and
+    may fail or be throttled at the configured rates. Failures are drawn from
+    a seeded random generator, so the same run fails the same way each time
+    as long as requests are made in the same order.
+
+    Args:
+        latency (float): Seconds per request
+        char_latency (float): Extra seconds per character sent
+        error_rate (float): Fraction of requests that fail
+        throttle_rate (float): Fraction of requests answered with HTTP 429
+        retry_after (float): Retry-After seconds sent with throttled responses
+        seed (int): Seed for the failure generator
+    """
+
+    name = "mock"
+    max_batch_chars = 30000
+    max_batch_items = 128
+    batch_separator = ""
+
+    def __init__(self, latency=0.0, char_latency=0.0, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=0.0, seed=0):
+        self.latency = latency
+        self.char_latency = char_latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.api_calls = 0
+        self.items = 0
+        self._random = random.Random(seed)
+        self._lock = Lock()
+
+    def _request(self, texts):
+        with self._lock:
+            self.api_calls += 1
+            roll = self._random.random()
+        time.sleep(self.latency + self.char_latency * sum(len(text) for text in texts))
+        if roll < self.throttle_rate:
+            raise MockThrottleError(self.retry_after)
+        if roll < self.throttle_rate + self.error_rate:
+            raise RuntimeError("Mock translation error")
+        with self._lock:
+            self.items += len(texts)
+
+    def translate(self, text, target, source="auto"):
+        self._request([text])
+        return f"[{target}] {text}"
+
+    def translate_batch(self, texts, target, source="auto"):
+        self._request(texts)
+        return [f"[{target}] {text}" for text in texts]
+
+    def detection(self):
+        return "remote"
+
+    def detect_batch(self, texts):
+        # Generated workbooks are all English
+        self._request(texts)
+        return ["en"] * len(texts)
+
+
+def generate_workbook(path, rows, columns, duplicate_ratio=0.5, sheets=1, seed=0):
+    """
+    Writes a synthetic workbook with a mix of text, codes and numbers.
+
+    The first column of every sheet is a SKU-like code and the last is a
+    number, both of which are passed through untranslated; the columns in
+    between hold product-like text.
+
+    Args:
+        path (str): Where to save the .xlsx file
+        rows (int): Data rows per sheet (a header row is added)
+        columns (int): Columns per sheet, at least 3
+        duplicate_ratio (float): Fraction of text cells that repeat an earlier text
+        sheets (int): Number of sheets
+        seed (int): Seed for the generated content
+
+    Returns:
+        int: Number of text cells written, across all sheets
+    """
+    from openpyxl import Workbook
+
+    columns = max(columns, 3)
+    rng = random.Random(seed)
+    pool = []
+    text_cells = 0
+
+    def next_text():
+        if pool and rng.random() < duplicate_ratio:
+            return rng.choice(pool)
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 8))).capitalize()
+        text = f"{text} {len(pool)}"
+        pool.append(text)
+        return text
+
+    workbook = Workbook(write_only=True)
+    for sheet_index in range(sheets):
+        worksheet = workbook.create_sheet(f"Sheet{sheet_index + 1}")
+        worksheet.append(["SKU"] + [f"Text {index}" for index in range(1, columns - 1)] + ["Price"])
+        for row in range(rows):
+            texts = [next_text() for _ in range(columns - 2)]
+            text_cells += len(texts)
+            worksheet.append([f"SKU-{sheet_index}-{row:07d}"] + texts + [round(rng.uniform(1, 500), 2)])
+    workbook.save(path)
+    return text_cells
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where unsupported."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_scenario(scenario):
+    """
+    Runs one scenario and returns its results; meant to run in a fresh process.
+
+    Args:
+        scenario (dict): Workbook, engine, writer, language and mock backend settings
+
+    Returns:
+        dict: The scenario followed by its measurements
+    """
+    from contextlib import nullcontext
+
+    import rate_limiter
+    from metrics import get_metrics, profiled
+    from translation_memory import TranslationMemory
+    from workbook_translator import translate_workbook
+
+    if scenario.get("rate"):
+        rate_limiter.BACKEND_RATE_LIMITS["mock"] = {
+            "rate": scenario["rate"], "burst": max(1, int(scenario["rate"])),
+            "min_rate": min(1.0, scenario["rate"]), "max_rate": scenario["rate"],
+        }
+
+    backend = MockBackend(
+        latency=scenario["latency"], char_latency=scenario["char_latency"],
+        error_rate=scenario["error_rate"], throttle_rate=scenario["throttle_rate"],
+        retry_after=scenario["retry_after"], seed=scenario["seed"],
+    )
+
+    with tempfile.TemporaryDirectory(prefix="excel-translator-bench-") as workdir:
+        input_file = os.path.join(workdir, "benchmark.xlsx")
+        generate_started = time.perf_counter()
+        text_cells = generate_workbook(
+            input_file, scenario["rows"], scenario["columns"], scenario["duplicate_ratio"],
+            scenario["sheets"], scenario["seed"]
+        )
+        generate_seconds = time.perf_counter() - generate_started
+
+        # A fresh memory and snapshot cache per run, so every scenario starts cold
+        os.environ["EXCEL_TRANSLATOR_SNAPSHOT_DIR"] = os.path.join(workdir, "snapshots")
+        profile = scenario.get("profile")
+        with TranslationMemory(os.path.join(workdir, "memory.sqlite3")) as memory, \
+                profiled(profile) if profile else nullcontext():
+            def run():
+                started = time.perf_counter()
+                result = translate_workbook(
+                    input_file, scenario["languages"], os.path.join(workdir, "out"),
+                    max_workers=scenario["workers"], memory=memory,
+                    streaming=scenario["engine"] == "stream", chunk_size=scenario["chunk_size"],
+                    preserve_formatting=scenario["engine"] == "preserve", backend=backend,
+                    writer=scenario["writer"], detect_source=scenario["detect_source"],
+                    group_languages=scenario["group_languages"],
+                )
+                return result, time.perf_counter() - started
+
+            result, total = run()
+            # Only the default engine returns per-run timings; the others are taken from the metrics
+            timers = get_metrics().snapshot()["timers"]
+            timings = dict(result.get("timings") or {
+                phase: timers[phase]["sum"] for phase in ("read", "classify", "translate", "write")
+                if phase in timers
+            })
+            timings["total"] = total
+
+            # A second run over the unchanged workbook, served by the warm memory and snapshot
+            rerun_timings = None
+            if scenario.get("rerun"):
+                rerun_result, rerun_total = run()
+                rerun_timings = dict(rerun_result.get("timings") or {}, total=rerun_total)
+
+    # The default and stream engines only translate the first sheet
+    cells = text_cells if scenario["engine"] == "preserve" else text_cells // scenario["sheets"]
+    cells *= len(scenario["languages"])
+
+    return {
+        "scenario": scenario,
+        "text_cells": cells,
+        "cells_per_sec": round(cells / total, 1) if total else None,
+        "api_calls": backend.api_calls,
+        "translated_items": backend.items,
+        "throttled": rate_limiter.get_limiter(backend.name).throttled,
+        "failed_texts": sum(len(failures) for failures in result["failures"].values()),
+        "errors": result["errors"],
+        "memory": result["memory"],
+        "peak_rss_mb": peak_rss_mb(),
+        "timings": {phase: round(seconds, 4) for phase, seconds in timings.items()},
+        "rerun_timings": rerun_timings and {phase: round(seconds, 4) for phase, seconds in rerun_timings.items()},
+        "generate_seconds": round(generate_seconds, 4),
+        "metrics": get_metrics().snapshot(),
+    }
+
+
+def git_revision():
+    """Current git commit of the checkout, if there is one."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the translation engines against a mock backend.")
+    parser.add_argument("--sizes", nargs="+", choices=sorted(SIZES),
+                        help="Workbook presets to run (default: small, unless --rows is given)")
+    parser.add_argument("--rows", type=int, help="Custom workbook: data rows per sheet")
+    parser.add_argument("--columns", type=int, default=4, help="Custom workbook: columns per sheet")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.5,
+                        help="Custom workbook: fraction of repeated texts")
+    parser.add_argument("--sheets", type=int, default=1, help="Custom workbook: number of sheets")
+    parser.add_argument("--engine", nargs="+", choices=ENGINES, default=["default"],
+                        help="Engines to benchmark")
+    parser.add_argument("--writer", nargs="+", choices=WRITERS, default=[DEFAULT_WRITER],
+                        help="Output writers to benchmark (combinations an engine can't use are skipped)")
+    parser.add_argument("-l", "--languages", nargs="+", default=["fr"], help="Target language codes")
+    parser.add_argument("-w", "--workers", type=int, default=8, help="Concurrent translation requests")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per chunk for the stream engine")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock seconds per request")
+    parser.add_argument("--char-latency", type=float, default=0.0, help="Mock extra seconds per character")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of mock requests that fail")
+    parser.add_argument("--throttle-rate", type=float, default=0.0,
+                        help="Fraction of mock requests answered with HTTP 429")
+    parser.add_argument("--retry-after", type=float, default=0.0, help="Retry-After sent with mock 429s")
+    parser.add_argument("--rate", type=float, help="Override the rate limiter's requests per second")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for workbooks and mock failures")
+    parser.add_argument("--detect-source", action="store_true", help="Detect source languages once up front")
+    parser.add_argument("--group-languages", action="store_true",
+                        help="Send each batch to all target languages back to back")
+    parser.add_argument("--rerun", action="store_true",
+                        help="Translate each workbook a second time and report the warm run's timings too")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="Save a cProfile stats file per scenario into DIR")
+    parser.add_argument("-o", "--output", help="Write the JSON report here instead of stdout")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    workbooks = {}
+    for size in args.sizes or ([] if args.rows else ["small"]):
+        workbooks[size] = SIZES[size]
+    if args.rows:
+        workbooks["custom"] = {"rows": args.rows, "columns": args.columns,
+                               "duplicate_ratio": args.duplicate_ratio, "sheets": args.sheets}
+
+    scenarios = [
+        dict(workbook, size=size, engine=engine, writer=writer, languages=args.languages, workers=args.workers,
+             chunk_size=args.chunk_size, latency=args.latency, char_latency=args.char_latency,
+             error_rate=args.error_rate, throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+             rate=args.rate, seed=args.seed, rerun=args.rerun, detect_source=args.detect_source,
+             group_languages=args.group_languages,
+             profile=os.path.join(args.profile, f"{size}-{engine}-{writer}.prof") if args.profile else None)
+        for size, workbook in workbooks.items()
+        for engine in args.engine
+        for writer in args.writer
+        # The preserve engine always saves with openpyxl, and streaming needs a row writer
+        if not (engine == "preserve" and writer != DEFAULT_WRITER)
+        and not (engine == "stream" and writer not in ROW_WRITERS)
+    ]
+
+    if args.profile:
+        os.makedirs(args.profile, exist_ok=True)
+
+    results = []
+    for scenario in scenarios:
+        print(f"Running {scenario['size']} / {scenario['engine']} / {scenario['writer']}...", file=sys.stderr)
+        # A fresh process per scenario keeps peak RSS and caches from leaking between runs
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            results.append(pool.submit(run_scenario, scenario).result())
+
+    report = {
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Vectorized cell classification run before translation.
+
+Every cell of the candidate text columns is put in one of three classes:
+
+- translate: non-empty text that should be sent to the backend
+- passthrough: text that must be copied as-is, such as IDs, SKUs, URLs,
+  e-mail addresses or numbers stored as text
+- skip: everything else (empty cells, numbers, dates, whitespace)
+
+Classification runs over whole columns with pandas string operations and
+one combined regex per column, and produces the exact amount of work
+(cells and unique texts) in the same pass.
+"""
+
+import re
+
+# Text matching any of these (after stripping) is passed through untranslated
+DEFAULT_PASSTHROUGH_PATTERNS = {
+    "url": r"(?:https?://|ftp://|www\.)\S+",
+    "email": r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+",
+    "number": r"[-+]?[$€£¥]?\d[\d\s.,']*(?:%|[eE][-+]?\d+)?",
+    "code": r"(?=[A-Z0-9_\-./#:]*\d)[A-Z0-9][A-Z0-9_\-./#:]*",
+    "uuid": r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}",
+    "no_letters": r"[\W\d_]+",
+}
+
+# Classification codes
+SKIP = 0
+TRANSLATE = 1
+PASSTHROUGH = 2
+
+
+class Classification:
+    """
+    Result of classifying a DataFrame.
+
+    Attributes:
+        masks (dict): Column (as str) -> boolean numpy array, True for cells to translate
+        counts (dict): Number of cells per class ("translate", "passthrough", "skip")
+        unique_texts (list): Unique texts to translate, in order of first appearance
+    """
+
+    def __init__(self, masks, counts, unique_texts):
+        self.masks = masks
+        self.counts = counts
+        self.unique_texts = unique_texts
+
+
+class CellRules:
+    """
+    Configurable rule set deciding which cells get translated.
+
+    Args:
+        patterns (dict): Name -> regex of text to pass through untranslated;
+            defaults to DEFAULT_PASSTHROUGH_PATTERNS
+        extra_patterns (list): Additional passthrough regexes
+        include_columns (list): Only these columns are translated, if given
+        exclude_columns (list): These columns are never translated
+    """
+
+    def __init__(self, patterns=None, extra_patterns=None, include_columns=None, exclude_columns=None):
+        if patterns is None:
+            patterns = DEFAULT_PASSTHROUGH_PATTERNS
+        self.patterns = list(patterns.values()) + list(extra_patterns or [])
+        self.include_columns = {str(col) for col in include_columns} if include_columns else None
+        self.exclude_columns = {str(col) for col in exclude_columns or []}
+
+        # One alternation matched against the whole stripped text
+        self._regex = "|".join(f"(?:{pattern})" for pattern in self.patterns) if self.patterns else None
+        self._compiled = re.compile(self._regex) if self._regex else None
+
+    def allows_column(self, column):
+        """Return True if the include/exclude lists let this column be translated."""
+        column = str(column)
+        if column in self.exclude_columns:
+            return False
+        return self.include_columns is None or column in self.include_columns
+
+    def text_columns(self, df):
+        """Return the columns of ``df`` that may hold text and pass the column filters."""
+        from pandas.api.types import is_object_dtype, is_string_dtype
+
+        return [
+            col for col in df.columns
+            if (is_object_dtype(df[col]) or is_string_dtype(df[col])) and self.allows_column(col)
+        ]
+
+    def classify_value(self, value):
+        """Classify a single value, for engines that don't work on DataFrames."""
+        if not isinstance(value, str):
+            return SKIP
+        text = value.strip()
+        if not text:
+            return SKIP
+        if self._compiled is not None and self._compiled.fullmatch(text):
+            return PASSTHROUGH
+        return TRANSLATE
+
+    def classify_series(self, series):
+        """
+        Classify a whole column at once.
+
+        Returns:
+            numpy.ndarray: int8 array of SKIP / TRANSLATE / PASSTHROUGH codes
+        """
+        import numpy as np
+
+        codes = np.full(len(series), SKIP, dtype=np.int8)
+        try:
+            # Non-string cells become NaN, so this also filters out numbers and dates
+            stripped = series.str.strip()
+        except AttributeError:
+            # The column holds no strings at all
+            return codes
+
+        is_text = (stripped.notna() & (stripped != "")).to_numpy(dtype=bool)
+        if not is_text.any():
+            return codes
+
+        passthrough = np.zeros(len(series), dtype=bool)
+        if self._regex is not None:
+            passthrough = stripped.str.fullmatch(self._regex, na=False).to_numpy(dtype=bool) & is_text
+
+        codes[is_text] = TRANSLATE
+        codes[passthrough] = PASSTHROUGH
+        return codes
+
+    def classify(self, df, columns):
+        """
+        Classify every cell of the given columns.
+
+        Returns:
+            Classification: Translate masks, per-class counts and the unique texts
+        """
+        import numpy as np
+        import pandas as pd
+
+        masks = {}
+        counts = {"translate": 0, "passthrough": 0, "skip": 0}
+        translate_values = []
+        for col in columns:
+            codes = self.classify_series(df[col])
+            mask = codes == TRANSLATE
+            masks[str(col)] = mask
+            counts["translate"] += int(mask.sum())
+            counts["passthrough"] += int((codes == PASSTHROUGH).sum())
+            counts["skip"] += int((codes == SKIP).sum())
+            if mask.any():
+                translate_values.append(df[col].to_numpy()[mask])
+
+        unique_texts = []
+        if translate_values:
+            unique_texts = list(pd.unique(np.concatenate(translate_values)))
+        return Classification(masks, counts, unique_texts)
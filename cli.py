@@ -0,0 +1,234 @@
+"""
+Command line entry point for headless batch translation.
+
+Examples:
+    python cli.py catalog.xlsx -l fr de -o translated/
+    python cli.py exports/ --recursive -l French Spanish --workers 16
+    python cli.py "exports/*.xlsx" -l fr de --processes 8
+    python cli.py catalog.xlsx -l fr de es --writer xlsxwriter --single-workbook
+"""
+
+import argparse
+import sys
+from contextlib import nullcontext
+
+from backends import BACKENDS, DEFAULT_BACKEND, DEFAULT_POOL_SIZE, get_backend
+from batch_translator import find_workbooks, output_locations, translate_workbooks
+from cell_rules import CellRules
+from metrics import get_metrics, profiled
+from segmenter import Segmenter
+from workbook_translator import (
+    LANGUAGE_MAP,
+    MAX_CONCURRENT_REQUESTS,
+    STREAMING_CHUNK_SIZE,
+    WorkbookTranslationError,
+    translate_workbook,
+)
+from writers import DEFAULT_WRITER, MULTI_SHEET_WRITERS, ROW_WRITERS, WRITERS
+
+def parse_languages(values):
+    """Accept language codes or names from LANGUAGE_MAP (case-insensitive)."""
+    names = {name.lower(): code for name, code in LANGUAGE_MAP.items()}
+    codes = set(LANGUAGE_MAP.values())
+    languages = []
+    for value in values:
+        for item in value.split(","):
+            item = item.strip()
+            if not item:
+                continue
+            code = item if item in codes else names.get(item.lower())
+            if code is None:
+                raise argparse.ArgumentTypeError(f"Unknown language: {item}")
+            languages.append(code)
+    return languages
+
+
+def print_progress(message, percent=None):
+    if percent is None:
+        print(message)
+    else:
+        print(f"[{percent:5.1f}%] {message}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Translate Excel workbooks without the GUI.")
+    parser.add_argument("inputs", nargs="+", help="Excel files, directories or glob patterns")
+    parser.add_argument("-l", "--languages", nargs="+", required=True,
+                        help="Target language codes or names (e.g. fr de or French,German)")
+    parser.add_argument("-o", "--output", help="Output folder (default: next to each input file)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Search directories recursively")
+    parser.add_argument("-w", "--workers", type=int, default=MAX_CONCURRENT_REQUESTS,
+                        help=f"Maximum translation requests in flight (default: {MAX_CONCURRENT_REQUESTS})")
+    parser.add_argument("-p", "--processes", type=int,
+                        help="Batch mode: parse and write workbooks in this many processes and translate "
+                             "text shared between files only once")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read and write in chunks to keep memory bounded on very large sheets")
+    parser.add_argument("--chunk-size", type=int, default=STREAMING_CHUNK_SIZE,
+                        help=f"Rows per chunk in streaming mode (default: {STREAMING_CHUNK_SIZE})")
+    parser.add_argument("--preserve-formatting", action="store_true",
+                        help="Translate all sheets in place, keeping styles, merged cells and formulas")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only translate cells that changed since the previous outputs were written")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue interrupted runs from their checkpoint journals and retry failed texts")
+    parser.add_argument("--writer", choices=WRITERS, default=DEFAULT_WRITER,
+                        help=f"Output format and library: xlsx through openpyxl or xlsxwriter (usually "
+                             f"faster), csv or parquet (default: {DEFAULT_WRITER})")
+    parser.add_argument("--single-workbook", action="store_true",
+                        help="Write one workbook with a sheet per language instead of a file per language")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="Always parse the input workbooks instead of loading unchanged ones from "
+                             "their cached snapshots")
+    parser.add_argument("--include-columns", nargs="+", metavar="COLUMN",
+                        help="Only translate these columns (by header name)")
+    parser.add_argument("--exclude-columns", nargs="+", metavar="COLUMN",
+                        help="Never translate these columns (by header name)")
+    parser.add_argument("--passthrough-pattern", action="append", metavar="REGEX",
+                        help="Copy text fully matching this regex untranslated (repeatable)")
+    parser.add_argument("--no-default-rules", action="store_true",
+                        help="Don't pass through URLs, e-mails, codes and numbers stored as text by default")
+    parser.add_argument("--protect-placeholders", action="store_true",
+                        help="Mask placeholders, markup and numbers and split long cells into sentences, "
+                             "so templated text and repeated sentences are translated once")
+    parser.add_argument("--no-mask-numbers", action="store_true",
+                        help="With --protect-placeholders, send numbers to the backend as they are")
+    parser.add_argument("--no-split-sentences", action="store_true",
+                        help="With --protect-placeholders, don't split long cells into sentences")
+    parser.add_argument("--detect-source", action="store_true",
+                        help="Detect each unique text's source language once (cached across runs) and send "
+                             "it with every request instead of letting the backend detect it per language")
+    parser.add_argument("--group-languages", action="store_true",
+                        help="Send each batch to all target languages back to back")
+    parser.add_argument("-b", "--backend", choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+                        help=f"Translation backend (default: {DEFAULT_BACKEND})")
+    parser.add_argument("--pool-size", type=int,
+                        help=f"HTTP connection pool size for the rest/stub backends (default: {DEFAULT_POOL_SIZE})")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="Write timings and counters for the run to PATH (.prom/.txt: Prometheus, else JSON)")
+    parser.add_argument("--metrics-format", choices=("json", "prometheus"),
+                        help="Format of the --metrics file, overriding the extension")
+    parser.add_argument("--profile", metavar="PATH", help="Profile the run with cProfile and save the stats to PATH")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print errors and the summary")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        languages = parse_languages(args.languages)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    if args.incremental and (args.stream or args.preserve_formatting):
+        parser.error("--incremental can't be combined with --stream or --preserve-formatting.")
+
+    if args.processes and (args.stream or args.preserve_formatting or args.incremental or args.resume):
+        parser.error("--processes can't be combined with --stream, --preserve-formatting, "
+                     "--incremental or --resume.")
+
+    if args.preserve_formatting and (args.writer != DEFAULT_WRITER or args.single_workbook):
+        parser.error("--preserve-formatting can't be combined with --writer or --single-workbook.")
+
+    if args.single_workbook and (args.incremental or args.writer not in MULTI_SHEET_WRITERS):
+        parser.error("--single-workbook needs an xlsx writer and can't be combined with --incremental.")
+
+    if args.stream and args.writer not in ROW_WRITERS:
+        parser.error(f"--stream can't be combined with --writer {args.writer}.")
+
+    if args.pool_size and args.backend == "google":
+        parser.error("--pool-size only applies to the rest and stub backends.")
+
+    workbooks = find_workbooks(args.inputs, args.recursive)
+    if not workbooks:
+        parser.error("No Excel files found.")
+
+    # With -o, inputs keep their subfolders so same-named files don't overwrite each other
+    try:
+        folders = output_locations(workbooks, args.output)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # One translation memory for the whole run, so files share each other's translations
+    from translation_memory import TranslationMemory
+
+    rules = CellRules(
+        patterns={} if args.no_default_rules else None,
+        extra_patterns=args.passthrough_pattern,
+        include_columns=args.include_columns,
+        exclude_columns=args.exclude_columns,
+    )
+
+    segmenter = None
+    if args.protect_placeholders:
+        segmenter = Segmenter(mask_numbers=not args.no_mask_numbers, split_sentences=not args.no_split_sentences)
+
+    # A dedicated backend is only needed when its pool is configured; otherwise the shared one is used
+    backend = get_backend(args.backend, pool_size=args.pool_size) if args.pool_size else get_backend(args.backend)
+    if args.detect_source and backend.detection() is None:
+        print(f"WARNING: the {backend.name} backend can't detect languages; "
+              f"--detect-source is ignored (the google backend needs the langdetect package)", file=sys.stderr)
+
+    failed = 0
+    with profiled(args.profile) if args.profile else nullcontext(), TranslationMemory() as memory:
+        if args.processes:
+            # Batch mode: one pass over all workbooks with a shared translation queue
+            result = translate_workbooks(
+                workbooks, languages, args.output,
+                progress_callback=None if args.quiet else print_progress,
+                max_workers=args.workers, processes=args.processes, memory=memory,
+                backend=backend, rules=rules, segmenter=segmenter, writer=args.writer,
+                single_workbook=args.single_workbook, snapshot=not args.no_snapshot,
+                detect_source=args.detect_source, group_languages=args.group_languages
+            )
+            for workbook, error in result["errors"].items():
+                print(f"ERROR: {workbook}: {error}", file=sys.stderr)
+                failed += 1
+            for file_result in result["files"].values():
+                for error in file_result["errors"].values():
+                    print(f"ERROR: {error}", file=sys.stderr)
+                if file_result["errors"]:
+                    failed += 1
+        else:
+            for index, workbook in enumerate(workbooks):
+                print(f"({index + 1}/{len(workbooks)}) {workbook}")
+                try:
+                    result = translate_workbook(
+                        workbook, languages, folders[workbook],
+                        progress_callback=None if args.quiet else print_progress,
+                        max_workers=args.workers, memory=memory,
+                        streaming=args.stream, chunk_size=args.chunk_size,
+                        preserve_formatting=args.preserve_formatting, incremental=args.incremental,
+                        resume=args.resume, backend=backend, rules=rules, segmenter=segmenter,
+                        writer=args.writer, single_workbook=args.single_workbook,
+                        snapshot=not args.no_snapshot, detect_source=args.detect_source,
+                        group_languages=args.group_languages
+                    )
+                except WorkbookTranslationError as e:
+                    print(f"ERROR: {e}", file=sys.stderr)
+                    failed += 1
+                    continue
+
+                for error in result["errors"].values():
+                    print(f"ERROR: {error}", file=sys.stderr)
+                if result["errors"]:
+                    failed += 1
+
+        stats = memory.stats()
+    backend.close()
+
+    if args.metrics:
+        get_metrics().export(args.metrics, args.metrics_format)
+        print(f"Metrics written to {args.metrics}")
+    if args.profile:
+        print(f"Profile written to {args.profile}")
+
+    print(f"Done: {len(workbooks) - failed}/{len(workbooks)} workbooks translated, "
+          f"translation memory {stats['hits']} hits / {stats['misses']} misses")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
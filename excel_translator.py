@@ -1,56 +1,23 @@
-import pandas as pd
 import os
-import time
+import queue
 import sys
 import traceback
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from threading import Thread
 
-# Check if deep_translator is installed, if not guide the user to install it
-try:
-    from deep_translator import GoogleTranslator
-except ImportError:
-    print("The deep_translator package is not installed.")
-    print("Please install it by running: pip install deep_translator")
-    input("Press Enter to exit...")
-    sys.exit(1)
+from batch_translator import find_workbooks, output_locations, translate_workbooks
+from run_control import RunControl
+from segmenter import Segmenter
+from workbook_translator import (
+    LANGUAGE_MAP,
+    MAX_CONCURRENT_REQUESTS,
+    WorkbookTranslationError,
+    translate_workbook,
+)
 
-# Dictionary mapping user-friendly language names to language codes
-LANGUAGE_MAP = {
-    "English": "en",
-    "French": "fr",
-    "Spanish": "es",
-    "German": "de",
-    "Italian": "it",
-    "Dutch": "nl",
-    "Portuguese": "pt",
-    "Russian": "ru",
-    "Chinese": "zh-CN",
-    "Japanese": "ja",
-    "Korean": "ko",
-    "Arabic": "ar",
-    "Hindi": "hi",
-    "Turkish": "tr",
-    "Greek": "el",
-    "Polish": "pl",
-    "Vietnamese": "vi",
-    "Thai": "th",
-    "Swedish": "sv",
-    "Danish": "da",
-    "Finnish": "fi",
-    "Norwegian": "no",
-    "Czech": "cs",
-    "Romanian": "ro",
-    "Hungarian": "hu",
-    "Bulgarian": "bg",
-    "Ukrainian": "uk",
-    "Croatian": "hr",
-    "Slovak": "sk",
-    "Indonesian": "id",
-    "Malay": "ms",
-    "Hebrew": "he"
-}
+# How often the main thread drains the worker event queue, in milliseconds
+POLL_INTERVAL_MS = 100
 
 class ExcelTranslatorApp:
     def __init__(self, root):
@@ -67,14 +34,26 @@ class ExcelTranslatorApp:
         self.output_location_var = tk.StringVar()
         self.status_var = tk.StringVar(value="Ready")
         self.progress_var = tk.DoubleVar(value=0)
+        self.preserve_formatting_var = tk.BooleanVar(value=False)
+        self.protect_placeholders_var = tk.BooleanVar(value=False)
+        self.single_workbook_var = tk.BooleanVar(value=False)
+        self.detect_source_var = tk.BooleanVar(value=False)
+        self.language_stats_var = tk.StringVar()
         self.languages = list(LANGUAGE_MAP.keys())
         self.selected_languages = []
         
+        # Worker threads never touch widgets: they post events here, and the main
+        # thread applies them every POLL_INTERVAL_MS
+        self.events = queue.Queue()
+        self.control = None
+        
         # Create the GUI
         self.create_widgets()
         
         # Center the window
         self.center_window()
+        
+        self.root.after(POLL_INTERVAL_MS, self.poll_events)
     
     def center_window(self):
         self.root.update_idletasks()
@@ -100,6 +79,7 @@ class ExcelTranslatorApp:
         ttk.Label(input_file_frame, text="Input Excel File:").pack(side=tk.LEFT, padx=5)
         ttk.Entry(input_file_frame, textvariable=self.input_file_var, width=40).pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         ttk.Button(input_file_frame, text="Browse...", command=self.browse_input_file).pack(side=tk.LEFT, padx=5)
+        ttk.Button(input_file_frame, text="Folder...", command=self.browse_input_folder).pack(side=tk.LEFT, padx=5)
         
         # Output location row
         output_frame = ttk.Frame(file_frame)
@@ -160,7 +140,21 @@ class ExcelTranslatorApp:
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill=tk.X, padx=5, pady=5)
         
-        ttk.Button(button_frame, text="Translate", command=self.start_translation).pack(side=tk.RIGHT, padx=5)
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_translation,
+                                        state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.RIGHT, padx=5)
+        self.pause_button = ttk.Button(button_frame, text="Pause", command=self.toggle_pause, state=tk.DISABLED)
+        self.pause_button.pack(side=tk.RIGHT, padx=5)
+        self.translate_button = ttk.Button(button_frame, text="Translate", command=self.start_translation)
+        self.translate_button.pack(side=tk.RIGHT, padx=5)
+        ttk.Checkbutton(button_frame, text="Keep formatting and all sheets",
+                        variable=self.preserve_formatting_var).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(button_frame, text="Protect placeholders",
+                        variable=self.protect_placeholders_var).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(button_frame, text="One workbook for all languages",
+                        variable=self.single_workbook_var).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(button_frame, text="Detect source language once",
+                        variable=self.detect_source_var).pack(side=tk.LEFT, padx=5)
         
         # Status bar and progress bar
         status_frame = ttk.Frame(main_frame)
@@ -170,6 +164,7 @@ class ExcelTranslatorApp:
         self.progress_bar.pack(fill=tk.X, padx=5, pady=5)
         
         ttk.Label(status_frame, textvariable=self.status_var).pack(anchor=tk.W, padx=5)
+        ttk.Label(status_frame, textvariable=self.language_stats_var, justify=tk.LEFT).pack(anchor=tk.W, padx=5)
     
     def browse_input_file(self):
         filetypes = [("Excel files", "*.xlsx *.xls"), ("All files", "*.*")]
@@ -181,6 +176,13 @@ class ExcelTranslatorApp:
             output_dir = os.path.dirname(filename)
             self.output_location_var.set(output_dir)
     
+    def browse_input_folder(self):
+        # Every workbook in the folder is translated in one batch
+        directory = filedialog.askdirectory(title="Select Folder of Excel Files")
+        if directory:
+            self.input_file_var.set(directory)
+            self.output_location_var.set(directory)
+    
     def browse_output_location(self):
         directory = filedialog.askdirectory(title="Select Output Location")
         if directory:
@@ -240,151 +242,227 @@ class ExcelTranslatorApp:
             messagebox.showerror("Error", "Please select an input Excel file.")
             return
         
-        if not os.path.isfile(input_file):
+        if not os.path.exists(input_file):
             messagebox.showerror("Error", "Input file does not exist.")
             return
         
+        input_files = find_workbooks([input_file]) if os.path.isdir(input_file) else [input_file]
+        if not input_files:
+            messagebox.showerror("Error", "No Excel files found in the selected folder.")
+            return
+        
         if not selected_languages:
             messagebox.showerror("Error", "Please select at least one language for translation.")
             return
         
+        try:
+            output_locations(input_files, output_location)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        
+        if self.preserve_formatting_var.get() and self.single_workbook_var.get():
+            messagebox.showerror("Error", "Formatting can only be kept with one file per language.")
+            return
+        
         # Start translation in a separate thread
         self.progress_var.set(0)
         self.status_var.set("Initializing translation...")
+        self.language_stats_var.set("")
+        self.control = RunControl()
+        self.set_running(True)
         
         # Convert language names to language codes
         language_codes = [LANGUAGE_MAP[lang] for lang in selected_languages]
         
         # Start translation in a separate thread
-        translation_thread = Thread(target=self.translate_excel, 
-                                   args=(input_file, language_codes, output_location))
+        if os.path.isdir(input_file):
+            target, args = self.translate_folder, (input_files, language_codes, output_location)
+        else:
+            target, args = self.translate_excel, (input_file, language_codes, output_location)
+        options = {
+            "preserve_formatting": self.preserve_formatting_var.get(),
+            "segmenter": Segmenter() if self.protect_placeholders_var.get() else None,
+            "single_workbook": self.single_workbook_var.get(),
+            "detect_source": self.detect_source_var.get(),
+            "control": self.control,
+        }
+        translation_thread = Thread(target=target, args=args, kwargs=options)
         translation_thread.daemon = True
         translation_thread.start()
     
-    def translate_excel(self, input_file, target_languages, output_location):
+    def translate_excel(self, input_file, target_languages, output_location, max_workers=MAX_CONCURRENT_REQUESTS,
+                        preserve_formatting=False, segmenter=None, single_workbook=False, detect_source=False,
+                        control=None):
         try:
-            # Read the Excel file
-            self.update_status(f"Reading Excel file: {input_file}")
             try:
-                df = pd.read_excel(input_file)
-            except Exception as e:
-                self.show_error(f"Failed to read Excel file: {e}")
+                result = translate_workbook(
+                    input_file, target_languages, output_location,
+                    progress_callback=self.report_progress, max_workers=max_workers,
+                    preserve_formatting=preserve_formatting, segmenter=segmenter,
+                    single_workbook=single_workbook, detect_source=detect_source, control=control
+                )
+            except WorkbookTranslationError as e:
+                self.show_error(str(e))
+                self.finish(None)
                 return
             
-            # Get the base filename without extension
-            base_filename = os.path.splitext(os.path.basename(input_file))[0]
-            
-            # Create output folder if it doesn't exist
-            try:
-                if not os.path.exists(output_location):
-                    os.makedirs(output_location)
-                    self.update_status(f"Created output directory: {output_location}")
-            except Exception as e:
-                self.show_error(f"Could not create output directory: {e}")
-                return
+            # Languages that failed are reported together once the others are saved
+            if result["errors"]:
+                self.show_error("\n".join(result["errors"].values()))
             
-            # Process each target language
-            total_languages = len(target_languages)
-            
-            for lang_index, lang_code in enumerate(target_languages):
-                # Get language name from code
-                lang_name = next((name for name, code in LANGUAGE_MAP.items() if code == lang_code), lang_code)
-                
-                self.update_status(f"Translating to {lang_name} ({lang_code}) - Language {lang_index+1}/{total_languages}")
-                
-                # Create a copy of the original dataframe
-                translated_df = df.copy()
-                
-                try:
-                    # Initialize translator
-                    translator = GoogleTranslator(source='auto', target=lang_code)
-                    
-                    # Track progress
-                    total_cells = 0
-                    translated_cells = 0
-                    
-                    # Identify translatable columns first
-                    translatable_columns = []
-                    for col in translated_df.columns:
-                        if translated_df[col].dtype == 'object':
-                            translatable_columns.append(col)
-                    
-                    if not translatable_columns:
-                        self.update_status(f"No text columns found to translate for {lang_name}.")
-                        # Move to next language
-                        continue
-                    
-                    # Count total cells to translate for progress reporting
-                    for col in translatable_columns:
-                        for idx in range(len(translated_df)):
-                            cell_value = translated_df.at[idx, col]
-                            if isinstance(cell_value, str) and cell_value.strip():
-                                total_cells += 1
-                    
-                    # Translate each string column in the dataframe
-                    for col_index, col in enumerate(translatable_columns):
-                        col_progress = (col_index / len(translatable_columns)) * 100
-                        self.update_status(f"Translating column: {col} ({col_index+1}/{len(translatable_columns)})")
-                        
-                        # Translate each cell in the column
-                        for idx in range(len(translated_df)):
-                            cell_value = translated_df.at[idx, col]
-                            
-                            # Only translate string values that are not empty
-                            if isinstance(cell_value, str) and cell_value.strip():
-                                try:
-                                    # Translate the text
-                                    translated_text = translator.translate(cell_value)
-                                    translated_df.at[idx, col] = translated_text
-                                    translated_cells += 1
-                                    
-                                    # Update progress
-                                    if total_cells > 0:
-                                        overall_progress = (
-                                            (lang_index / total_languages) * 100 + 
-                                            (1 / total_languages) * (translated_cells / total_cells) * 100
-                                        )
-                                        self.progress_var.set(overall_progress)
-                                        
-                                        cell_progress = (translated_cells / total_cells) * 100
-                                        self.update_status(
-                                            f"Translating to {lang_name}: {translated_cells}/{total_cells} cells ({cell_progress:.1f}%)"
-                                        )
-                                    
-                                    # Add a small delay to avoid hitting rate limits
-                                    time.sleep(0.2)
-                                except Exception as e:
-                                    self.update_status(f"Error translating '{cell_value}': {str(e)[:100]}...")
-                    
-                    # Save the translated dataframe to a new Excel file
-                    output_file = os.path.join(output_location, f"{base_filename}_{lang_code}.xlsx")
+            # Complete
+            self.finish("Translation completed!")
+        
+        except Exception as e:
+            self.show_error(f"Unexpected error: {e}\n{traceback.format_exc()}")
+            self.finish(None)
+    
+    def translate_folder(self, input_files, target_languages, output_location,
+                         max_workers=MAX_CONCURRENT_REQUESTS, preserve_formatting=False, segmenter=None,
+                         single_workbook=False, detect_source=False, control=None):
+        try:
+            errors = []
+            if preserve_formatting:
+                # Formatting is kept by editing each workbook in place, one file at a time
+                folders = output_locations(input_files, output_location)
+                for input_file in input_files:
+                    if control is not None and control.cancelled:
+                        break
                     try:
-                        translated_df.to_excel(output_file, index=False)
-                        self.update_status(f"Saved translated file: {output_file}")
-                    except Exception as e:
-                        self.show_error(f"Error saving file {output_file}: {e}")
-                
-                except Exception as e:
-                    self.show_error(f"Error during translation to {lang_name}: {e}")
+                        result = translate_workbook(
+                            input_file, target_languages, folders[input_file],
+                            progress_callback=self.report_progress, max_workers=max_workers,
+                            preserve_formatting=True, segmenter=segmenter, detect_source=detect_source,
+                            control=control
+                        )
+                    except WorkbookTranslationError as e:
+                        errors.append(f"{input_file}: {e}")
+                        continue
+                    errors.extend(result["errors"].values())
+            else:
+                result = translate_workbooks(
+                    input_files, target_languages, output_location,
+                    progress_callback=self.report_progress, max_workers=max_workers,
+                    segmenter=segmenter, single_workbook=single_workbook, detect_source=detect_source,
+                    control=control
+                )
+                errors.extend(f"{input_file}: {error}" for input_file, error in result["errors"].items())
+                for file_result in result["files"].values():
+                    errors.extend(file_result["errors"].values())
+            
+            # Files a cancelled run never started aren't worth a separate error
+            if errors and not (control is not None and control.cancelled):
+                self.show_error("\n".join(errors))
             
             # Complete
-            self.progress_var.set(100)
-            self.update_status("Translation completed!")
-            messagebox.showinfo("Success", "Translation completed successfully!")
+            self.finish(f"Translation of {len(input_files)} files completed!")
         
         except Exception as e:
             self.show_error(f"Unexpected error: {e}\n{traceback.format_exc()}")
+            self.finish(None)
+    
+    def toggle_pause(self):
+        if self.control is None:
+            return
+        if self.control.paused:
+            self.control.resume()
+            self.pause_button.config(text="Pause")
+            self.status_var.set("Resuming...")
+        else:
+            self.control.pause()
+            self.pause_button.config(text="Resume")
+            self.status_var.set("Paused; requests already sent are finishing")
+    
+    def cancel_translation(self):
+        # Workers stop sending requests and every output is saved with what is done
+        if self.control is None:
+            return
+        self.control.cancel()
+        self.pause_button.config(text="Pause", state=tk.DISABLED)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.status_var.set("Cancelling; saving finished translations...")
+    
+    def set_running(self, running):
+        self.translate_button.config(state=tk.DISABLED if running else tk.NORMAL)
+        self.pause_button.config(text="Pause", state=tk.NORMAL if running else tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL if running else tk.DISABLED)
     
-    def update_status(self, message):
-        # Update status message in the main thread
-        self.root.after(0, lambda: self.status_var.set(message))
+    def report_progress(self, message, percent=None):
+        # Progress callback handed to the translation core; runs on worker threads
+        self.events.put(("progress", message, percent))
         print(message)
     
     def show_error(self, message):
         # Show error message in the main thread
         print(f"ERROR: {message}")
-        self.root.after(0, lambda: self.status_var.set(f"Error: {message}"))
-        self.root.after(0, lambda: messagebox.showerror("Error", message))
+        self.events.put(("error", message, None))
+    
+    def finish(self, message):
+        # Ends the run in the main thread; message is None when the run failed
+        self.events.put(("done", message, None))
+    
+    def poll_events(self):
+        # Applies everything workers posted since the last poll. Only the latest
+        # status and percentage are shown, however many updates came in
+        status = percent = None
+        errors = []
+        done = False
+        message = None
+        while True:
+            try:
+                kind, text, value = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                status = text
+                if value is not None:
+                    percent = value
+            elif kind == "error":
+                errors.append(text)
+            elif kind == "done":
+                done, message = True, text
+        
+        if percent is not None:
+            self.progress_var.set(percent)
+        if status is not None:
+            self.status_var.set(status)
+        if self.control is not None:
+            self.language_stats_var.set(format_language_stats(self.control.stats()))
+        if errors:
+            self.status_var.set(f"Error: {errors[-1]}")
+            messagebox.showerror("Error", "\n".join(errors))
+        if done:
+            self.end_run(message)
+        
+        self.root.after(POLL_INTERVAL_MS, self.poll_events)
+    
+    def end_run(self, message):
+        cancelled = self.control is not None and self.control.cancelled
+        self.control = None
+        self.set_running(False)
+        if cancelled:
+            self.status_var.set("Translation cancelled")
+            messagebox.showinfo("Cancelled", "Translation cancelled. Everything translated so far was saved; "
+                                             "the rest was left in the source language.")
+        elif message is not None:
+            self.progress_var.set(100)
+            self.status_var.set(message)
+            messagebox.showinfo("Success", message)
+
+def format_language_stats(stats):
+    """Format RunControl.stats() as one line per language: done/total, rate and ETA."""
+    lines = []
+    for lang_code, entry in stats.items():
+        total = entry["total"]
+        line = f"{lang_code}: {entry['done']}/{'?' if total is None else total}"
+        if entry["rate"]:
+            line += f", {entry['rate']:.1f}/s"
+        if entry["eta"]:
+            minutes, seconds = divmod(int(entry["eta"]), 60)
+            line += f", ETA {minutes}:{seconds:02d}"
+        lines.append(line)
+    return "\n".join(lines)
 
 def check_dependencies():
     """Check if required packages are installed"""
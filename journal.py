@@ -0,0 +1,111 @@
+"""
+Append-only checkpoint journal for long-running translations.
+
+Every language being translated gets a ``{base_filename}_{lang_code}.journal``
+file next to its output. Finished translations and failed texts are
+appended to it as compact JSON lines and flushed to disk periodically, so
+when a run dies part-way a later run with ``resume=True`` only has to
+translate what is missing. Texts that failed are recorded too, and because
+they are not counted as done, a resumed run retries exactly those.
+"""
+
+import json
+import os
+import time
+from threading import Lock
+
+# Flush the journal to disk after this many entries or seconds, whichever comes first
+FLUSH_EVERY_ENTRIES = 200
+FLUSH_EVERY_SECONDS = 5.0
+
+
+def journal_path(output_file):
+    """Return the journal path that belongs to an output file."""
+    return os.path.splitext(output_file)[0] + ".journal"
+
+
+class TranslationJournal:
+    """
+    Append-only record of the translations finished so far for one language.
+
+    Only the translations loaded on resume are held in memory (``translations``,
+    served by ``lookup``) along with the texts that are currently failed
+    (``failures``); new translations go to the file only, so the streaming
+    engine's memory stays bounded by its chunk size.
+
+    Args:
+        path (str): Journal file path
+        resume (bool): Keep and load an existing journal instead of starting over
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.translations = {}
+        self.failures = {}
+        if resume:
+            self._load()
+
+        self._lock = Lock()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # The last line may be cut short if the process died mid-write
+                    continue
+                text = entry.get("t")
+                if "r" in entry:
+                    self.translations[text] = entry["r"]
+                    self.failures.pop(text, None)
+                elif text not in self.translations:
+                    self.failures[text] = entry.get("e", "")
+
+    def lookup(self, texts):
+        """Return the translations loaded from an earlier run's journal for the given texts."""
+        return {text: self.translations[text] for text in texts if text in self.translations}
+
+    def record(self, translations, failures):
+        """Append finished translations and failed texts, flushing periodically."""
+        lines = [json.dumps({"t": text, "r": translation}, ensure_ascii=False)
+                 for text, translation in translations.items()]
+        lines += [json.dumps({"t": text, "e": error}, ensure_ascii=False)
+                  for text, error in failures.items()]
+        if not lines:
+            return
+
+        with self._lock:
+            for text in translations:
+                self.failures.pop(text, None)
+            self.failures.update(failures)
+
+            self._file.write("\n".join(lines) + "\n")
+            self._pending += len(lines)
+            if (self._pending >= FLUSH_EVERY_ENTRIES
+                    or time.monotonic() - self._last_flush >= FLUSH_EVERY_SECONDS):
+                self._flush()
+
+    def _flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """Flush and close the journal, keeping it on disk."""
+        with self._lock:
+            if not self._file.closed:
+                self._flush()
+                self._file.close()
+
+    def discard(self):
+        """Close and delete the journal once its output has been saved."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
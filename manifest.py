@@ -0,0 +1,93 @@
+"""
+Per-cell fingerprint manifests for incremental re-translation.
+
+Next to every output file ``{base_filename}_{lang_code}.xlsx`` a manifest
+``{base_filename}_{lang_code}.manifest.npz`` records a 64-bit hash of every
+input cell the output was built from. On the next run, cells whose hash
+is unchanged are patched in from the previous output and only new or
+changed cells are translated. Cells are matched by column name and row
+position, so inserting rows near the top marks everything below as changed.
+"""
+
+import json
+import os
+
+import numpy as np
+
+# Bump when the manifest layout changes so old manifests are ignored
+MANIFEST_VERSION = 1
+
+
+def manifest_path(output_file):
+    """Return the manifest path that belongs to an output file."""
+    return os.path.splitext(output_file)[0] + ".manifest.npz"
+
+
+def fingerprint_frame(df, columns):
+    """
+    Hashes every cell of the given columns, vectorized per column.
+
+    Returns:
+        dict: Column name (as str) -> numpy array of uint64 hashes, one per row
+    """
+    import pandas as pd
+
+    return {
+        str(col): pd.util.hash_pandas_object(df[col], index=False).to_numpy(dtype=np.uint64)
+        for col in columns
+    }
+
+
+def save_manifest(path, fingerprints):
+    """Write fingerprints to ``path`` atomically."""
+    columns = list(fingerprints)
+    arrays = {f"col_{index}": fingerprints[col] for index, col in enumerate(columns)}
+    header = json.dumps({"version": MANIFEST_VERSION, "columns": columns})
+
+    # Write to a temporary file first so a crash never leaves a half-written manifest
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        np.savez_compressed(f, header=np.array(header), **arrays)
+    os.replace(temp_path, path)
+
+
+def load_manifest(path):
+    """
+    Reads a manifest written by ``save_manifest``.
+
+    Returns:
+        dict: Column name -> uint64 hash array, or None if there is no usable manifest
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(str(data["header"]))
+            if header.get("version") != MANIFEST_VERSION:
+                return None
+            return {col: data[f"col_{index}"] for index, col in enumerate(header["columns"])}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def unchanged_cells(fingerprints, previous, row_limit):
+    """
+    Compares current fingerprints against a previous manifest.
+
+    Args:
+        fingerprints (dict): Current column -> hash array
+        previous (dict): Column -> hash array from the previous run
+        row_limit (int): Number of rows available in the previous output
+
+    Returns:
+        dict: Column -> boolean array, True where the cell is unchanged
+    """
+    masks = {}
+    for col, hashes in fingerprints.items():
+        mask = np.zeros(len(hashes), dtype=bool)
+        old = previous.get(col)
+        if old is not None:
+            rows = min(len(hashes), len(old), row_limit)
+            mask[:rows] = hashes[:rows] == old[:rows]
+        masks[col] = mask
+    return masks
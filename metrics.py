@@ -0,0 +1,203 @@
+"""
+Lightweight metrics for the translation hot paths.
+
+Counters and timers are kept in one process-wide registry (see
+``get_metrics``) that every engine, the batching layer and the rate limiter
+record into. Timers keep a histogram of their durations, so request latency
+can be inspected as well as totals. The registry can be exported as JSON or
+in the Prometheus text exposition format, and ``profiled`` wraps a run in
+cProfile for a closer look.
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+# Histogram bucket upper bounds in seconds, Prometheus-style
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Prefix of every metric name in the Prometheus export
+PROMETHEUS_PREFIX = "excel_translator"
+
+
+class Timer:
+    """Duration histogram: count, sum, min, max and cumulative bucket counts."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        for index, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[index] += 1
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "min": self.min,
+            "max": self.max,
+            "mean": self.sum / self.count if self.count else None,
+            "buckets": {str(bound): count for bound, count in zip(self.buckets, self.bucket_counts)},
+        }
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters and timers.
+
+    Counter names are plain identifiers ("requests", "throttled"); timer names
+    name the phase being timed ("read", "request") and are exported with a
+    ``_seconds`` suffix.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.timers = {}
+        self._lock = Lock()
+
+    def count(self, name, value=1):
+        """Add ``value`` to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        """Record one duration for a timer."""
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                timer = self.timers[name] = Timer()
+            timer.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, timings=None):
+        """
+        Times the enclosed block.
+
+        Args:
+            name (str): Timer to record the duration under
+            timings (dict): Optional per-run dict; the duration is also added to ``timings[name]``
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.observe(name, seconds)
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + seconds
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.timers = {}
+
+    def snapshot(self):
+        """Return all counters and timers as plain, JSON-serializable dicts."""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "timers": {name: timer.snapshot() for name, timer in self.timers.items()},
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        """Render the registry in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                metric = f"{prefix}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value}")
+            for name, timer in sorted(self.timers.items()):
+                metric = f"{prefix}_{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for bound, count in zip(timer.buckets, timer.bucket_counts):
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {timer.count}')
+                lines.append(f"{metric}_sum {timer.sum}")
+                lines.append(f"{metric}_count {timer.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, format=None):
+        """
+        Writes the registry to a file.
+
+        Args:
+            path (str): Destination file
+            format (str): "json" or "prometheus"; guessed from the extension
+                (.prom or .txt mean Prometheus) when not given
+        """
+        if format is None:
+            format = "prometheus" if path.endswith((".prom", ".txt")) else "json"
+        if format not in ("json", "prometheus"):
+            raise ValueError(f"Unknown metrics format: {format}")
+        content = self.to_prometheus() if format == "prometheus" else self.to_json() + "\n"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """Return the process-wide metrics registry."""
+    return _metrics
+
+
+@contextmanager
+def profiled(path):
+    """
+    Runs the enclosed block under cProfile and saves the stats to ``path``.
+
+    Threads started inside the block (the request and language pools) are
+    profiled too and merged into the same stats file, which can be read
+    with ``python -m pstats`` or snakeviz.
+    """
+    import cProfile
+    import pstats
+    import threading
+
+    profilers = [cProfile.Profile()]
+    profilers_lock = Lock()
+
+    def profile_new_thread(*args):
+        # Installed as the first profile hook of every new thread, where it
+        # replaces itself with a profiler of that thread's own
+        profiler = cProfile.Profile()
+        with profilers_lock:
+            profilers.append(profiler)
+        profiler.enable()
+
+    # From 3.12 on cProfile sees every thread by itself
+    per_thread = sys.version_info < (3, 12)
+    if per_thread:
+        threading.setprofile(profile_new_thread)
+    profilers[0].enable()
+    try:
+        yield
+    finally:
+        profilers[0].disable()
+        if per_thread:
+            threading.setprofile(None)
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            try:
+                stats.add(profiler)
+            except TypeError:
+                # The thread finished before making a single call
+                pass
+        stats.dump_stats(path)
@@ -0,0 +1,156 @@
+"""
+Formatting-preserving translation across every sheet of a workbook.
+
+Instead of going through a DataFrame, the workbook is loaded with openpyxl
+and its string cells are translated in place, so styles, merged cells,
+column widths, formulas and the other sheets survive. Formulas, numbers and
+dates are left alone. Unique strings are collected once across all sheets,
+so text shared between sheets is translated only once per language.
+
+openpyxl doesn't round-trip everything: charts, images and pivot tables
+are not kept, and legacy .xls files can't be opened at all.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
+
+from cell_rules import TRANSLATE, CellRules
+from metrics import get_metrics
+from source_detection import detect_sources
+from translation_memory import TranslationMemory
+from workbook_translator import (
+    MAX_CONCURRENT_REQUESTS,
+    LanguageProgress,
+    WorkbookTranslationError,
+    batch_reporter,
+    finish_journal,
+    language_name,
+    open_journal,
+    open_request_pool,
+    prepare_output_location,
+    progress_reporter,
+    translate_texts,
+)
+
+
+def collect_text_cells(workbook, rules):
+    """
+    Finds every translatable string cell across all worksheets.
+
+    The first row of each sheet is taken as its header and, as in the other
+    engines, never translated; column include/exclude lists are matched
+    against it. Formula cells (data type 'f'), numbers, dates and the covered
+    parts of merged ranges are skipped, as is text the rules pass through.
+
+    Returns:
+        list: (cell, original text) pairs
+    """
+    text_cells = []
+    for worksheet in workbook.worksheets:
+        headers = {cell.column: cell.value for cell in next(worksheet.iter_rows(max_row=1), ())}
+        allowed = {column: rules.allows_column(header) for column, header in headers.items()}
+        for row in worksheet.iter_rows(min_row=2):
+            for cell in row:
+                if (cell.data_type == "s" and allowed.get(cell.column, rules.include_columns is None)
+                        and rules.classify_value(cell.value) == TRANSLATE):
+                    text_cells.append((cell, cell.value))
+    return text_cells
+
+
+def translate_workbook_preserving(input_file, target_languages, output_location=None, progress_callback=None,
+                                  max_workers=MAX_CONCURRENT_REQUESTS, memory=None, resume=False,
+                                  backend=None, rules=None, segmenter=None, detect_source=False,
+                                  group_languages=False, control=None):
+    """
+    Formatting-preserving counterpart of ``workbook_translator.translate_workbook``.
+
+    Takes the same arguments and returns the same result dict, but writes a
+    copy of the whole workbook per language with its layout intact.
+    """
+    from openpyxl import load_workbook
+
+    report = progress_reporter(progress_callback)
+    metrics = get_metrics()
+
+    # Read the whole workbook, styles included
+    report(f"Reading Excel file with formatting: {input_file}")
+    try:
+        with metrics.timer("read"):
+            workbook = load_workbook(input_file)
+    except Exception as e:
+        raise WorkbookTranslationError(f"Failed to read Excel file: {e}") from e
+
+    base_filename, output_location = prepare_output_location(input_file, output_location, report)
+
+    # Gather the unique strings once across every sheet
+    with metrics.timer("classify"):
+        text_cells = collect_text_cells(workbook, rules or CellRules())
+    unique_texts = list(dict.fromkeys(text for _, text in text_cells))
+    report(f"Found {len(unique_texts)} unique texts in {len(text_cells)} cells "
+           f"across {len(workbook.worksheets)} sheets")
+
+    own_memory = memory is None
+    if own_memory:
+        memory = TranslationMemory()
+    progress = LanguageProgress(target_languages, len(unique_texts), control)
+    result = {"outputs": {}, "errors": {}, "failures": {}}
+
+    # Every language is written from the same in-memory workbook, one at a time
+    save_lock = Lock()
+
+    def translate_language(lang_code):
+        output_file = os.path.join(output_location, f"{base_filename}_{lang_code}.xlsx")
+        try:
+            journal = open_journal(output_file, resume, report)
+            try:
+                with metrics.timer("translate"):
+                    translations, failures = translate_texts(
+                        unique_texts, lang_code, memory, executor=request_pool,
+                        on_batch=batch_reporter(lang_code, progress, report), journal=journal,
+                        backend=backend, segmenter=segmenter, sources=sources, control=control
+                    )
+            finally:
+                journal.close()
+        except Exception as e:
+            raise WorkbookTranslationError(f"Error during translation to {language_name(lang_code)}: {e}") from e
+
+        # Save this language as soon as it is done
+        with save_lock:
+            for cell, text in text_cells:
+                cell.value = translations.get(text, text)
+            try:
+                with metrics.timer("write"):
+                    workbook.save(output_file)
+            except Exception as e:
+                raise WorkbookTranslationError(f"Error saving file {output_file}: {e}") from e
+        report(f"Saved translated file: {output_file}")
+        finish_journal(journal, failures, report)
+        return output_file, failures
+
+    try:
+        with open_request_pool(max_workers, group_languages) as request_pool, \
+                ThreadPoolExecutor(max_workers=max(1, len(target_languages))) as language_pool:
+            # Source languages are detected once here rather than by every language's requests
+            sources = None
+            if detect_source and unique_texts:
+                sources = detect_sources(unique_texts, memory, backend, request_pool, control=control)
+            futures = {language_pool.submit(translate_language, lang_code): lang_code for lang_code in target_languages}
+            for future in as_completed(futures):
+                lang_code = futures[future]
+                try:
+                    output_file, failures = future.result()
+                except Exception as e:
+                    result["errors"][lang_code] = str(e)
+                    report(f"Error: {e}")
+                    continue
+                result["failures"][lang_code] = failures
+                result["outputs"][lang_code] = output_file
+
+        result["memory"] = memory.stats()
+    finally:
+        if own_memory:
+            memory.close()
+
+    report(f"Translation memory: {result['memory']['hits']} hits, {result['memory']['misses']} misses", 100)
+    return result
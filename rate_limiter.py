@@ -0,0 +1,179 @@
+"""
+Adaptive rate limiting shared by every translation worker.
+
+Each backend gets one token bucket per process. The refill rate adapts
+AIMD-style: it creeps up while requests succeed and is cut multiplicatively
+when the backend starts throttling, at which point every worker pauses for
+the Retry-After period (or an exponential backoff with jitter).
+"""
+
+import random
+import time
+from email.utils import parsedate_to_datetime
+from threading import Lock
+
+from metrics import get_metrics
+
+# Default limiter settings per backend, in requests per second
+BACKEND_RATE_LIMITS = {
+    "google": {"rate": 5.0, "burst": 5, "min_rate": 0.5, "max_rate": 20.0},
+    "rest": {"rate": 10.0, "burst": 10, "min_rate": 1.0, "max_rate": 100.0},
+    # Local fakes for tests and benchmarks
+    "stub": {"rate": 1000.0, "burst": 100, "min_rate": 10.0, "max_rate": 10000.0},
+    "mock": {"rate": 1000.0, "burst": 100, "min_rate": 10.0, "max_rate": 10000.0},
+}
+
+# HTTP status codes that mean "slow down"
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose refill rate adapts to the backend's responses.
+
+    Args:
+        rate (float): Initial requests per second
+        burst (int): Bucket capacity, i.e. how many requests may start back to back
+        min_rate (float): Lower bound for the adapted rate
+        max_rate (float): Upper bound for the adapted rate
+        increase (float): Additive increase, in requests per second gained per
+            second's worth of successful requests
+        decrease (float): Multiplicative factor applied to the rate on throttling
+        base_backoff (float): First backoff delay in seconds when no Retry-After is given
+        max_backoff (float): Cap for backoff delays in seconds
+        max_retries (int): How many times a throttled call is retried
+    """
+
+    def __init__(self, rate=5.0, burst=None, min_rate=0.5, max_rate=20.0, increase=0.5,
+                 decrease=0.5, base_backoff=1.0, max_backoff=60.0, max_retries=5):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_retries = max_retries
+        self.throttled = 0
+
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = Lock()
+
+    def acquire(self):
+        """Block until the caller may send one request."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        """Additive increase: gain ``increase`` req/s for every second's worth of successes."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self, retry_after=None, attempt=0):
+        """
+        Multiplicative decrease, and pause every worker before the next request.
+
+        Args:
+            retry_after (float): Seconds requested by the backend, if it sent Retry-After
+            attempt (int): How many times this call has been throttled already
+        """
+        if retry_after is not None:
+            delay = retry_after + random.uniform(0, self.base_backoff)
+        else:
+            # Full jitter keeps the workers from retrying in lockstep
+            delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+
+        get_metrics().count("throttled")
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = 0.0
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+
+    def call(self, fn, *args):
+        """
+        Runs one request under the limiter, retrying when the backend throttles.
+
+        Any error that is not a throttling error is raised straight away.
+        """
+        metrics = get_metrics()
+        attempt = 0
+        while True:
+            with metrics.timer("rate_limit_wait"):
+                self.acquire()
+            metrics.count("requests")
+            started = time.perf_counter()
+            try:
+                result = fn(*args)
+            except Exception as e:
+                metrics.observe("request", time.perf_counter() - started)
+                retry_after = throttle_delay(e)
+                if retry_after is None or attempt >= self.max_retries:
+                    metrics.count("request_errors")
+                    raise
+                metrics.count("retries")
+                self.on_throttle(retry_after or None, attempt)
+                attempt += 1
+                continue
+            metrics.observe("request", time.perf_counter() - started)
+            self.on_success()
+            return result
+
+
+def throttle_delay(error):
+    """
+    Checks whether an exception means the backend is throttling us.
+
+    Returns:
+        float: The Retry-After delay in seconds (0.0 when the backend gave none)
+            for throttling errors, or None for any other error
+    """
+    # deep_translator raises its own exception type for HTTP 429
+    if type(error).__name__ == "TooManyRequests":
+        return 0.0
+
+    response = getattr(error, "response", None)
+    if response is None or getattr(response, "status_code", None) not in THROTTLE_STATUS_CODES:
+        return None
+    return parse_retry_after(response.headers.get("Retry-After")) or 0.0
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_limiters = {}
+_limiters_lock = Lock()
+
+
+def get_limiter(backend):
+    """Return the process-wide limiter for a backend, creating it on first use."""
+    with _limiters_lock:
+        limiter = _limiters.get(backend)
+        if limiter is None:
+            limiter = _limiters[backend] = AdaptiveRateLimiter(**BACKEND_RATE_LIMITS.get(backend, {}))
+        return limiter
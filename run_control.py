@@ -0,0 +1,116 @@
+"""
+Pause/cancel switch and live progress for a running translation.
+
+A ``RunControl`` is handed to the engines (``control=``) by whoever drives
+the run, usually the GUI. Workers check it before every request: pausing
+holds them before their next request, and cancelling makes every
+remaining batch fail fast with ``CANCELLED_ERROR`` instead of being sent.
+Each language then finishes the normal way, so the outputs are saved with
+everything translated so far (the rest left in the source language), the
+finished translations are in the translation memory, and the journals
+record the cancelled texts for a resume.
+
+The engines also count finished work per language on it, from which it
+derives each language's throughput and ETA.
+"""
+
+import time
+from collections import deque
+from threading import Event, Lock
+
+# Error recorded for the texts a cancelled run never sent
+CANCELLED_ERROR = "Translation cancelled"
+
+# Seconds of history the throughput is measured over
+RATE_WINDOW = 10.0
+
+
+class TranslationCancelled(Exception):
+    """Raised for work that was cancelled before it started."""
+
+
+class RunControl:
+    """
+    Thread-safe pause/cancel switch and per-language progress counters.
+
+    Args:
+        rate_window (float): Seconds of history throughput is measured over
+    """
+
+    def __init__(self, rate_window=RATE_WINDOW):
+        self.rate_window = rate_window
+        self.totals = {}
+        self.done = {}
+        self._samples = {}
+        self._started = time.monotonic()
+        self._cancelled = False
+        self._running = Event()
+        self._running.set()
+        self._lock = Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def pause(self):
+        """Hold workers before their next request; requests in flight still finish."""
+        if not self._cancelled:
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        """Stop sending requests; paused workers are released so they can wind down."""
+        self._cancelled = True
+        self._running.set()
+
+    def wait(self):
+        """Block while paused; returns False once the run is cancelled."""
+        self._running.wait()
+        return not self._cancelled
+
+    def add_total(self, lang_code, count):
+        """Add work for one language (texts, or rows when streaming)."""
+        with self._lock:
+            self.totals[lang_code] = self.totals.get(lang_code, 0) + count
+            self.done.setdefault(lang_code, 0)
+            self._samples.setdefault(lang_code, deque([(time.monotonic(), self.done[lang_code])]))
+
+    def advance(self, lang_code, count):
+        """Record finished work for one language."""
+        now = time.monotonic()
+        with self._lock:
+            self.done[lang_code] = self.done.get(lang_code, 0) + count
+            samples = self._samples.setdefault(lang_code, deque([(self._started, 0)]))
+            samples.append((now, self.done[lang_code]))
+            # Keep one sample from before the window, so the rate spans all of it
+            while len(samples) > 2 and samples[1][0] <= now - self.rate_window:
+                samples.popleft()
+
+    def stats(self):
+        """
+        Return live progress per language.
+
+        Returns:
+            dict: Lang code -> {"done", "total" (None if never given), "rate" (per
+                second, or None before any progress), "eta" (seconds left, or None
+                while unknown)}
+        """
+        now = time.monotonic()
+        stats = {}
+        with self._lock:
+            for lang_code, done in self.done.items():
+                total = self.totals.get(lang_code)
+                started, done_before = self._samples[lang_code][0]
+                rate = (done - done_before) / (now - started) if done > done_before and now > started else None
+                eta = None
+                if total is not None:
+                    remaining = max(total - done, 0)
+                    eta = 0.0 if not remaining else (remaining / rate if rate else None)
+                stats[lang_code] = {"done": done, "total": total, "rate": rate, "eta": eta}
+        return stats
@@ -0,0 +1,333 @@
+"""
+Placeholder protection and segment-level reuse.
+
+Before texts reach the backend they are normalized into templates:
+
+- placeholders (``{name}``, ``%s``, ``${var}``), HTML/XML tags, entities,
+  URLs, e-mail addresses and numbers are replaced by numbered tokens
+  (``{0}``, ``{1}``, ...), so the backend can't mangle them and texts that
+  only differ in those values share one template: "Order 1234 shipped" and
+  "Order 5678 shipped" both become "Order {0} shipped";
+- long texts are split at sentence boundaries, so a sentence repeated
+  across cells is translated once.
+
+Only the unique templates are translated (and cached in the translation
+memory), then every text is rebuilt from its templates' translations with
+its own values put back. If the backend drops or duplicates a token, that
+template is translated again unmasked for the texts that use it, and its
+mangled translation is never cached. ``translate_plan`` runs all of this
+on top of any translation function.
+"""
+
+import re
+
+from metrics import get_metrics
+
+# Placeholders and markup that must come back from the backend untouched
+DEFAULT_PLACEHOLDER_PATTERNS = {
+    "double_brace": r"\{\{.*?\}\}",
+    "dollar_brace": r"\$\{[^{}]*\}",
+    "brace": r"\{[^{}\s]*\}",
+    "printf": r"%(?:\(\w+\)|\d+\$)?[-+#0]*\d*(?:\.\d+)?[sdifgeExXcr](?!\w)",
+    "tag": r"</?[A-Za-z][^<>]*>",
+    "entity": r"&(?:#\d+|#x[0-9a-fA-F]+|\w+);",
+    "url": r"(?:https?://|www\.)\S+",
+    "email": r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+",
+}
+
+# Standalone numbers, masked unless mask_numbers is off
+NUMBER_PATTERN = r"(?<!\w)[-+]?\d+(?:[.,:]\d+)*(?!\w)"
+
+# Where long texts are split: after sentence punctuation, or at line breaks
+SENTENCE_BREAK = r"(?<=[.!?。！？])\s+|\s*\n\s*"
+
+# Texts shorter than this are never split
+SPLIT_MIN_CHARS = 200
+
+# Token standing in for the n-th masked value of a template
+TOKEN_FORMAT = "{{{}}}"
+TOKEN_PATTERN = re.compile(r"\{(\d+)\}")
+
+# A template needs at least one letter outside its tokens to be worth translating
+_LETTER = re.compile(r"[^\W\d_]")
+
+
+class Segmenter:
+    """
+    Masks placeholders and splits long texts into reusable templates.
+
+    Args:
+        patterns (dict): Name -> regex of placeholders to mask; defaults to
+            DEFAULT_PLACEHOLDER_PATTERNS
+        mask_numbers (bool): Also mask standalone numbers
+        split_sentences (bool): Split texts of at least ``split_min_chars``
+            characters at sentence boundaries and line breaks
+        split_min_chars (int): Length from which texts are split
+    """
+
+    def __init__(self, patterns=None, mask_numbers=True, split_sentences=True, split_min_chars=SPLIT_MIN_CHARS):
+        if patterns is None:
+            patterns = DEFAULT_PLACEHOLDER_PATTERNS
+        regexes = list(patterns.values()) + ([NUMBER_PATTERN] if mask_numbers else [])
+        self._mask = re.compile("|".join(f"(?:{regex})" for regex in regexes)) if regexes else None
+        self._split = re.compile(SENTENCE_BREAK) if split_sentences else None
+        self.split_min_chars = split_min_chars
+
+    def mask(self, text):
+        """
+        Replaces placeholders with numbered tokens.
+
+        Returns:
+            tuple: (template, list of the masked values in token order)
+        """
+        if self._mask is None:
+            return text, []
+        values = []
+
+        def replace(match):
+            values.append(match.group(0))
+            return TOKEN_FORMAT.format(len(values) - 1)
+        return self._mask.sub(replace, text), values
+
+    def split(self, text):
+        """
+        Splits a text into pieces at sentence boundaries.
+
+        Returns:
+            list: The pieces, alternating sentence and separator (odd indexes are
+                the separators, which are kept as they are)
+        """
+        if self._split is None or len(text) < self.split_min_chars:
+            return [text]
+        pieces = []
+        position = 0
+        for match in self._split.finditer(text):
+            if match.start() == 0 or match.end() == len(text):
+                continue
+            pieces.append(text[position:match.start()])
+            pieces.append(match.group(0))
+            position = match.end()
+        pieces.append(text[position:])
+        return pieces
+
+    def plan(self, texts):
+        """Segment texts and return the SegmentPlan holding their unique templates."""
+        return SegmentPlan(self, texts)
+
+
+def unmask(translated, values):
+    """
+    Puts masked values back into a translated template.
+
+    Raises:
+        ValueError: If the translation lost, duplicated or invented a token
+    """
+    if not tokens_preserved(translated, len(values)):
+        raise ValueError("Placeholders were not preserved by the backend")
+    return TOKEN_PATTERN.sub(lambda match: values[int(match.group(1))], translated)
+
+
+def tokens_preserved(translated, count):
+    """Check that a translated template holds tokens 0 to count - 1 exactly once each."""
+    return sorted(int(index) for index in TOKEN_PATTERN.findall(translated)) == list(range(count))
+
+
+def template_intact(template, translated):
+    """Check that the translation of a template kept each of its tokens exactly once."""
+    return tokens_preserved(translated, len(TOKEN_PATTERN.findall(template)))
+
+
+def translate_plan(plan, translate, on_batch=None, sources=None):
+    """
+    Translates the templates of a plan and rebuilds its texts from them.
+
+    Args:
+        plan (SegmentPlan): The plan of the texts to translate
+        translate (callable): ``translate(segments, sources, on_batch, valid)``
+            translating a list of templates or raw segments and returning
+            (translations, failures). It must report every result once through
+            ``on_batch`` when one is given, and must not cache translations that
+            ``valid(segment, translation)`` rejects, when it is given.
+        on_batch (callable): Optional ``on_batch(translations, failures)`` called
+            with whole texts as soon as all their templates are done
+        sources (dict): Optional text -> detected source language
+
+    Returns:
+        tuple: (dict of text -> translation, dict of text -> error message)
+    """
+    segment_sources = plan.segment_sources(sources) if sources else None
+    assembler = plan.assembler(on_batch)
+    translate(plan.templates, segment_sources, assembler.on_templates, template_intact)
+
+    # Templates whose tokens the backend mangled are translated again without masking
+    if assembler.mangled:
+        assembler.on_raw(*translate(plan.raw_segments(assembler.mangled), segment_sources, None, None))
+        assembler.finish_mangled()
+    return assembler.translations, assembler.failures
+
+
+class SegmentPlan:
+    """
+    The templates behind a list of texts, and how to rebuild the texts.
+
+    Each text is kept as a list of parts: plain strings that are copied as
+    they are (separators, leading and trailing whitespace, segments without
+    words), and (template, values, raw segment) triples to translate.
+
+    Attributes:
+        templates (list): Unique templates to translate, in order of first use
+        users (dict): Template -> the texts using it (as dict keys, in order)
+    """
+
+    def __init__(self, segmenter, texts):
+        self.texts = list(texts)
+        self.parts = {}
+        self.users = {}
+        instances = 0
+        for text in self.texts:
+            parts = []
+            for index, piece in enumerate(segmenter.split(text)):
+                stripped = piece.strip()
+                if index % 2 or not stripped:
+                    parts.append(piece)
+                    continue
+                # Keep surrounding whitespace out of the template
+                start = piece.index(stripped)
+                if start:
+                    parts.append(piece[:start])
+                template, values = segmenter.mask(stripped)
+                if _LETTER.search(TOKEN_PATTERN.sub("", template)):
+                    parts.append((template, values, stripped))
+                    self.users.setdefault(template, {})[text] = None
+                    instances += 1
+                else:
+                    parts.append(stripped)
+                if start + len(stripped) < len(piece):
+                    parts.append(piece[start + len(stripped):])
+            self.parts[text] = parts
+        self.templates = list(self.users)
+
+        metrics = get_metrics()
+        metrics.count("segments", instances)
+        metrics.count("segment_templates", len(self.templates))
+
+    def raw_segments(self, templates):
+        """Return the unmasked segments behind the given templates, without duplicates."""
+        templates = set(templates)
+        raw = {}
+        for text in self.texts:
+            for part in self.parts[text]:
+                if isinstance(part, tuple) and part[0] in templates:
+                    raw[part[2]] = None
+        return list(raw)
+
+    def segment_sources(self, sources):
+        """
+        Carries detected source languages over from texts to their segments.
+
+        Args:
+            sources (dict): Text -> language code
+
+        Returns:
+            dict: Template or raw segment -> the language of the first text using it
+        """
+        segment_sources = {}
+        for text in self.texts:
+            if text not in sources:
+                continue
+            for part in self.parts[text]:
+                if isinstance(part, tuple):
+                    segment_sources.setdefault(part[0], sources[text])
+                    segment_sources.setdefault(part[2], sources[text])
+        return segment_sources
+
+    def assembler(self, on_batch=None):
+        return SegmentAssembler(self, on_batch)
+
+
+class SegmentAssembler:
+    """
+    Rebuilds texts as the translations of their templates come in.
+
+    ``on_templates`` is used as the ``on_batch`` callback of the template
+    translation; every text whose templates are all done is rebuilt at once
+    and passed on to ``on_batch`` as (text translations, text failures).
+    Templates whose tokens didn't survive are set aside in ``mangled`` and
+    resolved later with ``on_raw``.
+    """
+
+    def __init__(self, plan, on_batch=None):
+        self.plan = plan
+        self.on_batch = on_batch
+        self.translations = {}
+        self.failures = {}
+        self.mangled = set()
+        self._templates = {}
+        self._template_failures = {}
+        self._raw = {}
+        self._raw_failures = {}
+        self._remaining = {}
+        for text in plan.texts:
+            self._remaining[text] = len({part[0] for part in plan.parts[text] if isinstance(part, tuple)})
+
+        # Texts with nothing to translate are done straight away
+        self._emit([text for text, remaining in self._remaining.items() if not remaining])
+
+    def on_templates(self, translations, failures):
+        done = []
+        for template, translated in translations.items():
+            if not template_intact(template, translated):
+                self.mangled.add(template)
+                continue
+            self._templates[template] = translated
+            done.append(template)
+        self._template_failures.update(failures)
+        self._complete(done + list(failures))
+
+    def on_raw(self, translations, failures):
+        # Unmasked translations of the raw segments behind mangled templates
+        self._raw.update(translations)
+        self._raw_failures.update(failures)
+
+    def finish_mangled(self):
+        """Rebuild the texts that waited on mangled templates, once on_raw has run."""
+        if self.mangled:
+            get_metrics().count("segments_mangled", len(self.mangled))
+        self._complete(list(self.mangled))
+
+    def _complete(self, templates):
+        ready = []
+        for template in templates:
+            for text in self.plan.users.get(template, ()):
+                self._remaining[text] -= 1
+                if not self._remaining[text]:
+                    ready.append(text)
+        self._emit(list(dict.fromkeys(ready)))
+
+    def _emit(self, texts):
+        batch_translations = {}
+        batch_failures = {}
+        for text in texts:
+            pieces = []
+            error = None
+            for part in self.plan.parts[text]:
+                if not isinstance(part, tuple):
+                    pieces.append(part)
+                    continue
+                template, values, raw = part
+                if template in self._templates:
+                    pieces.append(unmask(self._templates[template], values))
+                elif raw in self._raw:
+                    pieces.append(self._raw[raw])
+                else:
+                    error = (self._template_failures.get(template) or self._raw_failures.get(raw)
+                             or "Segment was not translated")
+                    break
+            if error is None:
+                batch_translations[text] = "".join(pieces)
+            else:
+                batch_failures[text] = error
+        self.translations.update(batch_translations)
+        self.failures.update(batch_failures)
+        if self.on_batch and (batch_translations or batch_failures):
+            self.on_batch(batch_translations, batch_failures)
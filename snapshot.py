@@ -0,0 +1,229 @@
+"""
+Cached columnar snapshots of input workbooks.
+
+Parsing .xlsx is by far the slowest way to get a DataFrame, and the same
+workbook is often read again and again: reruns after a failure, resumes,
+incremental runs after small edits to other files. The first read of a
+workbook saves the parsed first sheet as an uncompressed Feather (Arrow
+IPC) file in the snapshot cache; later reads memory-map that file instead
+of parsing the workbook, and can load just the columns they need.
+
+A snapshot is stored per input path and is used as long as the file's
+mtime and size are unchanged. If only the mtime changed (the file was
+copied or touched), the file's SHA-256 hash decides. Without pyarrow, or
+for sheets Arrow can't hold faithfully, workbooks are simply parsed every
+time.
+"""
+
+import hashlib
+import json
+import os
+
+from metrics import get_metrics
+
+# Default location of the snapshot cache, overridable from the environment
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.expanduser("~"), ".excel_translator", "snapshots")
+
+# Snapshots kept before the least recently written ones are removed
+DEFAULT_MAX_SNAPSHOTS = 64
+
+# Bump when the snapshot layout changes so old snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def snapshot_dir():
+    """Return the snapshot cache folder."""
+    return os.getenv("EXCEL_TRANSLATOR_SNAPSHOT_DIR") or DEFAULT_SNAPSHOT_DIR
+
+
+def snapshot_path(input_file, directory=None):
+    """Return the snapshot path that belongs to an input file."""
+    key = hashlib.sha256(os.path.abspath(input_file).encode("utf-8")).hexdigest()
+    return os.path.join(directory or snapshot_dir(), key + ".feather")
+
+
+def file_hash(path):
+    """Return the hex SHA-256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_stamp(input_file):
+    """Return what a snapshot records about its input file: path, mtime, size and hash."""
+    stat = os.stat(input_file)
+    return {
+        "source": os.path.abspath(input_file),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": file_hash(input_file),
+    }
+
+
+def read_workbook(input_file, columns=None, directory=None, use_snapshot=True):
+    """
+    Reads the first sheet of a workbook, through the snapshot cache when possible.
+
+    Args:
+        input_file (str): Path to the Excel file
+        columns (list): Only load these columns (by header name); loading a subset
+            is only cheaper when served from a snapshot
+        directory (str): Snapshot cache folder; defaults to ``snapshot_dir()``
+        use_snapshot (bool): Whether to use and update the snapshot cache at all
+
+    Returns:
+        pandas.DataFrame: The sheet, as ``pd.read_excel`` would return it
+    """
+    import pandas as pd
+
+    metrics = get_metrics()
+    path = snapshot_path(input_file, directory)
+    if use_snapshot:
+        df = load_snapshot(input_file, path, columns)
+        if df is not None:
+            metrics.count("snapshot_hits")
+            return df
+        metrics.count("snapshot_misses")
+
+    # Stamped before parsing, so a file changing mid-read never gets a stale snapshot
+    stamp = source_stamp(input_file) if use_snapshot else None
+    df = pd.read_excel(input_file)
+    if use_snapshot:
+        save_snapshot(stamp, df, path)
+    if columns is not None:
+        wanted = set(columns)
+        df = df[[col for col in df.columns if col in wanted]]
+    return df
+
+
+def load_snapshot(input_file, path, columns=None):
+    """
+    Loads a snapshot written by ``save_snapshot``.
+
+    Returns:
+        pandas.DataFrame: The snapshot's columns (or the requested subset), or None
+            if there is no snapshot that still matches the input file
+    """
+    try:
+        from pyarrow import feather
+    except ImportError:
+        return None
+    import numpy as np
+
+    if not os.path.exists(path):
+        return None
+
+    try:
+        table = feather.read_table(path, memory_map=True)
+        header = json.loads(table.schema.metadata[b"excel_translator"])
+        if header.get("version") != SNAPSHOT_VERSION:
+            return None
+        # A touched or copied file with the same contents keeps its snapshot
+        stat = os.stat(input_file)
+        if (header["mtime_ns"], header["size"]) != (stat.st_mtime_ns, stat.st_size):
+            if header["size"] != stat.st_size or header["sha256"] != file_hash(input_file):
+                return None
+
+        names = header["columns"]
+        positions = range(len(names))
+        if columns is not None:
+            wanted = set(columns)
+            positions = [index for index in positions if names[index] in wanted]
+        table = table.select([f"c{index}" for index in positions])
+        df = table.to_pandas()
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    json_columns = set(header["json_columns"])
+    for index in positions:
+        column = df[f"c{index}"]
+        if index in json_columns:
+            df[f"c{index}"] = [json.loads(value) for value in column]
+        elif column.dtype == object and column.isna().any():
+            # Arrow hands empty text cells back as None where read_excel gives NaN
+            df[f"c{index}"] = column.where(column.notna(), np.nan)
+    df.columns = [names[index] for index in positions]
+    return df
+
+
+def save_snapshot(stamp, df, path, max_snapshots=DEFAULT_MAX_SNAPSHOTS):
+    """
+    Writes a snapshot of ``df``, the parsed first sheet of a workbook, atomically.
+
+    Args:
+        stamp (dict): ``source_stamp`` of the workbook, taken before it was parsed
+        df (pandas.DataFrame): The parsed sheet
+        path (str): Snapshot path
+        max_snapshots (int): Snapshots to keep in the cache folder
+
+    Returns:
+        bool: Whether a snapshot was written; sheets Arrow can't round-trip exactly
+            (e.g. non-numeric, non-text headers, or dates mixed with text in one
+            column) and missing pyarrow are skipped
+    """
+    try:
+        import pyarrow as pa
+        from pyarrow import feather
+    except ImportError:
+        return False
+    from pandas.api.types import infer_dtype
+
+    # Column names and mixed-type cells are kept as JSON so their types survive
+    names = list(df.columns)
+    stored = df.copy(deep=False)
+    stored.columns = [f"c{index}" for index in range(len(names))]
+    json_columns = []
+    try:
+        json.dumps(names)
+        for index in range(len(names)):
+            column = stored[f"c{index}"]
+            if column.dtype == object and infer_dtype(column, skipna=True) not in ("string", "empty"):
+                stored[f"c{index}"] = [json.dumps(value) for value in column]
+                json_columns.append(index)
+    except (TypeError, ValueError):
+        get_metrics().count("snapshot_skipped")
+        return False
+
+    header = {
+        "version": SNAPSHOT_VERSION,
+        **stamp,
+        "columns": names,
+        "json_columns": json_columns,
+    }
+    try:
+        table = pa.Table.from_pandas(stored, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b"excel_translator": json.dumps(header).encode("utf-8"),
+        })
+
+        # Write to a temporary file first so a crash never leaves a half-written snapshot;
+        # uncompressed, so reads can memory-map it
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        feather.write_feather(table, temp_path, compression="uncompressed")
+        os.replace(temp_path, path)
+    except (OSError, pa.ArrowException):
+        get_metrics().count("snapshot_skipped")
+        return False
+
+    prune_snapshots(os.path.dirname(path), max_snapshots)
+    return True
+
+
+def prune_snapshots(directory, max_snapshots=DEFAULT_MAX_SNAPSHOTS):
+    """Remove the least recently written snapshots beyond ``max_snapshots``."""
+    try:
+        snapshots = [entry for entry in os.scandir(directory) if entry.name.endswith(".feather")]
+    except OSError:
+        return
+    snapshots.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in snapshots[max_snapshots:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
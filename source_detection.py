@@ -0,0 +1,89 @@
+"""
+Source language detection, once per unique text.
+
+Without it every request is sent with ``source="auto"``, so the backend
+detects the language of every text again for every target language.
+``detect_sources`` detects each unique text once, in batches, and caches
+the result in the translation memory; translation requests then name
+their source explicitly. Batches are kept to one source language each,
+and texts already written in the target language are copied as they are.
+
+Detections only steer the requests: translations stay cached under
+``auto``, since a text's language doesn't change with how it was found.
+A wrong detection would send wrong sources and copy texts untranslated,
+so texts shorter than MIN_DETECT_LENGTH aren't detected at all, and
+detections the backend isn't confident about are neither used nor cached.
+Copied texts are never stored in the translation memory.
+"""
+
+from backends import get_backend
+from batching import translate_batched
+from metrics import get_metrics
+from rate_limiter import get_limiter
+
+# Source used for texts whose language is unknown
+AUTO = "auto"
+
+# Shorter texts are left to the backend's own detection
+MIN_DETECT_LENGTH = 20
+
+# Codes that name the same language
+_CODE_ALIASES = {"iw": "he", "jw": "jv"}
+
+
+def detect_sources(texts, memory, backend=None, executor=None, timings=None, control=None):
+    """
+    Detects the source language of texts, reusing earlier detections.
+
+    Args:
+        texts (list): The unique texts
+        memory (TranslationMemory): Translation memory holding the detection cache
+        backend (backends.TranslationBackend): Backend to detect with; defaults
+            to the shared default backend
+        executor (concurrent.futures.Executor): Optional shared request pool for
+            backends that detect remotely
+        timings (dict): Optional dict the seconds spent are added to, as "detect"
+        control (run_control.RunControl): Optional pause/cancel switch
+
+    Returns:
+        dict: Text -> language code for every text whose language is known; the
+            others are translated with ``source="auto"``. Empty when the backend
+            can't detect languages.
+    """
+    backend = backend or get_backend()
+    mode = backend.detection()
+    if mode is None:
+        return {}
+
+    metrics = get_metrics()
+    with metrics.timer("detect", timings):
+        texts = [text for text in texts if len(text.strip()) >= MIN_DETECT_LENGTH]
+        sources = memory.get_detections(texts, backend.name)
+        pending = [text for text in texts if text not in sources]
+        metrics.count("detection_hits", len(sources))
+
+        if pending:
+            remote = mode == "remote"
+            detected, _ = translate_batched(
+                pending,
+                backend.detect_batch,
+                lambda text: backend.detect_batch([text])[0],
+                max_chars=backend.max_batch_chars,
+                max_items=backend.max_batch_items,
+                limiter=get_limiter(backend.name) if remote else None,
+                executor=executor if remote else None,
+                control=control,
+            )
+            # Texts the backend couldn't place confidently stay on "auto" and aren't cached
+            detected = {text: language for text, language in detected.items() if language}
+            memory.put_detections(detected, backend.name)
+            sources.update(detected)
+            metrics.count("texts_detected", len(detected))
+    return sources
+
+
+def same_language(source, target):
+    """Check whether two language codes name the same language (e.g. ``zh-cn`` and ``zh-CN``)."""
+    source = source.lower()
+    target = target.lower()
+    return _CODE_ALIASES.get(source, source) == _CODE_ALIASES.get(target, target)
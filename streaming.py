@@ -0,0 +1,229 @@
+"""
+Streaming translation for sheets too large to hold in memory.
+
+The first sheet is read row by row through an openpyxl ``read_only``
+workbook, translated one chunk at a time, and appended row by row to one
+output per target language (or to one sheet per language of a single
+workbook) through a ``writers.RowWriter``. Memory use is bounded by the
+chunk size, not by the size of the sheet.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from itertools import islice
+
+from cell_rules import TRANSLATE, CellRules
+from metrics import get_metrics
+from source_detection import detect_sources
+from translation_memory import TranslationMemory
+from workbook_translator import (
+    MAX_CONCURRENT_REQUESTS,
+    STREAMING_CHUNK_SIZE,
+    WorkbookTranslationError,
+    finish_journal,
+    language_name,
+    open_journal,
+    open_request_pool,
+    prepare_output_location,
+    progress_reporter,
+    report_failures,
+    translate_texts,
+)
+from writers import DEFAULT_WRITER, open_rows, output_path
+
+
+def iter_chunks(rows, chunk_size):
+    """Yield lists of up to ``chunk_size`` rows from an iterator."""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def translate_workbook_streaming(input_file, target_languages, output_location=None, progress_callback=None,
+                                 max_workers=MAX_CONCURRENT_REQUESTS, memory=None,
+                                 chunk_size=STREAMING_CHUNK_SIZE, resume=False,
+                                 backend=None, rules=None, segmenter=None, writer=DEFAULT_WRITER,
+                                 single_workbook=False, detect_source=False, group_languages=False,
+                                 control=None):
+    """
+    Streaming counterpart of ``workbook_translator.translate_workbook``.
+
+    Takes the same arguments and returns the same result dict. The first row
+    is kept as the header and names the columns for the include/exclude
+    lists. Below it, every string cell the rules classify as translatable is
+    translated (column dtypes aren't known up front when streaming).
+    A ``control`` tracks progress in rows rather than texts; once cancelled,
+    the remaining rows are still written, untranslated.
+    """
+    from openpyxl import load_workbook
+
+    report = progress_reporter(progress_callback)
+    metrics = get_metrics()
+    rules = rules or CellRules()
+
+    # Open the Excel file for row-by-row reading
+    report(f"Reading Excel file in chunks of {chunk_size} rows: {input_file}")
+    try:
+        source = load_workbook(input_file, read_only=True, data_only=True)
+        sheet = source.worksheets[0]
+    except Exception as e:
+        raise WorkbookTranslationError(f"Failed to read Excel file: {e}") from e
+
+    base_filename, output_location = prepare_output_location(input_file, output_location, report)
+
+    own_memory = memory is None
+    if own_memory:
+        memory = TranslationMemory()
+    result = {"outputs": {}, "errors": {}, "failures": {lang_code: {} for lang_code in target_languages}}
+    journals = {}
+    files = {}
+
+    try:
+        # One output per language (or one shared workbook with a sheet per language),
+        # filled as the chunks come in, and one journal per language so an
+        # interrupted run can skip finished texts
+        shared = None
+        if single_workbook:
+            output_file = output_path(output_location, f"{base_filename}_translated", writer)
+            shared = (open_rows(output_file, writer), output_file)
+        sheets = {}
+        for lang_code in target_languages:
+            if shared is not None:
+                files[lang_code] = shared
+                sheets[lang_code] = shared[0].add_sheet(lang_code)
+            else:
+                output_file = output_path(output_location, f"{base_filename}_{lang_code}", writer)
+                files[lang_code] = (open_rows(output_file, writer), output_file)
+                sheets[lang_code] = files[lang_code][0].add_sheet(sheet.title)
+            journal_file = output_path(output_location, f"{base_filename}_{lang_code}", writer)
+            journals[lang_code] = open_journal(journal_file, resume, report)
+
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is not None:
+            for output_sheet in sheets.values():
+                output_sheet.append(header)
+
+        # Columns the include/exclude lists allow, by position
+        allowed = [rules.allows_column(name) for name in header or ()]
+        allow_unnamed = rules.include_columns is None
+
+        def translatable_values(row):
+            for index, value in enumerate(row):
+                if (allowed[index] if index < len(allowed) else allow_unnamed) \
+                        and rules.classify_value(value) == TRANSLATE:
+                    yield index, value
+
+        total_rows = max((sheet.max_row or 0) - 1, 0)
+        rows_done = 0
+        if control is not None and total_rows:
+            for lang_code in sheets:
+                control.add_total(lang_code, total_rows)
+
+        with open_request_pool(max_workers, group_languages) as request_pool, \
+                ThreadPoolExecutor(max_workers=max(1, len(target_languages))) as language_pool:
+            chunks = iter_chunks(rows, chunk_size)
+            while True:
+                # Rows are parsed lazily, so reading happens as each chunk is pulled
+                with metrics.timer("read"):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+
+                # Gather the unique strings in this chunk
+                # Classify the chunk once; the positions are reused for every language
+                with metrics.timer("classify"):
+                    chunk_cells = [list(translatable_values(row)) for row in chunk]
+                    unique_texts = list(dict.fromkeys(
+                        value for cells in chunk_cells for _, value in cells
+                    ))
+
+                # Detect the chunk's source languages once for every language
+                sources = None
+                if detect_source and unique_texts:
+                    sources = detect_sources(unique_texts, memory, backend, request_pool, control=control)
+
+                # Translate the chunk into every remaining language at once
+                with metrics.timer("translate"):
+                    futures = {
+                        language_pool.submit(
+                            translate_texts, unique_texts, lang_code, memory, request_pool,
+                            journal=journals[lang_code], backend=backend, segmenter=segmenter,
+                            sources=sources, control=control
+                        ): lang_code
+                        for lang_code in sheets
+                    }
+                    wait(futures)
+                chunk_translations = {}
+                for future in as_completed(futures):
+                    lang_code = futures[future]
+                    try:
+                        chunk_translations[lang_code], failures = future.result()
+                    except Exception as e:
+                        error = f"Error during translation to {language_name(lang_code)}: {e}"
+                        result["errors"][lang_code] = error
+                        report(f"Error: {error}")
+                        continue
+                    # A text that failed in an earlier chunk may have succeeded in this one
+                    language_failures = result["failures"][lang_code]
+                    for text in chunk_translations[lang_code]:
+                        language_failures.pop(text, None)
+                    language_failures.update(failures)
+                    report_failures(failures, report)
+
+                # Languages that failed are dropped and not saved
+                for lang_code in list(sheets):
+                    if lang_code not in chunk_translations:
+                        del sheets[lang_code]
+
+                # Append the translated rows to every language's output
+                with metrics.timer("write"):
+                    for lang_code, output_sheet in sheets.items():
+                        translations = chunk_translations[lang_code]
+                        for row, cells in zip(chunk, chunk_cells):
+                            translated_row = list(row)
+                            for index, value in cells:
+                                translated_row[index] = translations.get(value, value)
+                            output_sheet.append(translated_row)
+                        if control is not None:
+                            control.advance(lang_code, len(chunk))
+
+                rows_done += len(chunk)
+                percent = min(rows_done / total_rows * 100, 100) if total_rows else None
+                report(f"Translated {rows_done}/{total_rows or '?'} rows", percent)
+
+        # Outputs are only complete once closed; files of languages that failed
+        # are discarded (a shared workbook keeps their partial sheets)
+        for rows_writer, output_file in dict.fromkeys(files.values()):
+            languages = [lang_code for lang_code in sheets if files[lang_code][1] == output_file]
+            if not languages:
+                rows_writer.discard()
+                continue
+            try:
+                with metrics.timer("write"):
+                    rows_writer.close()
+            except Exception as e:
+                for lang_code in languages:
+                    result["errors"][lang_code] = f"Error saving file {output_file}: {e}"
+                report(f"Error: Error saving file {output_file}: {e}")
+                continue
+            for lang_code in languages:
+                result["outputs"][lang_code] = output_file
+                finish_journal(journals[lang_code], result["failures"][lang_code], report)
+            report(f"Saved translated file: {output_file}")
+
+        result["memory"] = memory.stats()
+    finally:
+        # Outputs left open by an error are dropped rather than left half-written
+        for rows_writer, _ in files.values():
+            rows_writer.discard()
+        for journal in journals.values():
+            journal.close()
+        source.close()
+        if own_memory:
+            memory.close()
+
+    report(f"Translation memory: {result['memory']['hits']} hits, {result['memory']['misses']} misses", 100)
+    return result
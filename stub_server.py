@@ -0,0 +1,165 @@
+"""
+Local stand-in for the REST translation API, for tests and benchmarks.
+
+It accepts the same requests as the real API (see backends.RestBackend) and
+answers with a deterministic fake translation, ``[fr] Hello`` for "Hello"
+translated to French. Language detection (``/v2/detect``) reads such a
+prefix back and reports English for anything else. Run it from the command line:
+
+    python stub_server.py --port 8765
+
+or from code:
+
+    with StubTranslationServer() as server:
+        backend = get_backend("stub", url=server.url)
+"""
+
+import argparse
+import json
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}/v2/translate"
+
+
+def fake_translate(text, target):
+    """Return the deterministic fake translation of a text."""
+    return f"[{target}] {text}"
+
+
+class StubError(Exception):
+    """
+    Raised by a custom ``translate`` to answer with an HTTP error instead.
+
+    Args:
+        status (int): HTTP status code, e.g. 429
+        headers (dict): Extra response headers, e.g. {"Retry-After": "1"}
+    """
+
+    def __init__(self, status, headers=None):
+        super().__init__(f"Stub error {status}")
+        self.status = status
+        self.headers = headers or {}
+
+
+def fake_detect(text):
+    """Return the language of a fake translation, or "en" for any other text."""
+    match = re.match(r"\[([\w-]+)\] ", text)
+    return match.group(1) if match else "en"
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real API
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        detect = self.path.rstrip("/").endswith("/detect")
+        try:
+            payload = json.loads(self.rfile.read(length))
+            q = payload["q"]
+            target = None if detect else payload["target"]
+        except (ValueError, KeyError):
+            self._send(400, {"error": "Expected a JSON body with 'q' and 'target'"})
+            return
+
+        if detect:
+            texts = q if isinstance(q, list) else [q]
+            self._send(200, {"detections": [
+                {"language": self.server.detect(text), "confidence": 1.0} for text in texts
+            ]})
+            return
+
+        try:
+            if isinstance(q, list):
+                translated = self.server.translate_batch(q, target)
+            else:
+                translated = self.server.translate(q, target)
+        except StubError as e:
+            self._send(e.status, {"error": str(e)}, e.headers)
+            return
+        self._send(200, {"translatedText": translated})
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Stay quiet; tests and benchmarks send a lot of requests
+        pass
+
+
+class StubTranslationServer:
+    """
+    Runs the stub API in a background thread.
+
+    Args:
+        host (str): Interface to bind to
+        port (int): Port to listen on; 0 picks a free one
+        translate (callable): ``translate(text, target)`` producing the fake translation;
+            it may raise StubError to answer with an HTTP error
+        detect (callable): ``detect(text)`` producing the fake detected language
+        translate_batch (callable): Optional ``translate_batch(texts, target)`` producing
+            the "translatedText" of batched requests; defaults to ``translate`` per text
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=0, translate=fake_translate, detect=fake_detect,
+                 translate_batch=None):
+        self._server = ThreadingHTTPServer((host, port), StubRequestHandler)
+        self._server.daemon_threads = True
+        self._server.translate = translate
+        if translate_batch is None:
+            def translate_batch(texts, target):
+                return [translate(text, target) for text in texts]
+        self._server.translate_batch = translate_batch
+        self._server.detect = detect
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v2/translate"
+
+    def start(self):
+        self._thread = Thread(target=self._server.serve_forever, name="stub-translation-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stub of the translation API.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    server = StubTranslationServer(args.host, args.port)
+    print(f"Stub translation API listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
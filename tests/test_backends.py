@@ -0,0 +1,93 @@
+import pytest
+
+from backends import RestBackend
+from batching import translate_batched
+from rate_limiter import AdaptiveRateLimiter, throttle_delay
+from stub_server import StubError, StubTranslationServer, fake_translate
+
+
+@pytest.fixture
+def serve():
+    # Starts a stub API with the given handlers and returns a backend talking to it
+    servers = []
+    backends = []
+
+    def start(**handlers):
+        server = StubTranslationServer(**handlers).start()
+        servers.append(server)
+        backend = RestBackend(url=server.url, pool_size=2, name="stub-test")
+        backends.append(backend)
+        return backend
+
+    yield start
+    for backend in backends:
+        backend.close()
+    for server in servers:
+        server.stop()
+
+
+def test_single_and_batched_requests(serve):
+    backend = serve()
+    assert backend.translate("Hello", "fr") == "[fr] Hello"
+    assert backend.translate_batch(["Hello", "Chair"], "de") == ["[de] Hello", "[de] Chair"]
+
+
+@pytest.mark.parametrize("response", [
+    lambda texts, target: "[fr] " + " ".join(texts),
+    lambda texts, target: [fake_translate(text, target) for text in texts][:-1],
+    lambda texts, target: [fake_translate(text, target) for text in texts[:-1]] + [None],
+])
+def test_batch_responses_that_dont_match_the_request_are_rejected(serve, response):
+    backend = serve(translate_batch=response)
+    with pytest.raises(ValueError):
+        backend.translate_batch(["Hello", "Chair"], "fr")
+
+
+def test_a_rejected_batch_falls_back_to_single_requests(serve):
+    backend = serve(translate_batch=lambda texts, target: "not a list")
+    translations, failures = translate_batched(
+        ["Hello", "Chair"], lambda batch: backend.translate_batch(batch, "fr"),
+        lambda text: backend.translate(text, "fr"), max_chars=1000, max_items=10,
+    )
+    assert translations == {"Hello": "[fr] Hello", "Chair": "[fr] Chair"}
+    assert not failures
+
+
+def test_http_errors_are_raised_without_retrying(serve):
+    calls = []
+
+    def translate(text, target):
+        calls.append(text)
+        raise StubError(500)
+
+    backend = serve(translate=translate)
+    limiter = AdaptiveRateLimiter(rate=100.0, base_backoff=0.01)
+    with pytest.raises(Exception) as raised:
+        limiter.call(backend.translate, "Hello", "fr")
+    assert throttle_delay(raised.value) is None
+    assert calls == ["Hello"]
+    assert limiter.throttled == 0
+
+
+def test_throttled_requests_honour_retry_after_and_are_retried(serve):
+    calls = []
+
+    def translate(text, target):
+        calls.append(text)
+        if len(calls) == 1:
+            raise StubError(429, {"Retry-After": "7"})
+        if len(calls) == 2:
+            raise StubError(503, {"Retry-After": "0"})
+        return fake_translate(text, target)
+
+    backend = serve(translate=translate)
+    with pytest.raises(Exception) as raised:
+        backend.translate("Hello", "fr")
+    assert throttle_delay(raised.value) == 7.0
+
+    # A throttled call is retried under the limiter, which slows down
+    limiter = AdaptiveRateLimiter(rate=100.0, min_rate=1.0, base_backoff=0.01)
+    assert limiter.call(backend.translate, "Hello", "fr") == "[fr] Hello"
+    assert calls == ["Hello"] * 3
+    assert limiter.throttled == 1
+    assert limiter.rate < 100.0
@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from batch_translator import output_locations
+
+
+def test_without_an_output_folder_outputs_go_next_to_each_input():
+    assert output_locations(["in/a/catalog.xlsx", "in/b/catalog.xlsx"]) == {
+        "in/a/catalog.xlsx": None,
+        "in/b/catalog.xlsx": None,
+    }
+
+
+def test_inputs_keep_their_subfolders_under_the_output_folder(tmp_path):
+    inputs = [str(tmp_path / "in" / "a" / "catalog.xlsx"), str(tmp_path / "in" / "b" / "catalog.xlsx"),
+              str(tmp_path / "in" / "prices.xlsx")]
+    out = str(tmp_path / "out")
+    assert output_locations(inputs, out) == {
+        inputs[0]: os.path.join(out, "a"),
+        inputs[1]: os.path.join(out, "b"),
+        inputs[2]: out,
+    }
+
+
+def test_inputs_from_one_folder_are_written_flat(tmp_path):
+    inputs = [str(tmp_path / "in" / "a.xlsx"), str(tmp_path / "in" / "b.xlsx")]
+    assert set(output_locations(inputs, "out").values()) == {"out"}
+
+
+def test_inputs_that_would_write_the_same_outputs_are_rejected():
+    with pytest.raises(ValueError, match="catalog.xls"):
+        output_locations(["in/catalog.xlsx", "in/catalog.xls"], "out")
+    with pytest.raises(ValueError):
+        output_locations(["in/catalog.xlsx", "in/catalog.xls"])
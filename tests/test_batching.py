@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from batching import GroupedExecutor, iter_batches, joined_batch, translate_batched
+
+
+def upper_batch(texts):
+    return [text.upper() for text in texts]
+
+
+@pytest.mark.parametrize("texts, max_chars, max_items, separator, expected", [
+    # Exactly max_chars still fits; one more character starts a new batch
+    (["abc", "de", "f"], 6, 10, "", [["abc", "de", "f"]]),
+    (["abc", "de", "fg"], 6, 10, "", [["abc", "de"], ["fg"]]),
+    # Separators count towards the limit
+    (["abc", "de"], 6, 10, "\n", [["abc", "de"]]),
+    (["abc", "def"], 6, 10, "\n", [["abc"], ["def"]]),
+    (["a", "b", "c", "d", "e"], 100, 2, "", [["a", "b"], ["c", "d"], ["e"]]),
+    # A text over the limit is still sent, on its own
+    (["abcdefgh", "a"], 6, 10, "", [["abcdefgh"], ["a"]]),
+    # Texts containing the separator can't be split back, so they go alone
+    (["a", "b\nc", "d"], 100, 10, "\n", [["b\nc"], ["a", "d"]]),
+])
+def test_iter_batches_respects_the_limits(texts, max_chars, max_items, separator, expected):
+    assert list(iter_batches(texts, max_chars, max_items, separator)) == expected
+
+
+def test_iter_batches_keeps_batches_homogeneous_in_key():
+    texts = ["a1", "a2", "b1", "a3"]
+    assert list(iter_batches(texts, 100, 10, key=lambda text: text[0])) == [["a1", "a2"], ["b1"], ["a3"]]
+
+
+def test_joined_batch_splits_the_response_on_the_separator():
+    sent = []
+
+    def translate_one(text):
+        sent.append(text)
+        return text.upper()
+
+    assert joined_batch(translate_one)(["a", "b", "c"]) == ["A", "B", "C"]
+    assert joined_batch(translate_one, " | ")(["x", "y"]) == ["X", "Y"]
+    assert sent == ["a\nb\nc", "x | y"]
+
+
+def test_joined_batch_passes_single_texts_through_unjoined():
+    assert joined_batch(lambda text: text + "\n!")(["a"]) == ["a\n!"]
+
+
+def test_batches_are_mapped_back_in_order_and_reported():
+    reported = []
+    translations, failures = translate_batched(
+        ["a", "b", "c"], upper_batch, str.upper, max_chars=100, max_items=2,
+        on_batch=lambda batch, batch_failures: reported.append((batch, batch_failures)),
+    )
+    assert translations == {"a": "A", "b": "B", "c": "C"}
+    assert not failures
+    assert reported == [({"a": "A", "b": "B"}, {}), ({"c": "C"}, {})]
+
+
+def test_a_misaligned_response_falls_back_to_per_item_calls_for_that_batch_only():
+    singles = []
+
+    def translate_batch(texts):
+        # Merges two lines, as backends sometimes do with joined batches
+        return ["A B"] if texts == ["a", "b"] else upper_batch(texts)
+
+    def translate_one(text):
+        singles.append(text)
+        return text.upper()
+
+    translations, failures = translate_batched(["a", "b", "c", "d"], translate_batch, translate_one,
+                                               max_chars=100, max_items=2)
+    assert translations == {"a": "A", "b": "B", "c": "C", "d": "D"}
+    assert not failures
+    assert singles == ["a", "b"]
+
+
+def test_only_the_items_that_fail_on_their_own_are_reported_as_failures():
+    def translate_batch(texts):
+        raise RuntimeError("batch rejected")
+
+    def translate_one(text):
+        if text == "b":
+            raise RuntimeError("bad text")
+        return text.upper()
+
+    translations, failures = translate_batched(["a", "b", "c"], translate_batch, translate_one,
+                                               max_chars=100, max_items=10)
+    assert translations == {"a": "A", "c": "C"}
+    assert failures == {"b": "bad text"}
+
+
+def test_a_failing_single_item_batch_is_not_retried():
+    calls = []
+
+    def translate_batch(texts):
+        calls.append(texts)
+        raise RuntimeError("rejected")
+
+    translations, failures = translate_batched(["a"], translate_batch, str.upper, max_chars=100, max_items=10)
+    assert translations == {}
+    assert failures == {"a": "rejected"}
+    assert calls == [["a"]]
+
+
+def test_an_empty_single_item_response_is_a_failure():
+    translations, failures = translate_batched(["a"], lambda texts: [], str.upper, max_chars=100, max_items=10)
+    assert failures == {"a": "Backend returned no translation"}
+
+
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, GroupedExecutor])
+def test_batches_can_run_on_an_executor(executor_class):
+    texts = [f"text {index}" for index in range(50)]
+    with executor_class(max_workers=4) as executor:
+        translations, failures = translate_batched(texts, upper_batch, str.upper, max_chars=100, max_items=3,
+                                                   executor=executor)
+    assert translations == {text: text.upper() for text in texts}
+    assert not failures
@@ -0,0 +1,86 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from cell_rules import PASSTHROUGH, SKIP, TRANSLATE, CellRules
+
+CASES = [
+    # Text to translate
+    ("Chair", TRANSLATE),
+    ("  Red leather chair  ", TRANSLATE),
+    ("Order 1234 shipped", TRANSLATE),
+    ("Größe M", TRANSLATE),
+    ("=SUM(A1:A3)", TRANSLATE),
+    ("Chair-200 in oak", TRANSLATE),
+    # Numbers stored as text
+    ("1234", PASSTHROUGH),
+    ("-12.50", PASSTHROUGH),
+    ("1,234.56", PASSTHROUGH),
+    ("€19.99", PASSTHROUGH),
+    ("45%", PASSTHROUGH),
+    ("1.5e-3", PASSTHROUGH),
+    # Codes and IDs
+    ("SKU-12345", PASSTHROUGH),
+    ("A1B2C3", PASSTHROUGH),
+    ("INV/2024/001", PASSTHROUGH),
+    ("123e4567-e89b-12d3-a456-426614174000", PASSTHROUGH),
+    ("https://example.com/item?id=1", PASSTHROUGH),
+    ("www.example.com", PASSTHROUGH),
+    ("sales@example.com", PASSTHROUGH),
+    ("--- / ---", PASSTHROUGH),
+    # Blanks and non-text
+    ("", SKIP),
+    ("   ", SKIP),
+    (None, SKIP),
+    (float("nan"), SKIP),
+    (42, SKIP),
+    (3.5, SKIP),
+    (datetime.datetime(2024, 1, 1), SKIP),
+]
+
+
+@pytest.mark.parametrize("value, expected", CASES)
+def test_classify_value(value, expected):
+    assert CellRules().classify_value(value) == expected
+
+
+def test_classify_series_agrees_with_classify_value():
+    values = [value for value, _ in CASES]
+    codes = CellRules().classify_series(pd.Series(values, dtype=object))
+    assert list(codes) == [expected for _, expected in CASES]
+
+
+def test_capitalised_words_without_digits_are_not_codes():
+    assert CellRules().classify_value("NEW") == TRANSLATE
+    assert CellRules().classify_value("IMPORTANT NOTICE") == TRANSLATE
+
+
+def test_extra_patterns_and_empty_patterns():
+    assert CellRules(extra_patterns=[r"N/?A"]).classify_value("NA") == PASSTHROUGH
+    rules = CellRules(patterns={})
+    assert rules.classify_value("1234") == TRANSLATE
+    assert list(rules.classify_series(pd.Series(["1234", ""]))) == [TRANSLATE, SKIP]
+
+
+def test_classify_counts_every_cell_and_collects_unique_texts():
+    df = pd.DataFrame({
+        "Name": ["Chair", "Lamp", "Chair", None],
+        "SKU": ["SKU-1", "SKU-2", "", "SKU-4"],
+        "Price": [10.0, 12.5, 3.0, 4.0],
+        1: ["Lamp", "Oak", "  ", "42"],
+    })
+    result = CellRules().classify(df, ["Name", "SKU", "Price", 1])
+    assert result.counts == {"translate": 5, "passthrough": 4, "skip": 7}
+    assert result.unique_texts == ["Chair", "Lamp", "Oak"]
+    assert set(result.masks) == {"Name", "SKU", "Price", "1"}
+    assert list(result.masks["Name"]) == [True, True, True, False]
+    assert not result.masks["Price"].any()
+    assert list(result.masks["1"]) == [True, True, False, False]
+
+
+def test_text_columns_apply_the_column_filters():
+    df = pd.DataFrame({"Name": ["Chair"], "Notes": ["Oak"], "Price": [10.0], 7: ["x"]})
+    assert CellRules().text_columns(df) == ["Name", "Notes", 7]
+    assert CellRules(include_columns=["Name", 7]).text_columns(df) == ["Name", 7]
+    assert CellRules(exclude_columns=["Notes", "7"]).text_columns(df) == ["Name"]
@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+import pytest
+
+import cli
+from stub_server import StubTranslationServer
+
+
+@pytest.fixture
+def stub_env(tmp_path, monkeypatch):
+    # CLI runs against the local stub API, with their own memory and snapshot cache
+    monkeypatch.setenv("TRANSLATION_MEMORY_PATH", str(tmp_path / "memory.sqlite3"))
+    monkeypatch.setenv("EXCEL_TRANSLATOR_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    with StubTranslationServer() as server:
+        monkeypatch.setenv("STUB_TRANSLATION_URL", server.url)
+        yield
+
+
+def run_cli(*args):
+    # --pool-size gives every run its own backend, which the CLI closes when done
+    return cli.main([*args, "-b", "stub", "--pool-size", "2", "--quiet"])
+
+
+@pytest.mark.parametrize("mode", [[], ["--processes", "1"]])
+def test_recursive_run_keeps_same_named_files_apart(tmp_path, stub_env, mode):
+    for folder, name in (("a", "Chair"), ("b", "Lamp")):
+        os.makedirs(tmp_path / "in" / folder)
+        pd.DataFrame({"Name": [name]}).to_excel(tmp_path / "in" / folder / "catalog.xlsx", index=False)
+    out = tmp_path / "out"
+
+    assert run_cli(str(tmp_path / "in"), "--recursive", "-l", "fr", "-o", str(out), *mode) == 0
+    assert pd.read_excel(out / "a" / "catalog_fr.xlsx")["Name"].tolist() == ["[fr] Chair"]
+    assert pd.read_excel(out / "b" / "catalog_fr.xlsx")["Name"].tolist() == ["[fr] Lamp"]
+
+
+def test_inputs_that_would_overwrite_each_other_are_rejected(tmp_path, stub_env, capsys):
+    os.makedirs(tmp_path / "in")
+    pd.DataFrame({"Name": ["Chair"]}).to_excel(tmp_path / "in" / "catalog.xlsx", index=False)
+    (tmp_path / "in" / "catalog.xls").write_bytes(b"")
+
+    with pytest.raises(SystemExit):
+        run_cli(str(tmp_path / "in"), "-l", "fr", "-o", str(tmp_path / "out"))
+    assert "would write the same output files" in capsys.readouterr().err
+    assert not (tmp_path / "out").exists()
@@ -0,0 +1,75 @@
+import json
+
+from journal import TranslationJournal, journal_path
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_journal_path_sits_next_to_the_output():
+    assert journal_path("out/catalog_fr.xlsx") == "out/catalog_fr.journal"
+
+
+def test_records_are_appended_to_the_file_only(tmp_path):
+    path = str(tmp_path / "catalog_fr.journal")
+    journal = TranslationJournal(path)
+    journal.record({"Chair": "Chaise"}, {"Lamp": "Timeout"})
+    journal.close()
+
+    assert read_lines(path) == [{"t": "Chair", "r": "Chaise"}, {"t": "Lamp", "e": "Timeout"}]
+    # New translations aren't held in memory; only resumed ones are looked up
+    assert journal.translations == {}
+    assert journal.lookup(["Chair"]) == {}
+    assert journal.failures == {"Lamp": "Timeout"}
+
+
+def test_resume_replays_translations_and_retries_failures(tmp_path):
+    path = str(tmp_path / "catalog_fr.journal")
+    journal = TranslationJournal(path)
+    journal.record({"Chair": "Chaise"}, {"Lamp": "Timeout", "Bag": "Timeout"})
+    journal.record({"Lamp": "Lampe"}, {})
+    journal.close()
+
+    resumed = TranslationJournal(path, resume=True)
+    assert resumed.lookup(["Chair", "Lamp", "Bag", "Table"]) == {"Chair": "Chaise", "Lamp": "Lampe"}
+    assert resumed.failures == {"Bag": "Timeout"}
+
+    # A resumed journal keeps its entries and appends after them
+    resumed.record({"Bag": "Sac"}, {})
+    resumed.close()
+    assert [entry["t"] for entry in read_lines(path)] == ["Chair", "Lamp", "Bag", "Lamp", "Bag"]
+
+
+def test_a_later_failure_does_not_undo_a_translation(tmp_path):
+    path = str(tmp_path / "catalog_fr.journal")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"t": "Chair", "r": "Chaise"}) + "\n")
+        f.write(json.dumps({"t": "Chair", "e": "Timeout"}) + "\n")
+    journal = TranslationJournal(path, resume=True)
+    assert journal.lookup(["Chair"]) == {"Chair": "Chaise"}
+    assert journal.failures == {}
+    journal.close()
+
+
+def test_a_line_cut_short_by_a_crash_is_skipped(tmp_path):
+    path = str(tmp_path / "catalog_fr.journal")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"t": "Chair", "r": "Chaise"}) + "\n")
+        f.write('{"t": "Lamp", "r": "La')
+    journal = TranslationJournal(path, resume=True)
+    assert journal.lookup(["Chair", "Lamp"]) == {"Chair": "Chaise"}
+    journal.close()
+
+
+def test_starting_over_truncates_and_discard_deletes(tmp_path):
+    path = tmp_path / "catalog_fr.journal"
+    path.write_text(json.dumps({"t": "Chair", "r": "Chaise"}) + "\n", encoding="utf-8")
+    journal = TranslationJournal(str(path))
+    assert journal.lookup(["Chair"]) == {}
+    journal.close()
+    assert path.read_text(encoding="utf-8") == ""
+
+    TranslationJournal(str(path)).discard()
+    assert not path.exists()
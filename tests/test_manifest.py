@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+import manifest
+from manifest import fingerprint_frame, load_manifest, manifest_path, save_manifest, unchanged_cells
+
+
+def test_manifest_path_sits_next_to_the_output():
+    assert manifest_path("out/catalog_fr.xlsx") == "out/catalog_fr.manifest.npz"
+
+
+def test_fingerprints_change_only_for_edited_cells():
+    before = fingerprint_frame(pd.DataFrame({"Name": ["Chair", "Lamp"], 1: ["a", "b"]}), ["Name", 1])
+    after = fingerprint_frame(pd.DataFrame({"Name": ["Chair", "Table"], 1: ["a", "b"]}), ["Name", 1])
+    assert set(before) == {"Name", "1"}
+    assert before["Name"].dtype == np.uint64
+    assert list(before["Name"] == after["Name"]) == [True, False]
+    assert (before["1"] == after["1"]).all()
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "catalog_fr.manifest.npz")
+    fingerprints = fingerprint_frame(pd.DataFrame({"Name": ["Chair", "Lamp"], "Notes": ["x", None]}),
+                                     ["Name", "Notes"])
+    save_manifest(path, fingerprints)
+    loaded = load_manifest(path)
+    assert list(loaded) == ["Name", "Notes"]
+    for col in fingerprints:
+        assert (loaded[col] == fingerprints[col]).all()
+    assert not (tmp_path / "catalog_fr.manifest.npz.tmp").exists()
+
+
+def test_missing_corrupt_or_outdated_manifests_are_ignored(tmp_path, monkeypatch):
+    assert load_manifest(str(tmp_path / "missing.npz")) is None
+
+    corrupt = tmp_path / "corrupt.npz"
+    corrupt.write_bytes(b"not a manifest")
+    assert load_manifest(str(corrupt)) is None
+
+    outdated = str(tmp_path / "outdated.npz")
+    save_manifest(outdated, {"Name": np.array([1, 2], dtype=np.uint64)})
+    monkeypatch.setattr(manifest, "MANIFEST_VERSION", manifest.MANIFEST_VERSION + 1)
+    assert load_manifest(outdated) is None
+
+
+def test_unchanged_cells_marks_edits_new_rows_and_new_columns_as_changed():
+    previous = {"Name": np.array([1, 2, 3], dtype=np.uint64)}
+    current = {
+        "Name": np.array([1, 9, 3, 4], dtype=np.uint64),
+        "Notes": np.array([1, 2, 3, 4], dtype=np.uint64),
+    }
+    masks = unchanged_cells(current, previous, row_limit=3)
+    assert list(masks["Name"]) == [True, False, True, False]
+    assert not masks["Notes"].any()
+
+
+def test_unchanged_cells_only_trusts_rows_the_previous_output_has():
+    fingerprints = {"Name": np.array([1, 2, 3], dtype=np.uint64)}
+    masks = unchanged_cells(fingerprints, dict(fingerprints), row_limit=2)
+    assert list(masks["Name"]) == [True, True, False]
@@ -0,0 +1,36 @@
+from openpyxl import Workbook
+
+from cell_rules import CellRules
+from preserve_format import collect_text_cells
+
+
+def make_workbook():
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Name", "SKU", "Notes"])
+    sheet.append(["Red chair", "AB-1234", "=A2"])
+    sheet.append(["Blue lamp", "CD-5678", "Fragile"])
+    other = workbook.create_sheet("Other")
+    other.append(["Description"])
+    other.append(["Red chair"])
+    return workbook
+
+
+def collected(workbook, rules):
+    return [(cell.parent.title, cell.coordinate, text) for cell, text in collect_text_cells(workbook, rules)]
+
+
+def test_header_rows_are_never_translated():
+    assert collected(make_workbook(), CellRules()) == [
+        ("Sheet", "A2", "Red chair"),
+        ("Sheet", "A3", "Blue lamp"),
+        ("Sheet", "C3", "Fragile"),
+        ("Other", "A2", "Red chair"),
+    ]
+
+
+def test_column_lists_are_matched_against_the_header_row():
+    assert collected(make_workbook(), CellRules(exclude_columns=["Notes", "Description"])) == [
+        ("Sheet", "A2", "Red chair"),
+        ("Sheet", "A3", "Blue lamp"),
+    ]
@@ -0,0 +1,176 @@
+from email.utils import format_datetime
+from datetime import datetime, timezone
+
+import pytest
+
+import rate_limiter
+from rate_limiter import AdaptiveRateLimiter, parse_retry_after, throttle_delay
+
+
+class FakeClock:
+    """Stands in for time.monotonic/time.time/time.sleep; sleeping just moves the clock on."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = Response(status_code, headers)
+
+
+class TooManyRequests(Exception):
+    pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock.time)
+    monkeypatch.setattr(rate_limiter.time, "time", clock.time)
+    monkeypatch.setattr(rate_limiter.time, "sleep", clock.sleep)
+    # Always take the longest jittered delay so the waits are predictable
+    monkeypatch.setattr(rate_limiter.random, "uniform", lambda low, high: high)
+    return clock
+
+
+def test_acquire_spends_the_burst_then_paces_at_the_rate(clock):
+    limiter = AdaptiveRateLimiter(rate=2.0, burst=3)
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.sleeps == []
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.sleeps == [pytest.approx(0.5), pytest.approx(0.5)]
+
+
+def test_throttling_cuts_the_rate_down_to_the_floor(clock):
+    limiter = AdaptiveRateLimiter(rate=8.0, min_rate=1.5, decrease=0.5)
+    rates = []
+    for attempt in range(4):
+        limiter.on_throttle(attempt=attempt)
+        rates.append(limiter.rate)
+    assert rates == [4.0, 2.0, 1.5, 1.5]
+    assert limiter.throttled == 4
+
+
+def test_successes_raise_the_rate_additively_up_to_the_ceiling(clock):
+    limiter = AdaptiveRateLimiter(rate=2.0, max_rate=3.0, increase=0.5)
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(2.25)
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.rate == 3.0
+
+
+def test_rate_recovers_after_throttling(clock):
+    limiter = AdaptiveRateLimiter(rate=4.0, min_rate=0.5, max_rate=4.0, increase=1.0)
+    limiter.on_throttle()
+    assert limiter.rate == 2.0
+    # Roughly one success per second's worth of requests buys one req/s back
+    for _ in range(6):
+        limiter.on_success()
+    assert limiter.rate == 4.0
+
+
+def test_retry_after_blocks_every_caller_until_it_expires(clock):
+    limiter = AdaptiveRateLimiter(rate=10.0, burst=10, base_backoff=1.0)
+    limiter.on_throttle(retry_after=5.0)
+    started = clock.now
+    limiter.acquire()
+    # Retry-After plus up to base_backoff of jitter; the bucket refills meanwhile
+    assert clock.now - started == pytest.approx(6.0)
+    assert limiter.rate == 5.0
+
+
+def test_backoff_without_retry_after_grows_exponentially_up_to_the_cap(clock):
+    limiter = AdaptiveRateLimiter(rate=1000.0, min_rate=1000.0, base_backoff=1.0, max_backoff=5.0)
+    waits = []
+    for attempt in range(5):
+        started = clock.now
+        limiter.on_throttle(attempt=attempt)
+        limiter.acquire()
+        waits.append(clock.now - started)
+    assert waits == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+
+def test_call_retries_throttled_requests_and_honours_retry_after(clock):
+    responses = [HTTPError(429, {"Retry-After": "3"}), HTTPError(503), "Chaise"]
+
+    def request():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    limiter = AdaptiveRateLimiter(rate=10.0, min_rate=1.0, base_backoff=1.0)
+    started = clock.now
+    assert limiter.call(request) == "Chaise"
+    assert limiter.throttled == 2
+    # 3s + 1s jitter for the Retry-After, then a 2s backoff for attempt 1
+    assert clock.now - started >= 6.0
+
+
+def test_call_gives_up_after_max_retries(clock):
+    calls = []
+
+    def request():
+        calls.append(clock.now)
+        raise TooManyRequests()
+
+    limiter = AdaptiveRateLimiter(max_retries=2)
+    with pytest.raises(TooManyRequests):
+        limiter.call(request)
+    assert len(calls) == 3
+
+
+def test_call_raises_other_errors_without_retrying(clock):
+    calls = []
+
+    def request():
+        calls.append(1)
+        raise HTTPError(500)
+
+    with pytest.raises(HTTPError):
+        AdaptiveRateLimiter().call(request)
+    assert calls == [1]
+
+
+@pytest.mark.parametrize("error, expected", [
+    (TooManyRequests(), 0.0),
+    (HTTPError(429), 0.0),
+    (HTTPError(429, {"Retry-After": "7"}), 7.0),
+    (HTTPError(503, {"Retry-After": "1.5"}), 1.5),
+    (HTTPError(500, {"Retry-After": "7"}), None),
+    (ValueError("bad input"), None),
+])
+def test_throttle_delay(error, expected):
+    assert throttle_delay(error) == expected
+
+
+def test_parse_retry_after_accepts_seconds_and_http_dates(clock):
+    clock.now = datetime(2024, 1, 1, 12, 0, 0, tzinfo=timezone.utc).timestamp()
+    later = format_datetime(datetime(2024, 1, 1, 12, 0, 30, tzinfo=timezone.utc), usegmt=True)
+    earlier = format_datetime(datetime(2024, 1, 1, 11, 0, 0, tzinfo=timezone.utc), usegmt=True)
+
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("-5") == 0.0
+    assert parse_retry_after(later) == pytest.approx(30.0)
+    assert parse_retry_after(earlier) == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
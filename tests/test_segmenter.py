@@ -0,0 +1,129 @@
+import pytest
+
+from segmenter import Segmenter, template_intact, tokens_preserved, translate_plan, unmask
+
+
+def fake_translate(template):
+    # Upper-cases the words and keeps the tokens, like a well-behaved backend
+    return template.upper()
+
+
+def assemble(plan, translate=fake_translate, failed=()):
+    batches = []
+    assembler = plan.assembler(lambda translations, failures: batches.append((translations, failures)))
+    translations = {template: translate(template) for template in plan.templates if template not in failed}
+    failures = {template: "Backend error" for template in failed}
+    assembler.on_templates(translations, failures)
+    return assembler, batches
+
+
+def test_mask_numbers_tokens_in_order():
+    template, values = Segmenter().mask("Order 1234 for {name} shipped, see https://x.io/a")
+    assert template == "Order {0} for {1} shipped, see {2}"
+    assert values == ["1234", "{name}", "https://x.io/a"]
+
+
+def test_mask_keeps_numbers_when_disabled():
+    template, values = Segmenter(mask_numbers=False).mask("Order 1234 for %s")
+    assert template == "Order 1234 for {0}"
+    assert values == ["%s"]
+
+
+def test_unmask_follows_reordered_tokens():
+    assert unmask("{1} ist {0}", ["rot", "Der Ball"]) == "Der Ball ist rot"
+
+
+@pytest.mark.parametrize("translated", ["Commande expédiée", "Commande {0} {0}", "Commande {0} {2}"])
+def test_unmask_rejects_lost_duplicated_or_invented_tokens(translated):
+    assert not tokens_preserved(translated, 2)
+    with pytest.raises(ValueError):
+        unmask(translated, ["1234", "5678"])
+
+
+def test_texts_differing_in_values_share_one_template():
+    plan = Segmenter().plan(["Order 1234 shipped", "Order 5678 shipped", "Order 1234 shipped"])
+    assert plan.templates == ["Order {0} shipped"]
+    assert list(plan.users["Order {0} shipped"]) == ["Order 1234 shipped", "Order 5678 shipped"]
+
+
+def test_round_trip_puts_each_texts_own_values_back():
+    texts = ["Order 1234 shipped", "Order 5678 shipped", "  Hello {name}!  "]
+    assembler, batches = assemble(Segmenter().plan(texts))
+    assert assembler.translations == {
+        "Order 1234 shipped": "ORDER 1234 SHIPPED",
+        "Order 5678 shipped": "ORDER 5678 SHIPPED",
+        "  Hello {name}!  ": "  HELLO {name}!  ",
+    }
+    assert not assembler.failures
+    assert {text for translations, _ in batches for text in translations} == set(texts)
+
+
+def test_long_texts_share_repeated_sentences_and_keep_separators():
+    segmenter = Segmenter(split_min_chars=20)
+    texts = ["Thanks for your order. It ships today.", "Thanks for your order.\nCall us anytime."]
+    plan = segmenter.plan(texts)
+    assert plan.templates == ["Thanks for your order.", "It ships today.", "Call us anytime."]
+    assembler, _ = assemble(plan)
+    assert assembler.translations == {
+        texts[0]: "THANKS FOR YOUR ORDER. IT SHIPS TODAY.",
+        texts[1]: "THANKS FOR YOUR ORDER.\nCALL US ANYTIME.",
+    }
+
+
+def test_texts_without_words_are_done_without_translation():
+    plan = Segmenter().plan(["1234", "{name}"])
+    assert plan.templates == []
+    assembler, batches = assemble(plan)
+    assert assembler.translations == {"1234": "1234", "{name}": "{name}"}
+    assert batches == [({"1234": "1234", "{name}": "{name}"}, {})]
+
+
+def test_failed_templates_fail_every_text_using_them():
+    plan = Segmenter().plan(["Order 1234 shipped", "Hello"])
+    assembler, _ = assemble(plan, failed=["Order {0} shipped"])
+    assert assembler.translations == {"Hello": "HELLO"}
+    assert assembler.failures == {"Order 1234 shipped": "Backend error"}
+
+
+def test_mangled_templates_fall_back_to_the_raw_segments():
+    plan = Segmenter().plan(["Order 1234 shipped", "Order 5678 shipped", "Hello"])
+    assembler, batches = assemble(plan, lambda template: template.upper().replace("{0}", "#"))
+    assert assembler.mangled == {"Order {0} shipped"}
+    assert assembler.translations == {"Hello": "HELLO"}
+
+    raw = plan.raw_segments(assembler.mangled)
+    assert raw == ["Order 1234 shipped", "Order 5678 shipped"]
+    assembler.on_raw({"Order 1234 shipped": "Commande 1234 expédiée"}, {"Order 5678 shipped": "Timeout"})
+    assembler.finish_mangled()
+    assert assembler.translations["Order 1234 shipped"] == "Commande 1234 expédiée"
+    assert assembler.failures == {"Order 5678 shipped": "Timeout"}
+    assert batches[-1] == ({"Order 1234 shipped": "Commande 1234 expédiée"}, {"Order 5678 shipped": "Timeout"})
+
+
+def test_segment_sources_follow_the_first_text_using_a_template():
+    texts = ["Order 1234 shipped", "Order 5678 shipped", "Hello"]
+    plan = Segmenter().plan(texts)
+    sources = plan.segment_sources({"Order 1234 shipped": "en", "Order 5678 shipped": "de"})
+    assert sources == {"Order {0} shipped": "en", "Order 1234 shipped": "en", "Order 5678 shipped": "de"}
+
+
+def test_translate_plan_retries_mangled_templates_raw_and_flags_them_as_invalid():
+    calls = []
+
+    def translate(segments, sources, on_batch, valid):
+        calls.append((list(segments), valid))
+        translations = {segment: segment.upper().replace("{0}", "#") for segment in segments}
+        if on_batch:
+            on_batch(translations, {})
+        return translations, {}
+
+    batches = []
+    translations, failures = translate_plan(
+        Segmenter().plan(["Order 1234 shipped", "Hello"]), translate,
+        lambda batch, _: batches.append(batch)
+    )
+    assert translations == {"Order 1234 shipped": "ORDER 1234 SHIPPED", "Hello": "HELLO"}
+    assert not failures
+    assert calls == [(["Order {0} shipped", "Hello"], template_intact), (["Order 1234 shipped"], None)]
+    assert batches == [{"Hello": "HELLO"}, {"Order 1234 shipped": "ORDER 1234 SHIPPED"}]
+    assert not template_intact("Order {0} shipped", "ORDER # SHIPPED")
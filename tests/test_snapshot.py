@@ -0,0 +1,85 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import snapshot
+from snapshot import read_workbook, save_snapshot, snapshot_path, source_stamp
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = str(tmp_path / "catalog.xlsx")
+    pd.DataFrame({
+        "Name": ["Chair", None, "Lamp"],
+        "Price": [10.5, 12.0, None],
+        "Stock": [1, 2, 3],
+        "Mixed": ["Oak", 42, None],
+        "Added": [datetime.datetime(2024, 1, 1), None, datetime.datetime(2024, 2, 1)],
+        7: ["x", "y", "z"],
+    }).to_excel(path, index=False)
+    return path
+
+
+def read_without_excel(path, directory, monkeypatch, **kwargs):
+    # Fails loudly if the workbook would be parsed instead of served from the snapshot
+    with monkeypatch.context() as patch:
+        patch.setattr(pd, "read_excel", lambda *args, **kwargs: pytest.fail("workbook was parsed"))
+        return read_workbook(path, directory=directory, **kwargs)
+
+
+def test_snapshot_round_trip_matches_read_excel(workbook, tmp_path, monkeypatch):
+    directory = str(tmp_path / "snapshots")
+    expected = pd.read_excel(workbook)
+    pd.testing.assert_frame_equal(read_workbook(workbook, directory=directory), expected)
+    assert os.path.exists(snapshot_path(workbook, directory))
+
+    df = read_without_excel(workbook, directory, monkeypatch)
+    pd.testing.assert_frame_equal(df, expected)
+    assert list(df.columns) == ["Name", "Price", "Stock", "Mixed", "Added", 7]
+    # Empty text cells come back as NaN, like read_excel, not as Arrow's None
+    assert df["Name"][1] is not None and np.isnan(df["Name"][1])
+    assert list(df["Mixed"][:2]) == ["Oak", 42] and np.isnan(df["Mixed"][2])
+
+
+def test_snapshot_serves_a_column_subset(workbook, tmp_path, monkeypatch):
+    directory = str(tmp_path / "snapshots")
+    read_workbook(workbook, directory=directory)
+    df = read_without_excel(workbook, directory, monkeypatch, columns=[7, "Name", "Missing"])
+    pd.testing.assert_frame_equal(df, pd.read_excel(workbook)[["Name", 7]])
+
+
+def test_touched_file_keeps_its_snapshot_but_edits_invalidate_it(workbook, tmp_path, monkeypatch):
+    directory = str(tmp_path / "snapshots")
+    read_workbook(workbook, directory=directory)
+
+    stat = os.stat(workbook)
+    os.utime(workbook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    read_without_excel(workbook, directory, monkeypatch)
+
+    pd.DataFrame({"Name": ["Table"]}).to_excel(workbook, index=False)
+    df = read_workbook(workbook, directory=directory)
+    assert list(df["Name"]) == ["Table"]
+
+
+def test_dates_mixed_with_text_are_not_snapshotted(tmp_path):
+    path = str(tmp_path / "dates.xlsx")
+    pd.DataFrame({"When": [datetime.datetime(2024, 1, 1), "soon"]}).to_excel(path, index=False)
+    directory = str(tmp_path / "snapshots")
+
+    expected = pd.read_excel(path)
+    assert not save_snapshot(source_stamp(path), expected, snapshot_path(path, directory))
+    # Such sheets are simply parsed every time
+    pd.testing.assert_frame_equal(read_workbook(path, directory=directory), expected)
+    assert not os.path.exists(snapshot_path(path, directory))
+
+
+def test_outdated_snapshots_are_ignored(workbook, tmp_path, monkeypatch):
+    directory = str(tmp_path / "snapshots")
+    read_workbook(workbook, directory=directory)
+    monkeypatch.setattr(snapshot, "SNAPSHOT_VERSION", snapshot.SNAPSHOT_VERSION + 1)
+    assert snapshot.load_snapshot(workbook, snapshot_path(workbook, directory)) is None
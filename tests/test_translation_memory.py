@@ -0,0 +1,45 @@
+import time
+
+import pytest
+
+from translation_memory import TranslationMemory
+
+
+@pytest.fixture
+def memory(tmp_path):
+    with TranslationMemory(str(tmp_path / "memory.sqlite3"), max_entries=3) as memory:
+        yield memory
+
+
+def test_lookups_are_keyed_by_languages_and_backend_and_counted(memory):
+    memory.put_many({"Chair": "Chaise", "Lamp": "Lampe"}, "auto", "fr", "google")
+    assert memory.get_many(["Chair", "Lamp", "Sofa", "Chair"], "auto", "fr", "google") == {
+        "Chair": "Chaise", "Lamp": "Lampe",
+    }
+    assert memory.get_many(["Chair"], "auto", "de", "google") == {}
+    assert memory.get_many(["Chair"], "auto", "fr", "rest") == {}
+    assert (memory.hits, memory.misses) == (2, 3)
+
+
+def test_lookups_span_several_query_chunks(tmp_path):
+    with TranslationMemory(str(tmp_path / "memory.sqlite3")) as memory:
+        texts = [f"Text {index}" for index in range(1200)]
+        memory.put_many({text: text.upper() for text in texts}, "auto", "fr", "google")
+        assert memory.get_many(texts, "auto", "fr", "google") == {text: text.upper() for text in texts}
+
+
+def test_detections_are_cached_per_backend(memory):
+    memory.put_detections({"Bonjour tout le monde": "fr"}, "google")
+    assert memory.get_detections(["Bonjour tout le monde", "Hello"], "google") == {"Bonjour tout le monde": "fr"}
+    assert memory.get_detections(["Bonjour tout le monde"], "rest") == {}
+    # Detection lookups don't count as translation hits or misses
+    assert (memory.hits, memory.misses) == (0, 0)
+
+
+def test_entries_served_recently_survive_eviction(memory):
+    memory.put_many({"A": "a", "B": "b", "C": "c"}, "auto", "fr", "google")
+    time.sleep(0.01)
+    memory.get_many(["A"], "auto", "fr", "google")
+    time.sleep(0.01)
+    memory.put_many({"D": "d"}, "auto", "fr", "google")
+    assert set(memory.get_many(["A", "B", "C", "D"], "auto", "fr", "google")) == {"A", "C", "D"}
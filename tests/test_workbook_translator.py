@@ -0,0 +1,77 @@
+import pandas as pd
+
+from backends import TranslationBackend
+from translation_memory import TranslationMemory
+from journal import TranslationJournal
+from segmenter import Segmenter
+from workbook_translator import translate_texts, translate_workbook
+
+
+class RecordingBackend(TranslationBackend):
+    name = "recording"
+
+    def __init__(self):
+        self.sent = []
+
+    def translate(self, text, target, source="auto"):
+        self.sent.append(text)
+        return f"[{target}] {text}"
+
+    def translate_batch(self, texts, target, source="auto"):
+        return [self.translate(text, target, source) for text in texts]
+
+
+def translate_incrementally(tmp_path, input_file, run):
+    # A fresh translation memory per run, so every text that isn't patched in
+    # from the previous output reaches the backend
+    backend = RecordingBackend()
+    memory = TranslationMemory(str(tmp_path / f"memory{run}.sqlite3"))
+    try:
+        result = translate_workbook(input_file, ["fr"], str(tmp_path / "out"), backend=backend,
+                                    memory=memory, incremental=True, snapshot=False)
+    finally:
+        memory.close()
+    return result, backend.sent
+
+
+def test_incremental_rerun_of_an_unchanged_sheet_with_a_numeric_header(tmp_path):
+    input_file = str(tmp_path / "catalog.xlsx")
+    pd.DataFrame({2024: ["Red chair", "Blue lamp"], "Name": ["Table", "Sofa"]}).to_excel(input_file, index=False)
+
+    result, sent = translate_incrementally(tmp_path, input_file, 1)
+    assert sorted(sent) == ["Blue lamp", "Red chair", "Sofa", "Table"]
+    output = pd.read_excel(result["outputs"]["fr"])
+    assert list(output.columns) == [2024, "Name"]
+
+    result, sent = translate_incrementally(tmp_path, input_file, 2)
+    assert sent == []
+    assert pd.read_excel(result["outputs"]["fr"]).equals(output)
+    assert output[2024].tolist() == ["[fr] Red chair", "[fr] Blue lamp"]
+
+
+class ManglingBackend(RecordingBackend):
+    name = "mangling"
+
+    def translate(self, text, target, source="auto"):
+        # Drops the first token, as backends sometimes do
+        return super().translate(text, target, source).replace("{0}", "")
+
+
+def test_mangled_template_translations_are_neither_cached_nor_journaled(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "memory.sqlite3"))
+    journal = TranslationJournal(str(tmp_path / "catalog_fr.journal"))
+    backend = ManglingBackend()
+    try:
+        translations, failures = translate_texts(
+            ["Order 1234 shipped", "Hello"], "fr", memory, journal=journal, backend=backend, segmenter=Segmenter()
+        )
+        journal.close()
+        assert translations == {"Order 1234 shipped": "[fr] Order 1234 shipped", "Hello": "[fr] Hello"}
+        assert not failures
+        assert backend.sent == ["Order {0} shipped", "Hello", "Order 1234 shipped"]
+
+        cached = memory.get_many(["Order {0} shipped", "Hello", "Order 1234 shipped"], "auto", "fr", backend.name)
+        assert cached == {"Hello": "[fr] Hello", "Order 1234 shipped": "[fr] Order 1234 shipped"}
+        assert sorted(TranslationJournal(journal.path, resume=True).translations) == ["Hello", "Order 1234 shipped"]
+    finally:
+        memory.close()
@@ -0,0 +1,30 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from writers import frame_rows, read_frame, write_frame
+
+
+def test_frame_rows_keeps_header_types_and_turns_missing_values_into_none():
+    df = pd.DataFrame({2024: ["a", None], "Name": [1.5, float("nan")]})
+    rows = list(frame_rows(df))
+    assert rows[0] == [2024, "Name"]
+    assert type(rows[0][0]) is int
+    assert rows[1:] == [("a", 1.5), (None, None)]
+
+
+@pytest.mark.parametrize("writer", ["openpyxl", "xlsxwriter"])
+def test_xlsx_outputs_keep_numeric_and_date_headers(tmp_path, writer):
+    pytest.importorskip(writer)
+    day = datetime.datetime(2024, 1, 31)
+    df = pd.DataFrame({2024: ["a"], day: ["b"], "Name": ["c"]})
+    path = str(tmp_path / "out.xlsx")
+    write_frame(df, path, writer)
+    assert list(pd.read_excel(path).columns) == [2024, day, "Name"]
+
+
+def test_read_frame_matches_columns_by_name_as_text(tmp_path):
+    path = str(tmp_path / "out.csv")
+    write_frame(pd.DataFrame({2024: ["a"], "Name": ["b"], "Other": ["c"]}), path, "csv")
+    assert list(read_frame(path, [2024, "Name"]).columns) == ["2024", "Name"]
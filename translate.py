@@ -1,11 +1,23 @@
-import requests
-import json
-import os
 from dotenv import load_dotenv
 
+from backends import get_backend
+from batching import translate_batched
+from rate_limiter import get_limiter
+from translation_memory import TranslationMemory
+
 # Load environment variables from .env file
 load_dotenv()
 
+# Translation memory shared by every call, opened on first use
+_memory = None
+
+def get_memory():
+    """Return the process-wide translation memory, opening it on first use."""
+    global _memory
+    if _memory is None:
+        _memory = TranslationMemory()
+    return _memory
+
 def translate_text(text, target_language):
     """
     Translates the given text to the specified target language.
@@ -17,36 +29,69 @@ def translate_text(text, target_language):
     Returns:
         str: The translated text
     """
+    # The REST backend is shared, so every call reuses its pooled keep-alive connections
+    backend = get_backend("rest")
+    
+    # Check the translation memory before going to the network
+    memory = get_memory()
+    cached = memory.get(text, 'auto', target_language, backend.name)
+    if cached is not None:
+        return cached
+    
     # You would need to set up your own API key for a translation service
     # This example uses a hypothetical API_KEY that should be stored in your .env file
-    api_key = os.getenv('TRANSLATION_API_KEY')
-    
-    if not api_key:
+    if not backend.api_key:
         return "Error: API key not found. Please set the TRANSLATION_API_KEY in your .env file."
     
-    # Using a generic translation API endpoint
-    url = "https://api.translation-service.com/v2/translate"
+    try:
+        translated_text = get_limiter(backend.name).call(backend.translate, text, target_language)
+    except Exception as e:
+        return f"Error: {str(e)}"
     
-    payload = {
-        "q": text,
-        "target": target_language,
-        "format": "text"
-    }
+    memory.put(text, translated_text, 'auto', target_language, backend.name)
+    return translated_text
+
+def translate_texts(texts, target_language):
+    """
+    Translates many texts to the target language using batched requests.
     
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
+    Texts are deduplicated, looked up in the translation memory, and the rest
+    are sent as lists in the "q" field, several texts per request. A batch
+    that fails is retried one text at a time.
     
-    try:
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        
-        result = response.json()
-        return result.get("translatedText", "Translation failed")
+    Args:
+        texts (list): The texts to translate
+        target_language (str): The language code to translate to
     
-    except requests.exceptions.RequestException as e:
-        return f"Error: {str(e)}"
+    Returns:
+        tuple: (dict of text -> translated text, dict of text -> error message)
+    """
+    backend = get_backend("rest")
+    unique_texts = list(dict.fromkeys(texts))
+    
+    # Check the translation memory before going to the network
+    memory = get_memory()
+    translations = memory.get_many(unique_texts, 'auto', target_language, backend.name)
+    pending_texts = [text for text in unique_texts if text not in translations]
+    if not pending_texts:
+        return translations, {}
+    
+    if not backend.api_key:
+        error = "API key not found. Please set the TRANSLATION_API_KEY in your .env file."
+        return translations, {text: error for text in pending_texts}
+    
+    new_translations, failures = translate_batched(
+        pending_texts,
+        lambda batch: backend.translate_batch(batch, target_language),
+        lambda text: backend.translate(text, target_language),
+        max_chars=backend.max_batch_chars,
+        max_items=backend.max_batch_items,
+        limiter=get_limiter(backend.name),
+    )
+    
+    memory.put_many(new_translations, 'auto', target_language, backend.name)
+    translations.update(new_translations)
+    return translations, failures
 
 def main():
     """
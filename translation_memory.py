@@ -0,0 +1,231 @@
+import hashlib
+import os
+import sqlite3
+import time
+from threading import Lock
+
+# Default location of the shared translation memory, overridable from the environment
+DEFAULT_MEMORY_PATH = os.path.join(os.path.expanduser("~"), ".excel_translator", "translation_memory.sqlite3")
+
+# Default maximum number of stored translations before LRU eviction kicks in
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+# SQLite limits the number of bound parameters per statement, so bulk queries are chunked
+_QUERY_CHUNK_SIZE = 500
+
+
+def text_hash(text):
+    """Return the hex SHA-256 digest used as the cache key for a source text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """
+    Persistent on-disk translation cache shared across runs and languages.
+
+    Entries are keyed by (source text hash, source language, target language,
+    backend). Lookups and inserts work in bulk, the store is capped at
+    ``max_entries`` with least-recently-used eviction, and ``hits``/``misses``
+    count how many lookups were served from the cache. Detected source
+    languages are kept alongside, keyed by (text hash, backend).
+    """
+
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path or os.getenv("TRANSLATION_MEMORY_PATH") or DEFAULT_MEMORY_PATH
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+        # Create the parent folder if it doesn't exist
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                text_hash TEXT NOT NULL,
+                source TEXT NOT NULL,
+                target TEXT NOT NULL,
+                backend TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (text_hash, source, target, backend)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used)")
+        # Detected source languages, so each text is detected once per backend
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS detections (
+                text_hash TEXT NOT NULL,
+                backend TEXT NOT NULL,
+                language TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (text_hash, backend)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_detections_last_used ON detections (last_used)")
+        self._conn.commit()
+
+    def get_many(self, texts, source, target, backend):
+        """
+        Looks up many texts at once.
+
+        Args:
+            texts (iterable): The source texts to look up
+            source (str): The source language code (e.g., 'auto')
+            target (str): The target language code
+            backend (str): The name of the translation backend
+
+        Returns:
+            dict: Mapping of source text to cached translation for every hit
+        """
+        with self._lock:
+            found, looked_up = self._lookup(
+                "translations", "translation", texts, {"source": source, "target": target, "backend": backend}
+            )
+            self.hits += len(found)
+            self.misses += looked_up - len(found)
+        return found
+
+    def get(self, text, source, target, backend):
+        """Return the cached translation for a single text, or None."""
+        return self.get_many([text], source, target, backend).get(text)
+
+    def put_many(self, translations, source, target, backend):
+        """
+        Stores many translations at once and evicts the oldest entries if needed.
+
+        Args:
+            translations (dict): Mapping of source text to translated text
+            source (str): The source language code
+            target (str): The target language code
+            backend (str): The name of the translation backend
+        """
+        if not translations:
+            return
+        now = time.time()
+        rows = [
+            (text_hash(text), source, target, backend, translation, now)
+            for text, translation in translations.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations "
+                "(text_hash, source, target, backend, translation, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict()
+            self._conn.commit()
+
+    def put(self, text, translation, source, target, backend):
+        """Store a single translation."""
+        self.put_many({text: translation}, source, target, backend)
+
+    def get_detections(self, texts, backend):
+        """
+        Looks up the detected source language of many texts at once.
+
+        Returns:
+            dict: Mapping of source text to language code for every text detected before
+        """
+        with self._lock:
+            found, _ = self._lookup("detections", "language", texts, {"backend": backend})
+        return found
+
+    def put_detections(self, detections, backend):
+        """
+        Stores detected source languages.
+
+        Args:
+            detections (dict): Mapping of source text to language code
+            backend (str): The name of the backend that detected them
+        """
+        if not detections:
+            return
+        now = time.time()
+        rows = [(text_hash(text), backend, language, now) for text, language in detections.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO detections (text_hash, backend, language, last_used) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._evict("detections")
+            self._conn.commit()
+
+    def _lookup(self, table, column, texts, keys):
+        # Fetches ``column`` for many texts from ``table``, where the other key
+        # columns equal ``keys`` (column -> value), in chunks of bound parameters.
+        # Called with the lock held; returns (text -> value for every hit,
+        # number of unique texts looked up)
+        hashes = {}
+        for text in texts:
+            hashes.setdefault(text_hash(text), text)
+
+        conditions = " AND ".join(f"{key} = ?" for key in keys)
+        values = list(keys.values())
+        found = {}
+        now = time.time()
+        hash_keys = list(hashes)
+        for start in range(0, len(hash_keys), _QUERY_CHUNK_SIZE):
+            chunk = hash_keys[start:start + _QUERY_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT text_hash, {column} FROM {table} WHERE {conditions} AND text_hash IN ({placeholders})",
+                [*values, *chunk],
+            ).fetchall()
+            for key, value in rows:
+                found[hashes[key]] = value
+
+            # Touch the rows we served so they survive eviction
+            self._conn.executemany(
+                f"UPDATE {table} SET last_used = ? WHERE text_hash = ? AND {conditions}",
+                [(now, key, *values) for key, _ in rows],
+            )
+        self._conn.commit()
+        return found, len(hashes)
+
+    def _evict(self, table="translations"):
+        # Drop the least recently used entries beyond the size cap
+        if not self.max_entries:
+            return
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE rowid IN "
+                f"(SELECT rowid FROM {table} ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()
+        return count
+
+    def stats(self):
+        """Return the hit/miss counters and current size as a dict."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
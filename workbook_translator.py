@@ -0,0 +1,702 @@
+"""
+Headless workbook translation core, usable without Tk.
+
+The GUI in excel_translator.py and the command line in cli.py are thin
+front ends over ``translate_workbook``. Heavy dependencies (pandas and its
+Excel engines, deep_translator) are imported on first use so that merely
+importing this module stays cheap.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
+
+from backends import get_backend
+from batching import GroupedExecutor, translate_batched
+from cell_rules import CellRules
+from journal import TranslationJournal, journal_path
+from metrics import get_metrics
+from rate_limiter import get_limiter
+from segmenter import translate_plan
+from snapshot import read_workbook
+from source_detection import AUTO, detect_sources, same_language
+from translation_memory import TranslationMemory
+from writers import DEFAULT_WRITER, check_writer, output_path, read_frame, write_frame, write_pool, write_sheets
+
+# Dictionary mapping user-friendly language names to language codes
+LANGUAGE_MAP = {
+    "English": "en",
+    "French": "fr",
+    "Spanish": "es",
+    "German": "de",
+    "Italian": "it",
+    "Dutch": "nl",
+    "Portuguese": "pt",
+    "Russian": "ru",
+    "Chinese": "zh-CN",
+    "Japanese": "ja",
+    "Korean": "ko",
+    "Arabic": "ar",
+    "Hindi": "hi",
+    "Turkish": "tr",
+    "Greek": "el",
+    "Polish": "pl",
+    "Vietnamese": "vi",
+    "Thai": "th",
+    "Swedish": "sv",
+    "Danish": "da",
+    "Finnish": "fi",
+    "Norwegian": "no",
+    "Czech": "cs",
+    "Romanian": "ro",
+    "Hungarian": "hu",
+    "Bulgarian": "bg",
+    "Ukrainian": "uk",
+    "Croatian": "hr",
+    "Slovak": "sk",
+    "Indonesian": "id",
+    "Malay": "ms",
+    "Hebrew": "he"
+}
+
+def is_translatable(value):
+    """Return True for non-empty strings that should be sent to the translator."""
+    return isinstance(value, str) and bool(value.strip())
+
+def collect_unique_texts(df, columns, masks=None):
+    """
+    Collects the unique translatable strings across the given columns.
+    
+    Args:
+        df (pandas.DataFrame): The source data
+        columns (list): The columns to scan
+        masks (dict): Optional column (as str) -> boolean array restricting
+            which rows are scanned
+    
+    Returns:
+        list: The unique non-empty strings, in order of first appearance
+    """
+    unique_texts = {}
+    for col in columns:
+        series = df[col] if masks is None else df[col][masks[str(col)]]
+        values = series.unique()
+        for value in values:
+            if is_translatable(value):
+                unique_texts.setdefault(value, None)
+    return list(unique_texts)
+
+def apply_translations(df, columns, translations, masks=None):
+    """
+    Replaces every cell that has a translation, in place, using Series.map.
+    
+    Cells without an entry in ``translations`` (non-strings, or texts that
+    failed to translate) keep their original value. ``masks`` optionally
+    restricts the replacement to some rows per column, as in ``collect_unique_texts``.
+    """
+    if not translations:
+        return
+    for col in columns:
+        mask = df[col].isin(list(translations))
+        if masks is not None:
+            mask &= masks[str(col)]
+        if mask.any():
+            df.loc[mask, col] = df.loc[mask, col].map(translations)
+
+# Maximum number of translation requests in flight across all languages
+MAX_CONCURRENT_REQUESTS = 8
+
+# Rows per chunk when streaming very large sheets
+STREAMING_CHUNK_SIZE = 5000
+
+# Sheets with fewer cells than this are written in-process; spawning writer
+# processes only pays off for large outputs
+PARALLEL_WRITE_MIN_CELLS = 200_000
+
+# Minimum seconds between two progress updates (a 10 Hz UI refresh rate)
+PROGRESS_INTERVAL = 0.1
+
+class LanguageProgress:
+    """
+    Thread-safe progress counters for languages that finish out of order.
+    
+    With a run_control.RunControl, every change is mirrored to it for live
+    per-language throughput and ETA.
+    """
+    
+    def __init__(self, target_languages, total_per_language, control=None):
+        self.totals = {lang_code: total_per_language for lang_code in target_languages}
+        self.done = {lang_code: 0 for lang_code in target_languages}
+        self.control = control
+        self._lock = Lock()
+        if control is not None:
+            for lang_code in target_languages:
+                control.add_total(lang_code, total_per_language)
+    
+    def set_total(self, lang_code, total):
+        """Change the amount of work for one language, e.g. after an incremental diff."""
+        with self._lock:
+            if self.control is not None:
+                self.control.add_total(lang_code, total - self.totals[lang_code])
+            self.totals[lang_code] = total
+    
+    def advance(self, lang_code, count):
+        """Record finished texts and return (done for this language, overall percent)."""
+        with self._lock:
+            self.done[lang_code] += count
+            if self.control is not None:
+                self.control.advance(lang_code, count)
+            total = sum(self.totals.values())
+            overall = (sum(self.done.values()) / total) * 100 if total else 100
+            return self.done[lang_code], overall
+
+def translate_texts(texts, lang_code, memory, executor=None, on_batch=None, journal=None, backend=None,
+                    segmenter=None, sources=None, control=None, valid=None):
+    """
+    Translates unique texts to one language, consulting the translation memory first.
+    
+    Args:
+        texts (list): The unique texts to translate
+        lang_code (str): The target language code
+        memory (TranslationMemory): The translation memory to read from and update
+        executor (concurrent.futures.Executor): Optional shared request pool
+        on_batch (callable): Optional ``on_batch(batch_translations, batch_failures)``
+            progress callback; texts served by the journal or the translation
+            memory are reported as a first batch
+        journal (TranslationJournal): Optional checkpoint journal; texts it already
+            holds are not translated again and every finished batch is appended to it
+        backend (backends.TranslationBackend): Backend to translate with; defaults
+            to the shared default backend
+        segmenter (segmenter.Segmenter): Optional segmenter; when given, texts are
+            masked and split, and only their unique templates are translated
+            (and cached and journaled)
+        sources (dict): Optional text -> detected source language (see
+            source_detection.py); requests then name their source, and texts
+            already in the target language are copied without a request
+        control (run_control.RunControl): Optional pause/cancel switch; texts a
+            cancelled run never sent are returned as failures
+        valid (callable): Optional ``valid(text, translation)``; translations it
+            rejects are still returned but neither journaled nor cached
+    
+    Returns:
+        tuple: (dict of text -> translation, dict of text -> error message)
+    """
+    if segmenter is not None:
+        return _translate_segmented(texts, lang_code, memory, executor, on_batch, journal, backend, segmenter,
+                                    sources, control)
+    
+    backend = backend or get_backend()
+    metrics = get_metrics()
+    
+    with metrics.timer("cache_lookup"):
+        # Texts finished before an interruption come straight from the journal
+        journaled = journal.lookup(texts) if journal is not None else {}
+        
+        # Reuse translations from earlier runs before hitting the network
+        translations = memory.get_many(
+            [text for text in texts if text not in journaled], 'auto', lang_code, backend.name
+        )
+    metrics.count("journal_hits", len(journaled))
+    metrics.count("memory_hits", len(translations))
+    metrics.count("memory_misses", len(texts) - len(journaled) - len(translations))
+    translations.update(journaled)
+    
+    # Texts already written in the target language are kept as they are
+    sources = sources or {}
+    copied = {
+        text: text for text in texts
+        if text not in translations and same_language(sources.get(text, AUTO), lang_code)
+    }
+    metrics.count("texts_same_language", len(copied))
+    translations.update(copied)
+    if on_batch and translations:
+        on_batch(dict(translations), {})
+    
+    # Grouped by source language, so every batch names its source explicitly
+    pending_texts = [text for text in texts if text not in translations]
+    if sources:
+        pending_texts.sort(key=lambda text: sources.get(text, AUTO))
+    
+    def cacheable(batch_translations):
+        if valid is None:
+            return batch_translations
+        return {text: translation for text, translation in batch_translations.items() if valid(text, translation)}
+    
+    def checkpoint_batch(batch_translations, batch_failures):
+        journal.record(cacheable(batch_translations), batch_failures)
+        if on_batch:
+            on_batch(batch_translations, batch_failures)
+    
+    # Translate the remaining unique strings in batches
+    new_translations, failures = translate_batched(
+        pending_texts,
+        lambda batch: backend.translate_batch(batch, lang_code, sources.get(batch[0], AUTO)),
+        lambda text: backend.translate(text, lang_code, sources.get(text, AUTO)),
+        max_chars=backend.max_batch_chars,
+        max_items=backend.max_batch_items,
+        separator=backend.batch_separator,
+        on_batch=checkpoint_batch if journal is not None else on_batch,
+        # Every worker shares one adaptive limiter for the backend
+        limiter=get_limiter(backend.name),
+        executor=executor,
+        key=(lambda text: sources.get(text, AUTO)) if sources else None,
+        control=control,
+    )
+    
+    # Remember the new translations for future runs, including any that only
+    # made it into the journal before an interruption; copied texts aren't
+    # translations and are never cached
+    memory.put_many(cacheable({**journaled, **new_translations}), 'auto', lang_code, backend.name)
+    translations.update(new_translations)
+    metrics.count("texts_translated", len(new_translations))
+    metrics.count("texts_failed", len(failures))
+    return translations, failures
+
+def _translate_segmented(texts, lang_code, memory, executor, on_batch, journal, backend, segmenter,
+                         sources=None, control=None):
+    # Translates the unique templates behind texts and rebuilds every text from them;
+    # on_batch still sees whole texts, reported as soon as all their templates are done
+    def translate_segments(segments, segment_sources, on_segments, valid):
+        return translate_texts(segments, lang_code, memory, executor, on_segments, journal, backend,
+                               sources=segment_sources, control=control, valid=valid)
+    
+    return translate_plan(segmenter.plan(texts), translate_segments, on_batch, sources)
+
+def batch_reporter(lang_code, progress, report):
+    """Build an ``on_batch`` callback that reports failures and advances ``progress``."""
+    lang_name = language_name(lang_code)
+    
+    def report_batch(batch_translations, batch_failures):
+        report_failures(batch_failures, report)
+        
+        # Update progress
+        translated_cells, overall_progress = progress.advance(lang_code, len(batch_translations))
+        total_cells = progress.totals[lang_code]
+        cell_progress = (translated_cells / total_cells) * 100 if total_cells else 100
+        report(
+            f"Translating to {lang_name}: {translated_cells}/{total_cells} unique texts ({cell_progress:.1f}%)",
+            overall_progress
+        )
+    return report_batch
+
+def report_failures(failures, report):
+    """Report a batch of failed texts as one message rather than one per text."""
+    if not failures:
+        return
+    failed_text, error = next(iter(failures.items()))
+    if len(failures) == 1:
+        report(f"Error translating '{failed_text}': {error[:100]}...")
+    else:
+        report(f"Error translating {len(failures)} texts, e.g. '{failed_text}': {error[:100]}...")
+
+def open_journal(output_file, resume, report):
+    """Open the checkpoint journal for an output file, reporting what a resume picks up."""
+    journal = TranslationJournal(journal_path(output_file), resume=resume)
+    if journal.translations or journal.failures:
+        report(f"Resuming {os.path.basename(output_file)}: {len(journal.translations)} texts already done, "
+               f"{len(journal.failures)} failed texts to retry")
+    return journal
+
+def finish_journal(journal, failures, report):
+    """Delete a journal once its output is saved, or keep it to record failed texts."""
+    if failures:
+        report(f"{len(failures)} texts failed; they are recorded in {journal.path} and will be retried on resume")
+    else:
+        journal.discard()
+
+class WorkbookTranslationError(Exception):
+    """Raised when a workbook can't be translated at all (unreadable input, bad output folder)."""
+
+def language_name(lang_code):
+    """Return the user-friendly name for a language code, or the code itself."""
+    return next((name for name, code in LANGUAGE_MAP.items() if code == lang_code), lang_code)
+
+def open_request_pool(max_workers, group_languages=False):
+    """
+    Open the request pool shared by every language.
+    
+    With ``group_languages`` it is a ``batching.GroupedExecutor``, which sends
+    each batch to all target languages back to back.
+    """
+    if group_languages:
+        return GroupedExecutor(max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+def prepare_output_location(input_file, output_location, report):
+    """
+    Resolves and creates the output folder for an input file.
+    
+    Returns:
+        tuple: (base filename without extension, output folder)
+    """
+    # Get the base filename without extension
+    base_filename = os.path.splitext(os.path.basename(input_file))[0]
+    if output_location is None:
+        output_location = os.path.dirname(os.path.abspath(input_file))
+    
+    # Create output folder if it doesn't exist
+    try:
+        if not os.path.exists(output_location):
+            # exist_ok because batch mode prepares several files at once
+            os.makedirs(output_location, exist_ok=True)
+            report(f"Created output directory: {output_location}")
+    except Exception as e:
+        raise WorkbookTranslationError(f"Could not create output directory: {e}") from e
+    return base_filename, output_location
+
+def translate_workbook(input_file, target_languages, output_location=None, progress_callback=None,
+                       max_workers=MAX_CONCURRENT_REQUESTS, memory=None, streaming=False,
+                       chunk_size=STREAMING_CHUNK_SIZE, preserve_formatting=False, incremental=False,
+                       resume=False, backend=None, rules=None, segmenter=None, writer=DEFAULT_WRITER,
+                       single_workbook=False, snapshot=True, detect_source=False, group_languages=False,
+                       control=None):
+    """
+    Translates the text columns of an Excel file into several languages.
+    
+    One file named ``{base_filename}_{lang_code}.xlsx`` (or .csv/.parquet,
+    depending on the writer) is written to ``output_location`` per target
+    language, as soon as that language is done. With ``single_workbook``, one
+    ``{base_filename}_translated.xlsx`` with a sheet per language is written
+    once every language is done instead.
+    
+    Args:
+        input_file (str): Path to the Excel file to translate
+        target_languages (list): Language codes to translate to (e.g., ['fr', 'de'])
+        output_location (str): Output folder; defaults to the input file's folder
+        progress_callback (callable): Optional ``progress_callback(message, percent=None)``
+            called with status messages and, when it changes, the overall percentage;
+            percentage updates are throttled to PROGRESS_INTERVAL
+        max_workers (int): Maximum number of translation requests in flight
+        memory (TranslationMemory): Translation memory to use; a new one is opened
+            (and closed again) when not given
+        streaming (bool): Read and write the first sheet in chunks of ``chunk_size``
+            rows (see streaming.py) so memory stays bounded on very large sheets
+        chunk_size (int): Rows per chunk in streaming mode
+        preserve_formatting (bool): Translate string cells in place across all
+            sheets, keeping styles and layout (see preserve_format.py)
+        incremental (bool): Only translate cells that changed since the previous
+            output was written, patching the rest in from that output (see manifest.py)
+        resume (bool): Pick up an interrupted run from the checkpoint journals
+            left next to the outputs (see journal.py); texts that failed are retried
+        backend (backends.TranslationBackend): Backend to translate with; defaults
+            to the shared Google backend
+        rules (cell_rules.CellRules): Decides which columns and cells are translated;
+            defaults to the built-in passthrough rules for codes, URLs and numbers
+        segmenter (segmenter.Segmenter): Optional segmenter masking placeholders and
+            splitting long texts, so templates and repeated sentences are translated once
+        writer (str): Output writer, one of writers.WRITERS (the formatting-preserving
+            engine always saves with openpyxl)
+        single_workbook (bool): Write all languages as sheets of one workbook
+        snapshot (bool): Load the input from its cached columnar snapshot when it is
+            unchanged, and save one otherwise (default engine only, see snapshot.py)
+        detect_source (bool): Detect the source language of every unique text once,
+            cached across runs, and name it in the requests of every language
+            instead of letting the backend detect it again (see source_detection.py)
+        group_languages (bool): Send each batch to all target languages back to back
+            rather than working through the languages side by side
+        control (run_control.RunControl): Optional switch to pause or cancel the run
+            from another thread, which also tracks live progress per language. A
+            cancelled run still saves every output, with the texts it never sent
+            left untranslated and recorded as failures (see run_control.py)
+    
+    Returns:
+        dict: "outputs" (lang code -> written file), "errors" (lang code -> error
+            message), "failures" (lang code -> {text: error}), "memory" (cache stats)
+            and, for the default engine, "timings" (seconds per phase)
+    
+    Raises:
+        WorkbookTranslationError: If the input can't be read or the output folder can't be created
+        ValueError: If incremental mode is combined with another engine or a single
+            workbook, or the writer can't be used with the chosen engine
+    """
+    if incremental and (preserve_formatting or streaming):
+        raise ValueError("Incremental mode is only supported by the default engine.")
+    if incremental and single_workbook:
+        raise ValueError("Incremental mode needs one output file per language.")
+    if preserve_formatting and (writer != DEFAULT_WRITER or single_workbook):
+        raise ValueError("The formatting-preserving engine writes one .xlsx per language with openpyxl.")
+    check_writer(writer, single_workbook, rows=streaming)
+    
+    if preserve_formatting:
+        from preserve_format import translate_workbook_preserving
+        return translate_workbook_preserving(
+            input_file, target_languages, output_location, progress_callback=progress_callback,
+            max_workers=max_workers, memory=memory, resume=resume, backend=backend, rules=rules,
+            segmenter=segmenter, detect_source=detect_source, group_languages=group_languages,
+            control=control
+        )
+    
+    if streaming:
+        from streaming import translate_workbook_streaming
+        return translate_workbook_streaming(
+            input_file, target_languages, output_location, progress_callback=progress_callback,
+            max_workers=max_workers, memory=memory, chunk_size=chunk_size, resume=resume,
+            backend=backend, rules=rules, segmenter=segmenter, writer=writer,
+            single_workbook=single_workbook, detect_source=detect_source, group_languages=group_languages,
+            control=control
+        )
+    
+    report = progress_reporter(progress_callback)
+    metrics = get_metrics()
+    
+    # Seconds spent per phase; translate and write are summed over languages
+    timings = {"read": 0.0, "classify": 0.0, "translate": 0.0, "write": 0.0}
+    started = time.perf_counter()
+    
+    # Read the Excel file
+    report(f"Reading Excel file: {input_file}")
+    try:
+        with metrics.timer("read", timings):
+            df = read_workbook(input_file, use_snapshot=snapshot)
+    except Exception as e:
+        raise WorkbookTranslationError(f"Failed to read Excel file: {e}") from e
+    
+    base_filename, output_location = prepare_output_location(input_file, output_location, report)
+    
+    # Identify translatable columns and classify their cells in one vectorized pass;
+    # codes, URLs and numbers stored as text never reach the backend
+    rules = rules or CellRules()
+    with metrics.timer("classify", timings):
+        translatable_columns = rules.text_columns(df)
+        classification = rules.classify(df, translatable_columns)
+    metrics.count("cells_translatable", classification.counts["translate"])
+    metrics.count("cells_passthrough", classification.counts["passthrough"])
+    
+    # Each unique string is translated only once per language
+    unique_texts = classification.unique_texts
+    if translatable_columns:
+        counts = classification.counts
+        report(f"Found {len(unique_texts)} unique texts in {counts['translate']} cells to translate "
+               f"({counts['passthrough']} passed through) across {len(translatable_columns)} text columns")
+    
+    # Fingerprint every text cell so later runs can skip unchanged ones
+    fingerprints = None
+    if incremental:
+        from manifest import fingerprint_frame
+        fingerprints = fingerprint_frame(df, translatable_columns)
+    
+    # Open the persistent translation memory shared across runs
+    own_memory = memory is None
+    if own_memory:
+        memory = TranslationMemory()
+    progress = LanguageProgress(target_languages, len(unique_texts), control)
+    result = {"outputs": {}, "errors": {}, "failures": {}, "timings": timings}
+    
+    # Large outputs for several languages are written in parallel processes
+    sheets = {} if single_workbook else None
+    writers = None
+    if not single_workbook and len(target_languages) > 1 and df.size >= PARALLEL_WRITE_MIN_CELLS:
+        writers = write_pool(min(len(target_languages), os.cpu_count() or 1))
+    
+    try:
+        # Languages run side by side; the shared request pool bounds how many
+        # requests are in flight across all of them
+        with open_request_pool(max_workers, group_languages) as request_pool, \
+                ThreadPoolExecutor(max_workers=max(1, len(target_languages))) as language_pool:
+            # Source languages are detected once here rather than by every language's requests
+            sources = None
+            if detect_source and unique_texts:
+                sources = detect_sources(unique_texts, memory, backend, request_pool, timings, control)
+                report(f"Detected the source language of {len(sources)}/{len(unique_texts)} unique texts")
+            
+            futures = {
+                language_pool.submit(
+                    _translate_language, df, translatable_columns, unique_texts, lang_code,
+                    output_path(output_location, f"{base_filename}_{lang_code}", writer),
+                    memory, request_pool, progress, report, classification.masks, fingerprints,
+                    resume, backend, segmenter, writer=writer, write_pool=writers, sheets=sheets,
+                    sources=sources, control=control
+                ): lang_code
+                for lang_code in target_languages
+            }
+            for future in as_completed(futures):
+                lang_code = futures[future]
+                try:
+                    output_file, failures, language_timings = future.result()
+                except Exception as e:
+                    result["errors"][lang_code] = str(e)
+                    report(f"Error: {e}")
+                    continue
+                result["failures"][lang_code] = failures
+                if output_file:
+                    result["outputs"][lang_code] = output_file
+                for phase, seconds in language_timings.items():
+                    timings[phase] += seconds
+        
+        if sheets:
+            _save_single_workbook(sheets, target_languages, base_filename, output_location, writer, result, report)
+        
+        result["memory"] = memory.stats()
+        timings["total"] = time.perf_counter() - started
+        metrics.observe("total", timings["total"])
+    finally:
+        if writers is not None:
+            writers.shutdown()
+        if own_memory:
+            memory.close()
+    
+    report(f"Translation memory: {result['memory']['hits']} hits, {result['memory']['misses']} misses", 100)
+    return result
+
+def _save_single_workbook(sheets, target_languages, base_filename, output_location, writer, result, report):
+    # Writes the languages collected in sheets as one workbook, in the order they were asked for
+    output_file = output_path(output_location, f"{base_filename}_translated", writer)
+    languages = [lang_code for lang_code in target_languages if lang_code in sheets]
+    try:
+        with get_metrics().timer("write", result["timings"]):
+            write_sheets({lang_code: sheets[lang_code][0] for lang_code in languages}, output_file, writer)
+    except Exception as e:
+        for lang_code in languages:
+            result["errors"][lang_code] = f"Error saving file {output_file}: {e}"
+        report(f"Error: Error saving file {output_file}: {e}")
+        return
+    report(f"Saved translated file: {output_file}")
+    for lang_code in languages:
+        result["outputs"][lang_code] = output_file
+        finish_journal(sheets[lang_code][1], result["failures"][lang_code], report)
+
+def _translate_language(df, translatable_columns, unique_texts, lang_code, output_file,
+                        memory, request_pool, progress, report, translate_masks, fingerprints=None,
+                        resume=False, backend=None, segmenter=None, writer=DEFAULT_WRITER, write_pool=None,
+                        sheets=None, sources=None, control=None):
+    # Translates one language and saves it; returns (output file or None, failures,
+    # seconds spent translating and writing). With fingerprints, unchanged cells are patched in from the previous output.
+    # Finished translations are checkpointed to a journal until the output is saved.
+    # With a write_pool the file is written in a worker process; with a sheets dict it
+    # isn't written at all, and (translated df, journal) is stored there for the caller.
+    lang_name = language_name(lang_code)
+    
+    report(f"Translating to {lang_name} ({lang_code})")
+    
+    if not translatable_columns:
+        report(f"No text columns found to translate for {lang_name}.")
+        return None, {}, {}
+    
+    metrics = get_metrics()
+    timings = {}
+    try:
+        with metrics.timer("translate", timings):
+            # Create a copy of the original dataframe
+            translated_df = df.copy()
+            
+            masks = translate_masks
+            if fingerprints is not None:
+                changed = _patch_previous_output(translated_df, translatable_columns, fingerprints, output_file)
+                if changed is not None:
+                    masks = {col: translate_masks[col] & changed[col] for col in translate_masks}
+                    unique_texts = collect_unique_texts(df, translatable_columns, masks)
+                    progress.set_total(lang_code, len(unique_texts))
+                    changed_cells = sum(int(mask.sum()) for mask in changed.values())
+                    report(f"Incremental run for {lang_name}: {changed_cells} new or changed cells, "
+                           f"{len(unique_texts)} texts to translate")
+            
+            journal = open_journal(output_file, resume, report)
+            try:
+                translations, failures = translate_texts(
+                    unique_texts, lang_code, memory, executor=request_pool,
+                    on_batch=batch_reporter(lang_code, progress, report), journal=journal,
+                    backend=backend, segmenter=segmenter, sources=sources, control=control
+                )
+            finally:
+                journal.close()
+            
+            # Map the translations back onto every matching cell
+            apply_translations(translated_df, translatable_columns, translations, masks)
+    except Exception as e:
+        raise WorkbookTranslationError(f"Error during translation to {lang_name}: {e}") from e
+    
+    if sheets is not None:
+        sheets[lang_code] = (translated_df, journal)
+        return None, failures, timings
+    
+    # Save this language as soon as it is done
+    try:
+        with metrics.timer("write", timings):
+            if write_pool is None:
+                write_frame(translated_df, output_file, writer)
+            else:
+                write_pool.submit(write_frame, translated_df, output_file, writer).result()
+    except Exception as e:
+        raise WorkbookTranslationError(f"Error saving file {output_file}: {e}") from e
+    report(f"Saved translated file: {output_file}")
+    finish_journal(journal, failures, report)
+    
+    if fingerprints is not None:
+        from manifest import manifest_path, save_manifest
+        
+        # Cells that failed to translate are recorded as changed so the next run retries them
+        saved = {}
+        for col in translatable_columns:
+            hashes = fingerprints[str(col)].copy()
+            if failures:
+                hashes[df[col].isin(list(failures)).to_numpy()] = 0
+            saved[str(col)] = hashes
+        save_manifest(manifest_path(output_file), saved)
+    
+    return output_file, failures, timings
+
+def _patch_previous_output(translated_df, columns, fingerprints, output_file):
+    # Copies unchanged cells from the previous output into translated_df and returns
+    # column -> boolean mask of the cells that still need translating, or None when
+    # there is no usable previous output
+    from manifest import load_manifest, manifest_path, unchanged_cells
+    
+    previous = load_manifest(manifest_path(output_file))
+    if previous is None or not os.path.exists(output_file):
+        return None
+    try:
+        # Only the translated columns are needed from the previous output
+        previous_df = read_frame(output_file, columns)
+    except Exception:
+        return None
+    
+    unchanged = unchanged_cells(fingerprints, previous, len(previous_df))
+    # Headers are matched as text, since e.g. CSV outputs read numeric headers back as strings
+    previous_columns = {str(col): col for col in previous_df.columns}
+    changed = {}
+    for col in columns:
+        mask = unchanged[str(col)]
+        if str(col) not in previous_columns:
+            mask[:] = False
+        elif mask.any():
+            # Unchanged cells only ever lie within the previous output's rows
+            rows = mask.nonzero()[0]
+            translated_df.loc[mask, col] = previous_df[previous_columns[str(col)]].to_numpy()[rows]
+        changed[str(col)] = ~mask
+    return changed
+
+class ThrottledProgress:
+    """
+    Progress callback wrapper that forwards percentage updates at a fixed rate.
+    
+    Updates carrying a percentage arrive once per batch and are dropped when
+    they come within ``interval`` seconds of the last one forwarded, except
+    for the final 100% update. Plain messages (files read or saved, errors)
+    are always forwarded.
+    """
+    
+    def __init__(self, callback, interval=PROGRESS_INTERVAL):
+        self.callback = callback
+        self.interval = interval
+        self._last = 0.0
+        self._lock = Lock()
+    
+    def __call__(self, message, percent=None):
+        if percent is not None and percent < 100:
+            with self._lock:
+                now = time.monotonic()
+                if now - self._last < self.interval:
+                    return
+                self._last = now
+        self.callback(message, percent)
+
+def progress_reporter(progress_callback):
+    """Wrap a progress callback so it fires at most at the UI refresh rate."""
+    if progress_callback is None:
+        return _ignore_progress
+    if isinstance(progress_callback, ThrottledProgress):
+        return progress_callback
+    return ThrottledProgress(progress_callback)
+
+def _ignore_progress(message, percent=None):
+    pass
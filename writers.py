@@ -0,0 +1,301 @@
+"""
+Output writers for translated sheets.
+
+Every engine writes its outputs through one of these writers:
+
+- ``openpyxl``: an openpyxl ``write_only`` workbook, rows streamed to disk (default)
+- ``xlsxwriter``: xlsxwriter in ``constant_memory`` mode, usually the fastest
+  way to produce a large .xlsx (needs the xlsxwriter package)
+- ``csv``: UTF-8 CSV with a byte order mark, so Excel detects the encoding
+- ``parquet``: Parquet for downstream data pipelines (needs pyarrow)
+
+Rows are written strictly in order, which is what keeps the .xlsx writers'
+memory flat. The .xlsx writers can also put several sheets into one file,
+e.g. one sheet per language. ``write_pool`` gives a process pool for
+writing several outputs in parallel, since the writers are CPU-bound
+Python code.
+"""
+
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+# Available writers and the extension of the files they produce
+WRITER_EXTENSIONS = {
+    "openpyxl": ".xlsx",
+    "xlsxwriter": ".xlsx",
+    "csv": ".csv",
+    "parquet": ".parquet",
+}
+WRITERS = tuple(WRITER_EXTENSIONS)
+
+DEFAULT_WRITER = "openpyxl"
+
+# Writers that can hold several sheets in one file
+MULTI_SHEET_WRITERS = ("openpyxl", "xlsxwriter")
+
+# Writers that can be fed row by row (all but Parquet, which needs whole columns)
+ROW_WRITERS = ("openpyxl", "xlsxwriter", "csv")
+
+
+def output_path(output_location, name, writer=DEFAULT_WRITER):
+    """Path of an output file named ``name`` with the writer's extension."""
+    return os.path.join(output_location, name + WRITER_EXTENSIONS[writer])
+
+
+def check_writer(writer, single_workbook=False, rows=False):
+    """
+    Validates a writer choice.
+
+    Args:
+        writer (str): The writer name
+        single_workbook (bool): Whether all languages go into one multi-sheet file
+        rows (bool): Whether the caller writes row by row (the streaming engine)
+
+    Raises:
+        ValueError: If the writer is unknown or can't do what is asked
+    """
+    if writer not in WRITER_EXTENSIONS:
+        raise ValueError(f"Unknown output writer: {writer}")
+    if single_workbook and writer not in MULTI_SHEET_WRITERS:
+        raise ValueError(f"The {writer} writer can't put several languages into one file.")
+    if rows and writer not in ROW_WRITERS:
+        raise ValueError(f"The {writer} writer can't write row by row.")
+
+
+class RowWriter:
+    """
+    Base class for writers fed one row at a time.
+
+    ``add_sheet`` returns a sheet whose ``append(row)`` adds the next row;
+    sheets of the same file may be filled in any interleaving.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.closed = False
+
+    def add_sheet(self, name):
+        raise NotImplementedError
+
+    def close(self):
+        """Finish the file; nothing is guaranteed on disk before this."""
+        if not self.closed:
+            self.closed = True
+            self._finish()
+
+    def discard(self):
+        """Drop the file without producing an output."""
+        if not self.closed:
+            self.closed = True
+            self._finish()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _finish(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class OpenpyxlRowWriter(RowWriter):
+    """openpyxl ``write_only`` workbook, saved on close."""
+
+    def __init__(self, path):
+        from openpyxl import Workbook
+
+        super().__init__(path)
+        self._workbook = Workbook(write_only=True)
+
+    def add_sheet(self, name):
+        return self._workbook.create_sheet(name)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._workbook.save(self.path)
+
+    def discard(self):
+        # Nothing is on disk until the workbook is saved
+        self.closed = True
+
+
+class _XlsxwriterSheet:
+    def __init__(self, worksheet):
+        self._worksheet = worksheet
+        self._row = 0
+
+    def append(self, row):
+        self._worksheet.write_row(self._row, 0, row)
+        self._row += 1
+
+
+class XlsxwriterRowWriter(RowWriter):
+    """xlsxwriter workbook in ``constant_memory`` mode; each row is flushed once written."""
+
+    def __init__(self, path):
+        import xlsxwriter
+
+        super().__init__(path)
+        # Text is written as text: no formulas or hyperlinks guessed from cell contents
+        self._workbook = xlsxwriter.Workbook(path, {
+            "constant_memory": True,
+            "strings_to_formulas": False,
+            "strings_to_urls": False,
+            "nan_inf_to_errors": True,
+            "default_date_format": "yyyy-mm-dd hh:mm:ss",
+        })
+
+    def add_sheet(self, name):
+        return _XlsxwriterSheet(self._workbook.add_worksheet(name))
+
+    def _finish(self):
+        self._workbook.close()
+
+
+class _CsvSheet:
+    def __init__(self, writer):
+        self.append = writer.writerow
+
+
+class CsvRowWriter(RowWriter):
+    """UTF-8 CSV with a byte order mark; holds a single sheet."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(path, "w", newline="", encoding="utf-8-sig")
+        self._sheet = None
+
+    def add_sheet(self, name):
+        if self._sheet is not None:
+            raise ValueError("CSV files hold a single sheet")
+        self._sheet = _CsvSheet(csv.writer(self._file))
+        return self._sheet
+
+    def _finish(self):
+        self._file.close()
+
+
+ROW_WRITER_CLASSES = {
+    "openpyxl": OpenpyxlRowWriter,
+    "xlsxwriter": XlsxwriterRowWriter,
+    "csv": CsvRowWriter,
+}
+
+
+def open_rows(path, writer=DEFAULT_WRITER):
+    """Open a RowWriter for ``path``."""
+    check_writer(writer, rows=True)
+    return ROW_WRITER_CLASSES[writer](path)
+
+
+def frame_rows(df):
+    """
+    Yield the header and then every row of a DataFrame, with missing values as None.
+
+    Headers keep their type, so numeric and date headers are written as numbers
+    and dates, as ``to_excel`` would.
+    """
+    yield [_header_value(col) for col in df.columns]
+    values = df.astype(object).where(df.notna(), None)
+    yield from values.itertuples(index=False, name=None)
+
+
+def _header_value(col):
+    # numpy scalars (e.g. int64 headers) become the Python values the writers know
+    import numpy as np
+
+    return col.item() if isinstance(col, np.generic) else col
+
+
+def write_frame(df, path, writer=DEFAULT_WRITER, sheet_name="Sheet1"):
+    """
+    Writes one DataFrame (without its index) to ``path``.
+
+    Returns:
+        float: Seconds spent writing, for callers that run this in another process
+    """
+    return write_sheets({sheet_name: df}, path, writer)
+
+
+def write_sheets(sheets, path, writer=DEFAULT_WRITER):
+    """
+    Writes DataFrames as the sheets of one file, in order.
+
+    Args:
+        sheets (dict): Sheet name -> DataFrame
+        path (str): Destination file
+        writer (str): One of WRITERS; several sheets need a multi-sheet writer
+
+    Returns:
+        float: Seconds spent writing
+    """
+    check_writer(writer, single_workbook=len(sheets) > 1)
+    started = time.perf_counter()
+    if writer == "parquet":
+        (df,) = sheets.values()
+        _parquet_safe(df).to_parquet(path, index=False)
+    else:
+        with open_rows(path, writer) as rows:
+            for name, df in sheets.items():
+                sheet = rows.add_sheet(name)
+                for row in frame_rows(df):
+                    sheet.append(row)
+    return time.perf_counter() - started
+
+
+def read_frame(path, columns=None):
+    """
+    Read back an output written by any writer, picked by its extension.
+
+    Args:
+        path (str): The output file
+        columns (list): Only read these columns (by header name); missing ones are skipped
+    """
+    import pandas as pd
+
+    extension = os.path.splitext(path)[1].lower()
+    usecols = None
+    if columns is not None:
+        wanted = {str(col) for col in columns}
+        usecols = lambda name: str(name) in wanted
+    if extension == ".csv":
+        return pd.read_csv(path, encoding="utf-8-sig", usecols=usecols)
+    if extension == ".parquet":
+        if columns is not None:
+            import pyarrow.parquet as pq
+
+            columns = [name for name in pq.read_schema(path).names if usecols(name)]
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_excel(path, usecols=usecols)
+
+
+def _parquet_safe(df):
+    # Parquet needs one type per column; columns mixing text with numbers are stored as text
+    from pandas.api.types import infer_dtype
+
+    mixed = [col for col in df.columns
+             if df[col].dtype == object and infer_dtype(df[col], skipna=True).startswith("mixed")]
+    if not mixed and all(isinstance(col, str) for col in df.columns):
+        return df
+    df = df.copy()
+    for col in mixed:
+        df[col] = df[col].map(lambda value: value if value is None or value != value else str(value))
+    df.columns = [str(col) for col in df.columns]
+    return df
+
+
+def write_pool(max_workers):
+    """
+    Process pool for writing outputs (and parsing inputs in batch mode) in parallel.
+
+    Workers are spawned rather than forked, since the caller usually has
+    translation threads running.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context("spawn"))